@@ -10,7 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/3.2/ref/settings/
 """
 from pathlib import Path
-from my_settings import MY_SECRET_KEY, MY_DATABASES
+from my_settings import MY_SECRET_KEY, MY_DATABASES, MY_CACHES
 
 import pymysql
 
@@ -47,6 +47,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "core.middleware.QueryInstrumentationMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -82,6 +83,16 @@ WSGI_APPLICATION = "config.wsgi.application"
 DATABASES = MY_DATABASES
 
 
+# Cache
+# https://docs.djangoproject.com/en/3.2/topics/cache/
+# Catalog, principal and reference-data versions live in the default cache and
+# must be shared by every worker, so MY_CACHES should point at a shared backend
+# such as django.core.cache.backends.memcached.PyMemcacheCache. LocMemCache is
+# only safe for a single process and is reported by `manage.py check --deploy`
+
+CACHES = MY_CACHES
+
+
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
 
@@ -101,6 +112,60 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+# Password hashing (users.hashers)
+# PASSWORD_HASHER_WORKERS > 0 runs bcrypt in a process pool of that size
+
+BCRYPT_ROUNDS = 12
+
+PASSWORD_HASHER_WORKERS = 0
+
+
+# SQL instrumentation (core.middleware)
+# Requests slower than SLOW_REQUEST_MS, or repeating one query pattern
+# N_PLUS_ONE_THRESHOLD times, are logged to "core.sql"
+
+SLOW_REQUEST_MS = 200
+
+N_PLUS_ONE_THRESHOLD = 5
+
+
+# Idempotency keys (transactions.idempotency)
+# Stored responses are replayed for IDEMPOTENCY_KEY_TTL seconds, then pruned
+# by the prune_idempotency_keys command
+
+IDEMPOTENCY_KEY_TTL = 60 * 60 * 24
+
+
+# Transaction write-behind (transactions.outbox)
+# With TRANSACTION_WRITE_BEHIND the balance and ledger stay synchronous while
+# Transaction rows queue in an outbox drained by drain_transaction_outbox
+
+TRANSACTION_WRITE_BEHIND = False
+
+
+# JSON rendering (core.renderers)
+# "orjson" falls back to "stdlib" when orjson is not installed
+
+JSON_RENDERER = "orjson"
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "console": {
+            "class": "logging.StreamHandler",
+        },
+    },
+    "loggers": {
+        "core.sql": {
+            "handlers": ["console"],
+            "level": "WARNING",
+            "propagate": False,
+        },
+    },
+}
+
+
 # Internationalization
 # https://docs.djangoproject.com/en/3.2/topics/i18n/
 
@@ -147,8 +212,17 @@ CORS_ALLOW_HEADERS = (
     "authorization",
     "content-type",
     "dnt",
+    "idempotency-key",
+    "if-modified-since",
+    "if-none-match",
     "origin",
     "user-agent",
     "x-csrftoken",
     "x-requested-with",
 )
+
+CORS_EXPOSE_HEADERS = (
+    "etag",
+    "idempotent-replayed",
+    "last-modified",
+)
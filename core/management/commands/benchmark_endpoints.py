@@ -0,0 +1,89 @@
+import json
+
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+
+from core.benchmark import default_scenarios, find_regressions, run_benchmark, seed_dataset
+from users.fake_kakao import FakeKakaoServer
+
+
+class Command(BaseCommand):
+    help = "Seed a throwaway database and record latency, query count and bytes for every endpoint"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=20)
+        parser.add_argument("--investments", type=int, default=50)
+        parser.add_argument("--portfolios-per-user", type=int, default=10)
+        parser.add_argument("--transactions-per-user", type=int, default=50)
+        parser.add_argument("--repayments-per-user", type=int, default=10)
+        parser.add_argument("--iterations", type=int, default=20)
+        parser.add_argument("--baseline", default=str(settings.BASE_DIR / "benchmarks" / "baseline.json"))
+        parser.add_argument("--update-baseline", action="store_true")
+        parser.add_argument("--allow-missing-baseline", action="store_true")
+        parser.add_argument("--latency-ratio", type=float, default=1.5)
+        parser.add_argument("--query-slack", type=int, default=0)
+
+    def handle(self, *args, **options):
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+
+        try:
+            cache.clear()
+            seed_dataset(
+                users=options["users"],
+                investments=options["investments"],
+                portfolios_per_user=options["portfolios_per_user"],
+                transactions_per_user=options["transactions_per_user"],
+                repayments_per_user=options["repayments_per_user"],
+            )
+
+            with FakeKakaoServer() as kakao, override_settings(KAKAO_API_URL=kakao.url):
+                results = run_benchmark(default_scenarios(), iterations=options["iterations"])
+
+        finally:
+            cache.clear()
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        self.stdout.write(f"{'endpoint':<42} {'p50 ms':>8} {'p95 ms':>8} {'queries':>8} {'bytes':>8}")
+
+        for route, result in results.items():
+            self.stdout.write(
+                f"{route:<42} {result['p50_ms']:>8.2f} {result['p95_ms']:>8.2f} "
+                f"{result['queries']:>8} {result['bytes']:>8}"
+            )
+
+        if options["update_baseline"]:
+            Path(options["baseline"]).parent.mkdir(parents=True, exist_ok=True)
+
+            with open(options["baseline"], "w") as out_file:
+                json.dump(results, out_file, indent=2, sort_keys=True)
+
+            self.stdout.write(self.style.SUCCESS(f"BASELINE WRITTEN TO {options['baseline']}"))
+            return
+
+        try:
+            with open(options["baseline"]) as in_file:
+                baseline = json.load(in_file)
+
+        except FileNotFoundError:
+            if not options["allow_missing_baseline"]:
+                raise CommandError("NO BASELINE FOUND, RUN WITH --update-baseline")
+
+            self.stdout.write(self.style.WARNING("NO BASELINE FOUND, RUN WITH --update-baseline"))
+            return
+
+        regressions = find_regressions(
+            results,
+            baseline,
+            latency_ratio=options["latency_ratio"],
+            query_slack=options["query_slack"],
+        )
+
+        if regressions:
+            raise CommandError("REGRESSIONS DETECTED\n" + "\n".join(regressions))
+
+        self.stdout.write(self.style.SUCCESS("NO REGRESSIONS"))
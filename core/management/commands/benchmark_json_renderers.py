@@ -0,0 +1,97 @@
+import datetime
+import statistics
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.renderers import RENDERERS, get_json_renderer
+
+
+def investment_rows(rows):
+    return {
+        "investments" : [
+            {
+                "id"               : index,
+                "name"             : f"주거안정 {index}호",
+                "return_rate"      : 8.9,
+                "duration"         : 12,
+                "target_amount"    : 100000000,
+                "grade"            : "A+",
+                "image"            : f"https://example.com/{index}.jpg",
+                "recrutement_rate" : index % 100,
+            }
+            for index in range(1, rows + 1)
+        ],
+        "next_cursor" : None,
+    }
+
+
+def history_rows(rows):
+    now = timezone.now()
+
+    return {
+        "transactions" : [
+            {
+                "created_time" : now - datetime.timedelta(minutes=index),
+                "type"         : "입금",
+                "information"  : "농협은행",
+                "amounts"      : index * 1000,
+            }
+            for index in range(rows)
+        ],
+        "next_cursor" : None,
+    }
+
+
+def ndjson_rows(rows):
+    return history_rows(rows)["transactions"]
+
+
+PAYLOADS = {
+    "investments"                        : (investment_rows, False),
+    "transactions/history"               : (history_rows, False),
+    "transactions/history?format=ndjson" : (ndjson_rows, True),
+}
+
+
+class Command(BaseCommand):
+    help = "Compare encode time, peak memory and size of every JSON renderer on endpoint-shaped payloads"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=5000)
+        parser.add_argument("--iterations", type=int, default=20)
+
+    def handle(self, *args, **options):
+        renderers = {get_json_renderer(name).name: get_json_renderer(name) for name in RENDERERS}
+
+        self.stdout.write(f"{'endpoint':<36} {'renderer':<8} {'p50 ms':>8} {'peak KiB':>9} {'bytes':>9}")
+
+        for endpoint, (build, per_row) in PAYLOADS.items():
+            payload = build(options["rows"])
+
+            for name, renderer in renderers.items():
+                encode  = self.encoder(renderer, payload, per_row)
+                timings = []
+
+                for _ in range(options["iterations"]):
+                    started_at = time.perf_counter()
+                    encode()
+                    timings.append((time.perf_counter() - started_at) * 1000)
+
+                tracemalloc.start()
+                size = len(encode())
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+
+                self.stdout.write(
+                    f"{endpoint:<36} {name:<8} {statistics.median(timings):>8.2f} "
+                    f"{peak / 1024:>9.1f} {size:>9}"
+                )
+
+    def encoder(self, renderer, payload, per_row):
+        if per_row:
+            return lambda: b"".join(renderer.render(row) + b"\n" for row in payload)
+
+        return lambda: renderer.render(payload)
@@ -0,0 +1,138 @@
+import hashlib
+import json
+import logging
+import re
+import time
+
+from collections import Counter
+
+from django.conf import settings
+from django.db import connection
+
+logger = logging.getLogger("core.sql")
+
+IN_CLAUSE   = re.compile(r"IN \((?:%s, )*%s\)")
+LITERALS    = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+WHITESPACE  = re.compile(r"\s+")
+
+
+def fingerprint(sql):
+    normalized = WHITESPACE.sub(" ", sql).strip()
+    normalized = IN_CLAUSE.sub("IN (...)", normalized)
+    normalized = LITERALS.sub("?", normalized)
+
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()[:12], normalized
+
+
+class QueryRecorder:
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started_at = time.perf_counter()
+
+        try:
+            return execute(sql, params, many, context)
+
+        finally:
+            self.queries.append(
+                {
+                    "sql"         : sql,
+                    "params"      : repr(params),
+                    "duration_ms" : (time.perf_counter() - started_at) * 1000,
+                }
+            )
+
+    @property
+    def duration_ms(self):
+        return sum(query["duration_ms"] for query in self.queries)
+
+    def duplicates(self):
+        counts = Counter((query["sql"], query["params"]) for query in self.queries)
+
+        return [
+            {"fingerprint": fingerprint(sql)[0], "sql": fingerprint(sql)[1], "count": count}
+            for (sql, params), count in counts.items()
+            if count > 1
+        ]
+
+    def repeated_patterns(self, threshold):
+        counts = Counter(fingerprint(query["sql"]) for query in self.queries)
+
+        return [
+            {"fingerprint": key, "sql": sql, "count": count}
+            for (key, sql), count in counts.items()
+            if count >= threshold
+        ]
+
+    def slowest(self, limit=3):
+        return [
+            {
+                "fingerprint" : fingerprint(query["sql"])[0],
+                "sql"         : fingerprint(query["sql"])[1],
+                "duration_ms" : round(query["duration_ms"], 3),
+            }
+            for query in sorted(self.queries, key=lambda query: -query["duration_ms"])[:limit]
+        ]
+
+
+class QueryInstrumentationMiddleware:
+    def __init__(self, get_response):
+        self.get_response         = get_response
+        self.slow_request_ms      = getattr(settings, "SLOW_REQUEST_MS", 200)
+        self.n_plus_one_threshold = getattr(settings, "N_PLUS_ONE_THRESHOLD", 5)
+
+    def __call__(self, request):
+        recorder   = QueryRecorder()
+        started_at = time.perf_counter()
+
+        with connection.execute_wrapper(recorder):
+            response = self.get_response(request)
+
+        total_ms = (time.perf_counter() - started_at) * 1000
+
+        response["Server-Timing"] = (
+            f'db;dur={recorder.duration_ms:.2f};desc="{len(recorder.queries)} queries", '
+            f"total;dur={total_ms:.2f}"
+        )
+
+        if response.streaming:
+            response.streaming_content = self.record_stream(
+                request, response, recorder, started_at, response.streaming_content
+            )
+        else:
+            self.report(request, response, recorder, total_ms)
+
+        return response
+
+    def record_stream(self, request, response, recorder, started_at, content):
+        try:
+            with connection.execute_wrapper(recorder):
+                yield from content
+
+        finally:
+            self.report(request, response, recorder, (time.perf_counter() - started_at) * 1000)
+
+    def report(self, request, response, recorder, total_ms):
+        duplicates = recorder.duplicates()
+        n_plus_one = recorder.repeated_patterns(self.n_plus_one_threshold)
+
+        if total_ms >= self.slow_request_ms or duplicates or n_plus_one:
+            logger.warning(
+                json.dumps(
+                    {
+                        "event"      : "slow_request",
+                        "method"     : request.method,
+                        "path"       : request.path,
+                        "status"     : response.status_code,
+                        "streaming"  : response.streaming,
+                        "total_ms"   : round(total_ms, 3),
+                        "db_ms"      : round(recorder.duration_ms, 3),
+                        "queries"    : len(recorder.queries),
+                        "duplicates" : duplicates,
+                        "n_plus_one" : n_plus_one,
+                        "slowest"    : recorder.slowest(),
+                    },
+                    ensure_ascii=False,
+                )
+            )
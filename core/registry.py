@@ -0,0 +1,117 @@
+import time
+
+from django.apps import apps
+from django.core.cache import cache
+from django.db import transaction
+
+VERSION_KEY            = "reference:version"
+VERSION_CHECK_INTERVAL = 5
+
+REFERENCE_MODELS = {
+    "grade"            : "investments.Grade",
+    "repayment_type"   : "investments.RepaymentType",
+    "loan_type"        : "investments.LoanType",
+    "bank"             : "transactions.Bank",
+    "transaction_type" : "transactions.TransactionType",
+    "investment_state" : "transactions.InvestmentState",
+    "repayment_state"  : "transactions.RepaymentState",
+}
+
+
+def reference_version():
+    version = cache.get(VERSION_KEY)
+
+    if version is None:
+        cache.add(VERSION_KEY, int(time.time() * 1000), timeout=None)
+        version = cache.get(VERSION_KEY)
+
+    return version
+
+
+def bump_reference_version():
+    reference_version()
+    cache.incr(VERSION_KEY)
+
+
+class ReferenceRegistry:
+    def __init__(self):
+        self.tables     = {}
+        self.version    = None
+        self.checked_at = None
+
+    def refresh(self):
+        now = time.monotonic()
+
+        if self.checked_at is not None and now - self.checked_at < VERSION_CHECK_INTERVAL:
+            return
+
+        version = reference_version()
+
+        if version != self.version:
+            self.tables  = {}
+            self.version = version
+
+        self.checked_at = now
+
+    def clear(self):
+        self.tables     = {}
+        self.checked_at = None
+
+    def names(self, table):
+        self.refresh()
+
+        if table not in self.tables:
+            model = apps.get_model(REFERENCE_MODELS[table])
+            self.tables[table] = dict(model.objects.values_list("id", "name"))
+
+        return self.tables[table]
+
+    def name(self, table, pk):
+        if pk is None:
+            return None
+
+        if pk not in self.names(table):
+            self.tables.pop(table, None)
+
+        try:
+            return self.names(table)[pk]
+
+        except KeyError:
+            raise apps.get_model(REFERENCE_MODELS[table]).DoesNotExist
+
+    def ids(self, table, names):
+        return [pk for pk, name in self.names(table).items() if name in names]
+
+    def grade_name(self, grade_id):
+        return self.name("grade", grade_id)
+
+    def repayment_type_name(self, repayment_type_id):
+        return self.name("repayment_type", repayment_type_id)
+
+    def loan_type_name(self, loan_type_id):
+        return self.name("loan_type", loan_type_id)
+
+    def bank_name(self, bank_id):
+        return self.name("bank", bank_id)
+
+    def transaction_type_name(self, type_id):
+        return self.name("transaction_type", type_id)
+
+    def investment_state_name(self, state_id):
+        return self.name("investment_state", state_id)
+
+    def repayment_state_name(self, state_id):
+        return self.name("repayment_state", state_id)
+
+
+registry = ReferenceRegistry()
+
+
+def _invalidate_references():
+    registry.clear()
+    bump_reference_version()
+
+
+def invalidate_references():
+    _invalidate_references()
+    transaction.on_commit(_invalidate_references)
@@ -0,0 +1,59 @@
+import json
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse
+
+try:
+    import orjson
+
+except ImportError:
+    orjson = None
+
+DEFAULT_JSON_RENDERER = "orjson"
+
+
+class StdlibRenderer:
+    name = "stdlib"
+
+    def render(self, data):
+        return json.dumps(data, cls=DjangoJSONEncoder, ensure_ascii=False).encode("utf-8")
+
+
+class OrjsonRenderer:
+    name = "orjson"
+
+    def __init__(self):
+        self.encoder = DjangoJSONEncoder()
+        self.option  = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+
+    def render(self, data):
+        return orjson.dumps(data, default=self.encoder.default, option=self.option)
+
+
+RENDERERS = {
+    StdlibRenderer.name : StdlibRenderer,
+    OrjsonRenderer.name : OrjsonRenderer,
+}
+
+_renderers = {}
+
+
+def get_json_renderer(name=None):
+    name = name or getattr(settings, "JSON_RENDERER", DEFAULT_JSON_RENDERER)
+
+    if name == OrjsonRenderer.name and orjson is None:
+        name = StdlibRenderer.name
+
+    if name not in _renderers:
+        _renderers[name] = RENDERERS[name]()
+
+    return _renderers[name]
+
+
+def render_json(data):
+    return get_json_renderer().render(data)
+
+
+def json_response(data, status=200):
+    return HttpResponse(render_json(data), content_type="application/json", status=status)
@@ -0,0 +1,15 @@
+from django.apps import apps
+from django.db.models.signals import post_save, post_delete
+
+from core.registry import REFERENCE_MODELS, invalidate_references
+
+
+def reference_changed(sender, **kwargs):
+    invalidate_references()
+
+
+for table, label in REFERENCE_MODELS.items():
+    model = apps.get_model(label)
+
+    post_save.connect(reference_changed, sender=model, dispatch_uid=f"reference_save_{table}")
+    post_delete.connect(reference_changed, sender=model, dispatch_uid=f"reference_delete_{table}")
@@ -1,3 +1,302 @@
-from django.test import TestCase
+import datetime
+import hashlib
+import json
+import jwt
 
-# Create your tests here.
+from decimal import Decimal
+from unittest import mock
+
+from django.core.cache import cache
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import TestCase, Client, RequestFactory, override_settings
+
+from core.benchmark import (
+    default_scenarios,
+    find_regressions,
+    run_benchmark,
+    seed_dataset,
+    url_routes,
+)
+from core.checks import check_shared_cache
+from core.middleware import QueryInstrumentationMiddleware, fingerprint
+from core.registry import VERSION_KEY, registry
+from core.renderers import get_json_renderer, json_response
+from core.utils import login_decorator, principal_version_key
+from my_settings import MY_SECRET_KEY
+from transactions.models import Bank, Deposit
+from users.fake_kakao import FakeKakaoServer
+from users.models import User
+
+
+class PrincipalView:
+    @login_decorator
+    def get(self, request):
+        return request.user
+
+
+class LoginDecoratorTest(TestCase):
+    def setUp(self):
+        cache.clear()
+
+        Bank.objects.create(id=2, name="농협은행")
+
+        Deposit.objects.create(
+            id=1,
+            withdrawal_account="111-222-333",
+            withdrawal_bank_id=2,
+            deposit_account="444-555-666",
+            deposit_bank_id=2,
+            balance=300000,
+        )
+
+        User.objects.create(
+            id=2,
+            name="무현",
+            email="example@naver.com",
+            phone_number="010-2222-4444",
+            password="1234dfsdflker@!",
+            deposit_id=1,
+        )
+
+        self.request = RequestFactory().get(
+            "/", HTTP_AUTHORIZATION=jwt.encode({"id": 2}, MY_SECRET_KEY, algorithm="HS256")
+        )
+
+    def tearDown(self):
+        cache.clear()
+        User.objects.all().delete()
+        Deposit.objects.all().delete()
+        Bank.objects.all().delete()
+
+    def test_principal_loaded_in_one_query(self):
+        with self.assertNumQueries(1):
+            user = PrincipalView().get(self.request)
+
+        self.assertEqual(user.deposit_id, 1)
+
+    def test_principal_served_from_cache(self):
+        PrincipalView().get(self.request)
+
+        with self.assertNumQueries(0):
+            user = PrincipalView().get(self.request)
+
+        self.assertEqual(user.name, "무현")
+
+    def test_principal_invalidated_when_user_changes(self):
+        PrincipalView().get(self.request)
+
+        user = User.objects.get(id=2)
+        user.name = "현무"
+        user.save()
+
+        self.assertEqual(PrincipalView().get(self.request).name, "현무")
+
+    def test_principal_caches_only_identity(self):
+        PrincipalView().get(self.request)
+
+        token_key = "auth:principal:" + hashlib.sha256(self.request.headers["Authorization"].encode()).hexdigest()
+
+        self.assertEqual(cache.get(token_key)[1:], (2, 1))
+
+    def test_principal_reloaded_when_version_evicted(self):
+        PrincipalView().get(self.request)
+        User.objects.filter(id=2).update(deposit_id=None)
+        cache.delete(principal_version_key(2))
+
+        with self.assertNumQueries(1):
+            user = PrincipalView().get(self.request)
+
+        self.assertIsNone(user.deposit_id)
+
+    def test_principal_does_not_cache_the_deposit(self):
+        user = PrincipalView().get(self.request)
+
+        self.assertNotIn("deposit", user._state.fields_cache)
+
+
+@override_settings(BCRYPT_ROUNDS=4)
+class ReferenceRegistryTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        registry.clear()
+
+        Bank.objects.create(id=2, name="농협은행")
+
+    def tearDown(self):
+        cache.clear()
+        registry.clear()
+
+    def test_names_loaded_once_per_table(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(registry.bank_name(2), "농협은행")
+            self.assertEqual(registry.bank_name(2), "농협은행")
+
+        self.assertIsNone(registry.bank_name(None))
+        self.assertEqual(registry.ids("bank", ["농협은행", "국민은행"]), [2])
+
+    def test_refreshed_when_a_row_changes(self):
+        registry.bank_name(2)
+        Bank.objects.create(id=3, name="국민은행")
+
+        with self.assertNumQueries(1):
+            self.assertEqual(registry.bank_name(3), "국민은행")
+
+        with self.assertRaises(Bank.DoesNotExist):
+            registry.bank_name(99)
+
+    def test_refreshed_when_another_process_bumps_the_version(self):
+        registry.bank_name(2)
+        Bank.objects.filter(id=2).update(name="국민은행")
+        registry.checked_at = None
+        cache.incr(VERSION_KEY)
+
+        self.assertEqual(registry.bank_name(2), "국민은행")
+
+
+class JSONRendererTest(TestCase):
+    def setUp(self):
+        self.data = {
+            "created_time" : datetime.datetime(2021, 9, 15, 2, 14, 0, 123000, tzinfo=datetime.timezone.utc),
+            "amounts"      : Decimal("1000.50"),
+            "rows"         : [(1, "입금"), (2, "출금")],
+        }
+
+    def test_renderers_agree(self):
+        stdlib = json.loads(get_json_renderer("stdlib").render(self.data))
+        fast   = json.loads(get_json_renderer("orjson").render(self.data))
+
+        self.assertEqual(stdlib, fast)
+        self.assertEqual(fast["created_time"], "2021-09-15T02:14:00.123Z")
+        self.assertEqual(fast["amounts"], "1000.50")
+        self.assertEqual(fast["rows"], [[1, "입금"], [2, "출금"]])
+
+    def test_falls_back_to_stdlib_without_orjson(self):
+        with mock.patch("core.renderers.orjson", None):
+            self.assertEqual(get_json_renderer("orjson").name, "stdlib")
+
+    @override_settings(JSON_RENDERER="stdlib")
+    def test_json_response_uses_configured_renderer(self):
+        response = json_response({"name": "입금"}, status=201)
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response["Content-Type"], "application/json")
+        self.assertEqual(response.content, '{"name": "입금"}'.encode("utf-8"))
+
+
+class EndpointBenchmarkTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        seed_dataset(
+            users=3,
+            investments=5,
+            portfolios_per_user=2,
+            transactions_per_user=5,
+            repayments_per_user=2,
+        )
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_benchmark_covers_every_url(self):
+        self.assertEqual(sorted(default_scenarios()), sorted(url_routes()))
+
+        with FakeKakaoServer() as kakao, override_settings(KAKAO_API_URL=kakao.url):
+            results = run_benchmark(default_scenarios(), iterations=2)
+
+        for route, result in results.items():
+            self.assertLess(max(result["statuses"]), 500, route)
+            self.assertGreater(result["bytes"], 0, route)
+
+    def test_find_regressions(self):
+        baseline = {"investments": {"p50_ms": 1.0, "p95_ms": 10.0, "queries": 2, "bytes": 100}}
+
+        self.assertEqual(
+            find_regressions(
+                {"investments": {"p50_ms": 1.0, "p95_ms": 12.0, "queries": 2, "bytes": 100}},
+                baseline,
+            ),
+            [],
+        )
+        self.assertEqual(
+            find_regressions(
+                {"investments": {"p50_ms": 1.0, "p95_ms": 40.0, "queries": 3, "bytes": 100}},
+                baseline,
+            ),
+            ["investments: queries 2 -> 3", "investments: p95 10.0ms -> 40.0ms"],
+        )
+
+
+class QueryInstrumentationMiddlewareTest(TestCase):
+    def setUp(self):
+        Bank.objects.create(id=2, name="농협은행")
+
+    def tearDown(self):
+        Bank.objects.all().delete()
+
+    def test_fingerprint_ignores_literals_and_in_lists(self):
+        self.assertEqual(
+            fingerprint("SELECT * FROM banks WHERE id IN (%s, %s) AND name = 'a'"),
+            fingerprint("SELECT *  FROM banks WHERE id IN (%s) AND name = 'b'"),
+        )
+
+    def test_server_timing_header(self):
+        response = Client().get("/investments")
+
+        self.assertIn("db;dur=", response["Server-Timing"])
+        self.assertIn("total;dur=", response["Server-Timing"])
+
+    @override_settings(N_PLUS_ONE_THRESHOLD=3)
+    def test_duplicate_and_n_plus_one_queries_logged(self):
+        def view(request):
+            for _ in range(3):
+                Bank.objects.get(id=2)
+
+            for bank_id in range(3, 6):
+                Bank.objects.filter(id=bank_id).first()
+
+            return HttpResponse()
+
+        middleware = QueryInstrumentationMiddleware(view)
+
+        with self.assertLogs("core.sql", level="WARNING") as logs:
+            response = middleware(RequestFactory().get("/banks"))
+
+        record = json.loads(logs.records[0].getMessage())
+
+        self.assertIn('desc="6 queries"', response["Server-Timing"])
+        self.assertEqual(record["queries"], 6)
+        self.assertEqual([duplicate["count"] for duplicate in record["duplicates"]], [3])
+        self.assertEqual(sorted(pattern["count"] for pattern in record["n_plus_one"]), [3, 3])
+
+
+    @override_settings(N_PLUS_ONE_THRESHOLD=3)
+    def test_streaming_queries_recorded_until_exhausted(self):
+        def rows():
+            for _ in range(3):
+                yield Bank.objects.get(id=2).name.encode("utf-8")
+
+        middleware = QueryInstrumentationMiddleware(lambda request: StreamingHttpResponse(rows()))
+        response   = middleware(RequestFactory().get("/banks"))
+
+        with self.assertLogs("core.sql", level="WARNING") as logs:
+            content = b"".join(response.streaming_content)
+
+        record = json.loads(logs.records[0].getMessage())
+
+        self.assertEqual(content.decode("utf-8"), "농협은행" * 3)
+        self.assertTrue(record["streaming"])
+        self.assertEqual(record["queries"], 3)
+        self.assertEqual([duplicate["count"] for duplicate in record["duplicates"]], [3])
+
+class SharedCacheCheckTest(TestCase):
+    def test_process_local_cache_reported(self):
+        backend = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+        with override_settings(CACHES = backend):
+            self.assertEqual([error.id for error in check_shared_cache(None)], ["core.W001"])
+
+    def test_shared_cache_passes(self):
+        backend = {"default": {"BACKEND": "django.core.cache.backends.memcached.PyMemcacheCache"}}
+
+        with override_settings(CACHES = backend):
+            self.assertEqual(check_shared_cache(None), [])
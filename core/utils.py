@@ -1,16 +1,66 @@
+import base64
+import hashlib
+import json
+import time
 import jwt
 
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
 from django.http import JsonResponse
 
 from my_settings import MY_SECRET_KEY
 from users.models import User
 
+PRINCIPAL_CACHE_TIMEOUT = 60
+
+
+def principal_version_key(user_id):
+    return f"auth:user:{user_id}:version"
+
+
+def seed_principal_version(version_key):
+    cache.add(version_key, int(time.time() * 1000), timeout=None)
+
+    return cache.get(version_key)
+
+
+def get_principal(access_token, user_id):
+    token_key   = "auth:principal:" + hashlib.sha256(access_token.encode("utf-8")).hexdigest()
+    version_key = principal_version_key(user_id)
+    cached      = cache.get_many([token_key, version_key])
+    version     = cached.get(version_key)
+
+    if version is None:
+        version = seed_principal_version(version_key)
+
+    elif token_key in cached and cached[token_key][0] == version:
+        return User.from_db(User.objects.db, ["id", "deposit_id"], cached[token_key][1:])
+
+    user = User.objects.only("id", "deposit_id").get(id=user_id)
+    cache.set(token_key, (version, user.id, user.deposit_id), timeout=PRINCIPAL_CACHE_TIMEOUT)
+
+    return user
+
+
+def bump_principal_version(user_id):
+    version_key = principal_version_key(user_id)
+
+    seed_principal_version(version_key)
+    cache.incr(version_key)
+
+
+def invalidate_principal(user_id):
+    bump_principal_version(user_id)
+    transaction.on_commit(lambda: bump_principal_version(user_id))
+
+
 def login_decorator(func):
     def wrapper(self, request, *args, **kwargs):
         try: 
             access_token = request.headers.get("Authorization", None)
             payload = jwt.decode(access_token, MY_SECRET_KEY, algorithms="HS256")
-            request.user = User.objects.get(id = payload["id"])
+            request.user = get_principal(access_token, payload["id"])
 
         except jwt.exceptions.DecodeError:
             return JsonResponse({"message": "INVALID_TOKEN"}, status=400)
@@ -21,3 +71,17 @@ def login_decorator(func):
         return func(self, request, *args, **kwargs)
     
     return wrapper
+
+
+def encode_cursor(*values):
+    return base64.urlsafe_b64encode(json.dumps(values).encode("utf-8")).decode("utf-8")
+
+
+def decode_cursor(cursor):
+    return json.loads(base64.urlsafe_b64decode(cursor.encode("utf-8")))
+
+
+def keyset_q(field, value, last_id, descending=True):
+    lookup = "lt" if descending else "gt"
+
+    return Q(**{f"{field}__{lookup}": value}) | Q(**{field: value, f"id__{lookup}": last_id})
@@ -0,0 +1,142 @@
+import hashlib
+import threading
+import time
+
+from collections import Counter
+
+from django.core.cache import cache
+from django.db import transaction
+
+CATALOG_CACHE_TIMEOUT = 60 * 10
+STATS_FLUSH_INTERVAL  = 30
+
+VERSION_KEY       = "investments:catalog:version"
+LAST_MODIFIED_KEY = "investments:catalog:last_modified"
+HITS_KEY          = "investments:catalog:hits"
+MISSES_KEY        = "investments:catalog:misses"
+
+_stats      = Counter()
+_stats_lock = threading.Lock()
+_flushed_at = time.monotonic()
+
+
+def _initialize_catalog_version():
+    now = int(time.time())
+
+    cache.add(VERSION_KEY, now * 1000, timeout=None)
+    cache.add(LAST_MODIFIED_KEY, now, timeout=None)
+
+
+def catalog_version():
+    return catalog_validators()[0]
+
+
+def catalog_validators():
+    validators = cache.get_many([VERSION_KEY, LAST_MODIFIED_KEY])
+
+    if len(validators) < 2:
+        _initialize_catalog_version()
+        validators = cache.get_many([VERSION_KEY, LAST_MODIFIED_KEY])
+
+    return validators[VERSION_KEY], validators[LAST_MODIFIED_KEY]
+
+
+def catalog_etag(name, version):
+    return 'W/"%s"' % hashlib.sha1(f"{name}:v{version}".encode("utf-8")).hexdigest()[:20]
+
+
+def _next_last_modified():
+    now      = int(time.time())
+    previous = cache.get(LAST_MODIFIED_KEY)
+
+    if previous is not None and previous >= now:
+        return previous + 1
+
+    return now
+
+
+def bump_catalog_version():
+    cache.set(LAST_MODIFIED_KEY, _next_last_modified(), timeout=None)
+
+    try:
+        return cache.incr(VERSION_KEY)
+
+    except ValueError:
+        _initialize_catalog_version()
+        return cache.incr(VERSION_KEY)
+
+
+def invalidate_catalog():
+    bump_catalog_version()
+    transaction.on_commit(bump_catalog_version)
+
+
+def _count(key):
+    with _stats_lock:
+        _stats[key] += 1
+        due = time.monotonic() - _flushed_at >= STATS_FLUSH_INTERVAL
+
+    if due:
+        flush_catalog_cache_stats()
+
+
+def flush_catalog_cache_stats():
+    global _flushed_at
+
+    with _stats_lock:
+        pending     = dict(_stats)
+        _flushed_at = time.monotonic()
+        _stats.clear()
+
+    for key, count in pending.items():
+        cache.add(key, 0, timeout=None)
+        cache.incr(key, count)
+
+
+def detail_key(investment_id):
+    return f"investments:detail:{investment_id}"
+
+
+def _delete_detail_documents(investment_ids):
+    cache.delete_many([detail_key(investment_id) for investment_id in investment_ids])
+
+
+def invalidate_detail_documents(investment_ids):
+    investment_ids = list(investment_ids)
+
+    _delete_detail_documents(investment_ids)
+    transaction.on_commit(lambda: _delete_detail_documents(investment_ids))
+
+
+def get_or_build(name, builder, version=None):
+    return _get_or_build(f"investments:catalog:{name}:v{version or catalog_version()}", builder)
+
+
+def get_or_build_detail(investment_id, builder):
+    return _get_or_build(detail_key(investment_id), builder)
+
+
+def _get_or_build(key, builder):
+    payload = cache.get(key)
+
+    if payload is not None:
+        _count(HITS_KEY)
+        return payload, True
+
+    _count(MISSES_KEY)
+    payload = builder()
+
+    if payload is not None:
+        cache.set(key, payload, timeout=CATALOG_CACHE_TIMEOUT)
+
+    return payload, False
+
+
+def catalog_cache_stats():
+    flush_catalog_cache_stats()
+
+    return {
+        "version" : catalog_version(),
+        "hits"    : cache.get(HITS_KEY, 0),
+        "misses"  : cache.get(MISSES_KEY, 0),
+    }
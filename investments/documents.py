@@ -0,0 +1,153 @@
+import hashlib
+
+from django.db import transaction
+from django.utils import timezone
+
+from core.registry import registry
+from core.renderers import render_json
+from investments.cache import invalidate_detail_documents
+from investments.models import FundingShard, Investment, InvestmentDocument
+
+
+def loan_to_value(investment):
+    detail = investment.detail
+
+    if not detail.evaluation_price:
+        return None
+
+    return round(
+        (investment.target_amount + detail.priority_bond_amount) / detail.evaluation_price * 100, 2
+    )
+
+
+def expected_recovery(investment):
+    detail = investment.detail
+
+    if detail.bidding_rate is None:
+        return None
+
+    return detail.evaluation_price * detail.bidding_rate - detail.priority_bond_amount
+
+
+def build_detail_document(investment, shard_amounts=0):
+    detail        = investment.detail
+    security      = investment.security
+    borrower      = investment.borrower
+    funded_amount = investment.current_amount + shard_amounts
+
+    return {
+        "image_list"             : [image.url for image in investment.image_set.all()],
+        "id"                     : investment.id,
+        "name"                   : investment.name,
+        "grade"                  : registry.grade_name(investment.grade_id),
+        "return_rate"            : investment.return_rate,
+        "duration"               : investment.duration,
+        "repayment_types"        : registry.repayment_type_name(investment.repayment_type_id),
+        "current_amount"         : funded_amount,
+        "target_amount"          : investment.target_amount,
+        "recrutement_rate"       : Investment.calculate_recruitment_rate(
+            funded_amount, investment.target_amount
+        ),
+        "LTV"                    : loan_to_value(investment),
+        "repayment_day"          : detail.repayment_day,
+        "loan_type"              : registry.loan_type_name(detail.loan_type_id),
+        "evaluation_price"       : detail.evaluation_price,
+        "priority_bond_amount"   : detail.priority_bond_amount,
+        "security_surcharge"     : detail.evaluation_price - detail.priority_bond_amount - investment.target_amount,
+        "bidding_rate"           : detail.bidding_rate,
+        "expected_recovery"      : expected_recovery(investment),
+        "address"                : security.address,
+        "completion_date"        : security.completion_date,
+        "household"              : security.household,
+        "supply_area"            : security.supply_area,
+        "exclusive_private_area" : security.exclusive_private_area,
+        "lease_status"           : security.lease_status,
+        "latitude"               : security.latitude,
+        "longitude"              : security.longitude,
+        "credit_score"           : borrower.credit_score,
+        "income_type"            : borrower.income_type,
+        "income"                 : borrower.income,
+        "card_usage_amount"      : borrower.card_usage_amount,
+        "loan_amount"            : borrower.loan_amount,
+        "is_overdue"             : borrower.is_overdue,
+        "overdue_tax"            : borrower.overdue_tax,
+    }
+
+
+def serialize_document(document):
+    return render_json(document).decode("utf-8")
+
+
+def _build_documents(**filters):
+    investments = list(
+        Investment.objects.filter(**filters)
+        .select_related("detail", "security", "borrower")
+        .prefetch_related("image_set")
+        .order_by("id")
+    )
+    shard_totals = FundingShard.totals(
+        [investment.id for investment in investments if investment.funding_shards]
+    )
+    documents    = []
+
+    for investment in investments:
+        content = serialize_document(build_detail_document(investment, shard_totals.get(investment.id, 0)))
+        documents.append(
+            InvestmentDocument(
+                investment_id=investment.id,
+                etag=hashlib.sha1(content.encode("utf-8")).hexdigest(),
+                content=content,
+            )
+        )
+
+    return documents
+
+
+def rebuild_detail_documents(batch_size=1000, **filters):
+    documents = _build_documents(**filters)
+
+    with transaction.atomic():
+        InvestmentDocument.objects.filter(
+            investment_id__in=[document.investment_id for document in documents]
+        ).delete()
+        InvestmentDocument.objects.bulk_create(documents, batch_size=batch_size)
+
+    invalidate_detail_documents(document.investment_id for document in documents)
+
+    return documents
+
+
+def refresh_detail_documents(**filters):
+    documents = _build_documents(investmentdocument__isnull=False, **filters)
+
+    for document in documents:
+        document.updated_time = timezone.now()
+
+    InvestmentDocument.objects.bulk_update(documents, ["etag", "content", "updated_time"])
+    invalidate_detail_documents(document.investment_id for document in documents)
+
+    return documents
+
+
+def get_detail_document(investment_id):
+    document = InvestmentDocument.objects.filter(investment_id=investment_id).values_list(
+        "etag", "updated_time", "content", "investment__funding_shards"
+    ).first()
+
+    if document is not None and not document[3]:
+        etag, updated_time, content, _ = document
+
+        return etag, int(updated_time.timestamp()), content
+
+    if document is None:
+        documents = rebuild_detail_documents(id=investment_id)
+    else:
+        documents = _build_documents(id=investment_id)
+
+        for live in documents:
+            live.updated_time = timezone.now()
+
+    if not documents:
+        return None
+
+    return documents[0].etag, int(documents[0].updated_time.timestamp()), documents[0].content
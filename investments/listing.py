@@ -0,0 +1,154 @@
+from urllib.parse import urlencode
+
+from django.core.exceptions import ValidationError
+from django.db.models import F, Q
+
+from core.registry import registry
+from core.utils import decode_cursor, encode_cursor, keyset_q
+from investments.models import Investment
+
+SORT_KEYS = {
+    "id"               : "id",
+    "return_rate"      : "return_rate",
+    "duration"         : "duration",
+    "target_amount"    : "target_amount",
+    "recruitment_rate" : "recruitment_rate",
+}
+
+MAX_LIMIT = 100
+
+LISTING_FIELDS = (
+    "id",
+    "name",
+    "return_rate",
+    "duration",
+    "target_amount",
+    "current_amount",
+    "recruitment_rate",
+    "thumbnail_url",
+    "grade_id",
+)
+
+
+class InvestmentListing:
+    def __init__(self, params):
+        self.params     = params
+        self.q          = Q()
+        self.limit      = None
+        self.cursor     = None
+        self.descending = False
+
+        sort = params.get("sort", "id")
+
+        if sort.startswith("-"):
+            self.descending = True
+            sort = sort[1:]
+
+        if sort not in SORT_KEYS:
+            raise ValueError("INVALID_SORT")
+
+        self.sort_field = SORT_KEYS[sort]
+        self.key        = [("sort", ("-" if self.descending else "") + self.sort_field)]
+
+        if params.getlist("grade"):
+            grade_ids = sorted(registry.ids("grade", params.getlist("grade")))
+            self.q   &= Q(grade_id__in=grade_ids)
+            self.key.append(("grade", ",".join(map(str, grade_ids))))
+
+        if params.getlist("repayment_type"):
+            repayment_type_ids = sorted(registry.ids("repayment_type", params.getlist("repayment_type")))
+            self.q            &= Q(repayment_type_id__in=repayment_type_ids)
+            self.key.append(("repayment_type", ",".join(map(str, repayment_type_ids))))
+
+        if params.getlist("duration"):
+            durations = sorted({int(duration) for duration in params.getlist("duration")})
+            self.q   &= Q(duration__in=durations)
+            self.key.append(("duration", ",".join(map(str, durations))))
+
+        if "return_rate_min" in params:
+            return_rate_min = float(params["return_rate_min"])
+            self.q         &= Q(return_rate__gte=return_rate_min)
+            self.key.append(("return_rate_min", repr(return_rate_min)))
+
+        if "return_rate_max" in params:
+            return_rate_max = float(params["return_rate_max"])
+            self.q         &= Q(return_rate__lte=return_rate_max)
+            self.key.append(("return_rate_max", repr(return_rate_max)))
+
+        if params.get("open") in ("1", "true"):
+            self.q &= Q(current_amount__lt=F("target_amount"))
+            self.key.append(("open", "1"))
+
+        if "limit" in params:
+            self.limit = int(params["limit"])
+
+            if not 0 < self.limit <= MAX_LIMIT:
+                raise ValueError("INVALID_LIMIT")
+
+            self.key.append(("limit", str(self.limit)))
+
+        if params.get("cursor"):
+            self.cursor = self.clean_cursor(decode_cursor(params["cursor"]))
+            self.key.append(("cursor", "%r,%d" % self.cursor))
+
+    def clean_cursor(self, cursor):
+        if not isinstance(cursor, list) or len(cursor) != 2:
+            raise ValueError("INVALID_CURSOR")
+
+        value, last_id = cursor
+
+        try:
+            value   = Investment._meta.get_field(self.sort_field).to_python(value)
+            last_id = int(last_id)
+
+        except (ValidationError, TypeError, ValueError):
+            raise ValueError("INVALID_CURSOR")
+
+        if value is None:
+            raise ValueError("INVALID_CURSOR")
+
+        return value, last_id
+
+    @property
+    def is_default(self):
+        return not self.params
+
+    @property
+    def cache_name(self):
+        return "list:" + urlencode(self.key)
+
+    def queryset(self):
+        ordering = [self.sort_field, "id"]
+
+        if self.descending:
+            ordering = [f"-{field}" for field in ordering]
+
+        investments = (
+            Investment.objects.filter(self.q)
+            .order_by(*ordering)
+            .values(*LISTING_FIELDS)
+        )
+
+        if self.cursor:
+            value, last_id = self.cursor
+            investments = investments.filter(
+                keyset_q(self.sort_field, value, last_id, descending=self.descending)
+            )
+
+        return investments
+
+    def page(self):
+        investments = self.queryset()
+
+        if self.limit is None:
+            return list(investments), None
+
+        investments = list(investments[: self.limit + 1])
+
+        if len(investments) <= self.limit:
+            return investments, None
+
+        investments = investments[: self.limit]
+        last = investments[-1]
+
+        return investments, encode_cursor(last[self.sort_field], last["id"])
@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from investments.cache import invalidate_catalog
+from investments.models import Investment
+
+
+class Command(BaseCommand):
+    help = "Backfill the denormalized recruitment_rate and thumbnail_url columns on investments"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        last_id    = 0
+        updated    = 0
+
+        while True:
+            investments = list(
+                Investment.objects.filter(id__gt=last_id)
+                .only("id", "current_amount", "target_amount", "recruitment_rate")
+                .order_by("id")[:batch_size]
+            )
+
+            if not investments:
+                break
+
+            for investment in investments:
+                investment.recruitment_rate = Investment.calculate_recruitment_rate(
+                    investment.current_amount, investment.target_amount
+                )
+
+            with transaction.atomic():
+                Investment.objects.bulk_update(investments, ["recruitment_rate"], batch_size=batch_size)
+                Investment.refresh_thumbnails(id__gt=last_id, id__lte=investments[-1].id)
+
+            updated += len(investments)
+            last_id  = investments[-1].id
+
+        invalidate_catalog()
+
+        self.stdout.write(self.style.SUCCESS(f"BACKFILLED {updated} INVESTMENTS"))
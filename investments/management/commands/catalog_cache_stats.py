@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from investments.cache import catalog_cache_stats
+
+
+class Command(BaseCommand):
+    help = "Print the investment catalog cache version and hit/miss counters"
+
+    def handle(self, *args, **options):
+        stats = catalog_cache_stats()
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"CATALOG VERSION {stats['version']}: HITS {stats['hits']}, MISSES {stats['misses']}"
+            )
+        )
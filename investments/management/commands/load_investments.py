@@ -0,0 +1,214 @@
+import csv
+import time
+
+from itertools import islice
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max
+
+from investments.cache import invalidate_catalog
+from investments.documents import rebuild_detail_documents
+from investments.models import (
+    Grade,
+    RepaymentType,
+    Security,
+    LoanType,
+    InvestmentDetail,
+    BorrowerInformation,
+    Investment,
+    Image,
+)
+
+GRADE_COLUMN          = 1
+REPAYMENT_TYPE_COLUMN = 2
+LOAN_TYPE_COLUMN      = 11
+NAME_COLUMN           = 24
+IMAGE_COLUMN          = 33
+
+SECURITY_COLUMNS = {
+    "address"                : 3,
+    "completion_date"        : 4,
+    "supply_area"            : 5,
+    "household"              : 6,
+    "exclusive_private_area" : 7,
+    "lease_status"           : 8,
+    "latitude"               : 9,
+    "longitude"              : 10,
+}
+
+BORROWER_COLUMNS = {
+    "credit_score"      : 12,
+    "income_type"       : 13,
+    "income"            : 14,
+    "card_usage_amount" : 15,
+    "loan_amount"       : 16,
+    "is_overdue"        : 17,
+    "overdue_tax"       : 18,
+}
+
+DETAIL_COLUMNS = {
+    "evaluation_price"     : 20,
+    "repayment_day"        : 21,
+    "priority_bond_amount" : 22,
+    "bidding_rate"         : 23,
+}
+
+INVESTMENT_COLUMNS = {
+    "name"           : NAME_COLUMN,
+    "duration"       : 26,
+    "return_rate"    : 27,
+    "target_amount"  : 28,
+    "current_amount" : 29,
+}
+
+FUNDING_FIELDS = ("current_amount", "recruitment_rate", "funded_time", "funding_shards")
+
+
+def pick(row, columns):
+    return {field: row[index] if row[index] != "" else None for field, index in columns.items()}
+
+
+class NameLookup:
+    def __init__(self, model):
+        self.model = model
+        self.ids   = dict(model.objects.values_list("name", "id"))
+
+    def __call__(self, name):
+        if name not in self.ids:
+            self.ids[name] = self.model.objects.create(name=name).id
+
+        return self.ids[name]
+
+
+class IdAllocator:
+    def __init__(self, model):
+        self.next_id = (model.objects.aggregate(max_id=Max("id"))["max_id"] or 0) + 1
+
+    def __call__(self, instance):
+        instance.id   = self.next_id
+        self.next_id += 1
+
+        return instance
+
+
+class Command(BaseCommand):
+    help = "Load investments from a CSV file with batched, idempotent upserts keyed by name"
+
+    def add_arguments(self, parser):
+        parser.add_argument("csv_path", nargs="?", default="investment.csv")
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        started_at = time.perf_counter()
+        created = updated = 0
+
+        with open(options["csv_path"], newline="") as in_file, transaction.atomic():
+            self.grades          = NameLookup(Grade)
+            self.repayment_types = NameLookup(RepaymentType)
+            self.loan_types      = NameLookup(LoanType)
+            self.allocate        = {
+                model: IdAllocator(model)
+                for model in (Security, BorrowerInformation, InvestmentDetail, Investment, Image)
+            }
+
+            data_reader = csv.reader(in_file)
+
+            while True:
+                rows = list(islice(data_reader, batch_size))
+
+                if not rows:
+                    break
+
+                batch_created, batch_updated = self.load_batch(rows, batch_size)
+                created += batch_created
+                updated += batch_updated
+
+            invalidate_catalog()
+
+        elapsed = time.perf_counter() - started_at
+        total   = created + updated
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"LOADED {total} ROWS ({created} CREATED, {updated} UPDATED) "
+                f"IN {elapsed:.2f}s, {total / elapsed if elapsed else total:.0f} ROWS/SEC"
+            )
+        )
+
+    def load_batch(self, rows, batch_size):
+        existing = {
+            investment.name: investment
+            for investment in Investment.objects.filter(name__in=[row[NAME_COLUMN] for row in rows])
+        }
+        image_urls = set(
+            Image.objects.filter(investment__in=existing.values()).values_list("investment_id", "url")
+        )
+        created = {model: [] for model in self.allocate}
+        changed = {model: [] for model in (Security, BorrowerInformation, InvestmentDetail, Investment)}
+
+        for row in rows:
+            investment = existing.get(row[NAME_COLUMN])
+            is_new     = investment is None
+
+            security = Security(**pick(row, SECURITY_COLUMNS))
+            borrower = BorrowerInformation(**pick(row, BORROWER_COLUMNS))
+            detail   = InvestmentDetail(
+                loan_type_id=self.loan_types(row[LOAN_TYPE_COLUMN]), **pick(row, DETAIL_COLUMNS)
+            )
+
+            if is_new:
+                investment = Investment()
+                existing[row[NAME_COLUMN]] = investment
+                target = created
+
+                for instance in (security, borrower, detail, investment):
+                    self.allocate[type(instance)](instance)
+            else:
+                target = changed
+                security.id = investment.security_id
+                borrower.id = investment.borrower_id
+                detail.id   = investment.detail_id
+
+            for field, value in pick(row, INVESTMENT_COLUMNS).items():
+                if is_new or field not in FUNDING_FIELDS:
+                    setattr(investment, field, value)
+
+            investment.grade_id          = self.grades(row[GRADE_COLUMN])
+            investment.repayment_type_id = self.repayment_types(row[REPAYMENT_TYPE_COLUMN])
+            investment.security_id       = security.id
+            investment.borrower_id       = borrower.id
+            investment.detail_id         = detail.id
+            investment.thumbnail_url     = investment.thumbnail_url or row[IMAGE_COLUMN]
+
+            if is_new:
+                investment.recruitment_rate = Investment.calculate_recruitment_rate(
+                    investment.current_amount, investment.target_amount
+                )
+
+            for instance in (security, borrower, detail, investment):
+                target[type(instance)].append(instance)
+
+            if (investment.id, row[IMAGE_COLUMN]) not in image_urls:
+                image_urls.add((investment.id, row[IMAGE_COLUMN]))
+                created[Image].append(
+                    self.allocate[Image](Image(url=row[IMAGE_COLUMN], investment_id=investment.id))
+                )
+
+        for model, instances in created.items():
+            model.objects.bulk_create(instances, batch_size=batch_size)
+
+        for model, instances in changed.items():
+            fields = [
+                field.name
+                for field in model._meta.concrete_fields
+                if not field.primary_key and not (model is Investment and field.name in FUNDING_FIELDS)
+            ]
+            model.objects.bulk_update(instances, fields, batch_size=batch_size)
+
+        rebuild_detail_documents(
+            batch_size=batch_size, id__in=[investment.id for investment in existing.values()]
+        )
+
+        return len(created[Investment]), len(changed[Investment])
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from investments.cache import invalidate_catalog
+from investments.documents import rebuild_detail_documents
+from investments.models import Investment
+
+
+class Command(BaseCommand):
+    help = "Rebuild the precomputed investment detail documents"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        ids        = list(Investment.objects.order_by("id").values_list("id", flat=True))
+        rebuilt    = 0
+
+        for start in range(0, len(ids), batch_size):
+            rebuilt += len(
+                rebuild_detail_documents(batch_size=batch_size, id__in=ids[start : start + batch_size])
+            )
+
+        invalidate_catalog()
+
+        self.stdout.write(self.style.SUCCESS(f"REBUILT {rebuilt} INVESTMENT DOCUMENTS"))
@@ -0,0 +1,29 @@
+# Generated by Django 3.2.7 on 2026-10-18 15:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('investments', '0004_investmentdetail_bidding_rate'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='investment',
+            index=models.Index(fields=['grade', 'return_rate'], name='investments_grade_i_9da74c_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='investment',
+            index=models.Index(fields=['duration', 'return_rate'], name='investments_duratio_23cd52_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='investment',
+            index=models.Index(fields=['return_rate', 'id'], name='investments_return__a36f77_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='investment',
+            index=models.Index(fields=['target_amount', 'id'], name='investments_target__fe72ee_idx'),
+        ),
+    ]
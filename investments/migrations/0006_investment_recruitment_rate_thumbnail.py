@@ -0,0 +1,27 @@
+# Generated by Django 3.2.7 on 2026-10-18 15:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('investments', '0005_investment_listing_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='investment',
+            name='recruitment_rate',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='investment',
+            name='thumbnail_url',
+            field=models.URLField(max_length=256, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='investment',
+            index=models.Index(fields=['recruitment_rate', 'id'], name='investments_recruit_40d511_idx'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 3.2.7 on 2026-10-18 15:26
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('investments', '0006_investment_recruitment_rate_thumbnail'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InvestmentDocument',
+            fields=[
+                ('investment', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, serialize=False, to='investments.investment')),
+                ('etag', models.CharField(max_length=40)),
+                ('content', models.TextField()),
+                ('updated_time', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'investment_documents',
+            },
+        ),
+    ]
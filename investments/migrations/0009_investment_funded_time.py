@@ -0,0 +1,18 @@
+# Generated by Django 3.2.7 on 2026-10-18 15:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('investments', '0007_investment_documents'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='investment',
+            name='funded_time',
+            field=models.DateTimeField(null=True),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 3.2.7 on 2026-10-18 15:42
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('investments', '0009_investment_funded_time'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='investment',
+            name='funding_shards',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name='FundingShard',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('shard', models.PositiveSmallIntegerField()),
+                ('capacity', models.BigIntegerField()),
+                ('amounts', models.BigIntegerField(default=0)),
+                ('investment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='investments.investment')),
+            ],
+            options={
+                'db_table': 'funding_shards',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='fundingshard',
+            constraint=models.UniqueConstraint(fields=('investment', 'shard'), name='unique_funding_shard'),
+        ),
+    ]
@@ -61,19 +61,53 @@ class BorrowerInformation(models.Model):
 
 
 class Investment(models.Model):
-    name           = models.CharField(max_length=64)
-    grade          = models.ForeignKey(Grade, on_delete=models.PROTECT)
-    duration       = models.PositiveSmallIntegerField()
-    repayment_type = models.ForeignKey(RepaymentType, on_delete=models.PROTECT)
-    return_rate    = models.FloatField()
-    target_amount  = models.IntegerField()
-    current_amount = models.IntegerField()
-    detail         = models.ForeignKey(InvestmentDetail, on_delete=models.CASCADE)
-    security       = models.ForeignKey(Security, on_delete=models.PROTECT)
-    borrower       = models.ForeignKey(BorrowerInformation, on_delete=models.PROTECT)
+    name             = models.CharField(max_length=64)
+    grade            = models.ForeignKey(Grade, on_delete=models.PROTECT)
+    duration         = models.PositiveSmallIntegerField()
+    repayment_type   = models.ForeignKey(RepaymentType, on_delete=models.PROTECT)
+    return_rate      = models.FloatField()
+    target_amount    = models.IntegerField()
+    current_amount   = models.IntegerField()
+    detail           = models.ForeignKey(InvestmentDetail, on_delete=models.CASCADE)
+    security         = models.ForeignKey(Security, on_delete=models.PROTECT)
+    borrower         = models.ForeignKey(BorrowerInformation, on_delete=models.PROTECT)
+    recruitment_rate = models.PositiveSmallIntegerField(default=0)
+    thumbnail_url    = models.URLField(max_length=256, null=True)
+    funded_time      = models.DateTimeField(null=True)
+    funding_shards   = models.PositiveSmallIntegerField(default=0)
 
     class Meta:
         db_table = "investments"
+        indexes  = [
+            models.Index(fields=["grade", "return_rate"]),
+            models.Index(fields=["duration", "return_rate"]),
+            models.Index(fields=["return_rate", "id"]),
+            models.Index(fields=["target_amount", "id"]),
+            models.Index(fields=["recruitment_rate", "id"]),
+        ]
+
+    @staticmethod
+    def calculate_recruitment_rate(current_amount, target_amount):
+        if not target_amount:
+            return 0
+
+        return max(int(int(current_amount) / int(target_amount) * 100), 0)
+
+    @classmethod
+    def refresh_thumbnails(cls, **filters):
+        return cls.objects.filter(**filters).update(
+            thumbnail_url=models.Subquery(
+                Image.objects.filter(investment=models.OuterRef("pk")).order_by("id").values("url")[:1]
+            )
+        )
+
+    def save(self, *args, **kwargs):
+        self.recruitment_rate = self.calculate_recruitment_rate(self.current_amount, self.target_amount)
+
+        if kwargs.get("update_fields") is not None:
+            kwargs["update_fields"] = set(kwargs["update_fields"]) | {"recruitment_rate"}
+
+        super().save(*args, **kwargs)
 
 
 class Image(models.Model):
@@ -82,3 +116,38 @@ class Image(models.Model):
 
     class Meta:
         db_table = "images"
+
+
+class FundingShard(models.Model):
+    investment = models.ForeignKey(Investment, on_delete=models.CASCADE)
+    shard      = models.PositiveSmallIntegerField()
+    capacity   = models.BigIntegerField()
+    amounts    = models.BigIntegerField(default=0)
+
+    class Meta:
+        db_table    = "funding_shards"
+        constraints = [
+            models.UniqueConstraint(fields=["investment", "shard"], name="unique_funding_shard"),
+        ]
+
+    @classmethod
+    def totals(cls, investment_ids):
+        if not investment_ids:
+            return {}
+
+        return dict(
+            cls.objects.filter(investment_id__in=investment_ids)
+            .values("investment_id")
+            .annotate(total=models.Sum("amounts"))
+            .values_list("investment_id", "total")
+        )
+
+
+class InvestmentDocument(models.Model):
+    investment   = models.OneToOneField(Investment, on_delete=models.CASCADE, primary_key=True)
+    etag         = models.CharField(max_length=40)
+    content      = models.TextField()
+    updated_time = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "investment_documents"
@@ -0,0 +1,62 @@
+from django.db.models.signals import post_save, post_delete
+
+from investments.cache import invalidate_catalog
+from investments.documents import refresh_detail_documents
+from investments.models import (
+    Grade,
+    RepaymentType,
+    Security,
+    LoanType,
+    InvestmentDetail,
+    BorrowerInformation,
+    Investment,
+    Image,
+)
+
+CATALOG_MODELS = (
+    Grade,
+    RepaymentType,
+    Security,
+    LoanType,
+    InvestmentDetail,
+    BorrowerInformation,
+    Investment,
+    Image,
+)
+
+
+def catalog_changed(sender, **kwargs):
+    invalidate_catalog()
+
+
+for model in CATALOG_MODELS:
+    post_save.connect(catalog_changed, sender=model, dispatch_uid=f"catalog_save_{model.__name__}")
+    post_delete.connect(catalog_changed, sender=model, dispatch_uid=f"catalog_delete_{model.__name__}")
+
+
+DOCUMENT_FILTERS = {
+    Grade               : "grade_id",
+    RepaymentType       : "repayment_type_id",
+    Security            : "security_id",
+    LoanType            : "detail__loan_type_id",
+    InvestmentDetail    : "detail_id",
+    BorrowerInformation : "borrower_id",
+    Investment          : "id",
+}
+
+
+def document_changed(sender, instance, **kwargs):
+    refresh_detail_documents(**{DOCUMENT_FILTERS[sender]: instance.pk})
+
+
+for model in DOCUMENT_FILTERS:
+    post_save.connect(document_changed, sender=model, dispatch_uid=f"document_save_{model.__name__}")
+
+
+def image_changed(sender, instance, **kwargs):
+    Investment.refresh_thumbnails(id=instance.investment_id)
+    refresh_detail_documents(id=instance.investment_id)
+
+
+post_save.connect(image_changed, sender=Image, dispatch_uid="thumbnail_image_save")
+post_delete.connect(image_changed, sender=Image, dispatch_uid="thumbnail_image_delete")
@@ -1,8 +1,23 @@
 import json
+import time
 import unittest
 
+from io import StringIO
+from unittest import mock
+
 from .models import *
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.http import QueryDict
 from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
+
+from core.registry import registry
+from core.utils import encode_cursor
+from investments.cache import HITS_KEY, MISSES_KEY, flush_catalog_cache_stats, invalidate_catalog
+from investments.listing import InvestmentListing
 
 class InvestmentListTest(TestCase):
     def setUp(self):
@@ -264,3 +279,455 @@ class InvestmentDetailErrorTest(TestCase):
         self.assertEqual(response.status_code, 404)
 
         self.assertEqual(response.json(), {'MESSAGE' : 'NOT_FOUND'})
+
+
+class CatalogCacheTest(TestCase):
+    def setUp(self):
+        flush_catalog_cache_stats()
+        cache.clear()
+
+        Grade.objects.create(id = 1, name = "A+")
+        RepaymentType.objects.create(id = 1, name = "만기일시")
+        LoanType.objects.create(id = 1, name = "부동산 담보 대출")
+
+        Security.objects.create(
+            id                     = 1,
+            address                = "경기도 김포시",
+            completion_date        = "2012년 5월",
+            supply_area            = 153.2,
+            household              = 465,
+            exclusive_private_area = 122.61,
+            lease_status           = "본인거주"
+        )
+
+        BorrowerInformation.objects.create(
+            id                = 1,
+            credit_score      = 664,
+            income_type       = "근로소득",
+            income            = 1740000,
+            card_usage_amount = 780000,
+            loan_amount       = 400000000,
+            is_overdue        = "해당 없음",
+            overdue_tax       = 0
+        )
+
+        InvestmentDetail.objects.create(
+            id                   = 1,
+            evaluation_price     = 600000000,
+            repayment_day        = 25,
+            priority_bond_amount = 400000000,
+            loan_type_id         = 1,
+            bidding_rate         = 103.9
+        )
+
+        for investment_id in (1, 2):
+            Investment.objects.create(
+                id                = investment_id,
+                name              = f"주거안정 40{investment_id}호",
+                duration          = 12,
+                return_rate       = 8.9,
+                target_amount     = 80000000,
+                current_amount    = 3600000,
+                borrower_id       = 1,
+                detail_id         = 1,
+                grade_id          = 1,
+                repayment_type_id = 1,
+                security_id       = 1
+            )
+
+            Image.objects.create(
+                url           = f"https://example.com/{investment_id}.jpg",
+                investment_id = investment_id
+            )
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_investment_list_queries_without_n_plus_one(self):
+        client = Client()
+        registry.clear()
+        registry.names("grade")
+
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get('/investments')
+
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('"grades"', queries[0]["sql"])
+        self.assertEqual(response.json()["investments"][0]["grade"], "A+")
+
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(
+            [investment["image"] for investment in response.json()["investments"]],
+            ["https://example.com/1.jpg", "https://example.com/2.jpg"]
+        )
+
+    def test_investment_list_served_from_cache(self):
+        client = Client()
+        client.get('/investments')
+
+        with self.assertNumQueries(0):
+            response = client.get('/investments')
+
+        self.assertEqual(response["X-Cache"], "HIT")
+        self.assertEqual(len(response.json()["investments"]), 2)
+
+    def test_investment_detail_served_from_cache(self):
+        client = Client()
+        client.get('/investments/1')
+
+        with self.assertNumQueries(0):
+            response = client.get('/investments/1')
+
+        self.assertEqual(response["X-Cache"], "HIT")
+        self.assertEqual(response.json()["id"], 1)
+
+    def test_investment_detail_document_built_without_lookup_joins(self):
+        InvestmentDocument.objects.all().delete()
+        registry.clear()
+
+        with CaptureQueriesContext(connection) as queries:
+            response = Client().get('/investments/1')
+
+        document_sql = [query["sql"] for query in queries if '"investments"."name"' in query["sql"]]
+
+        self.assertEqual(len(document_sql), 1)
+        self.assertNotIn('"grades"', document_sql[0])
+        self.assertNotIn('"repayment_types"', document_sql[0])
+        self.assertNotIn('"loan_types"', document_sql[0])
+        self.assertEqual(
+            [response.json()[key] for key in ("grade", "repayment_types", "loan_type")],
+            ["A+", "만기일시", "부동산 담보 대출"],
+        )
+
+    def test_investment_detail_document_read(self):
+        client = Client()
+        client.get('/investments/1')
+        cache.clear()
+
+        with self.assertNumQueries(1):
+            response = client.get('/investments/1')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content.decode(), InvestmentDocument.objects.get(investment_id = 1).content)
+
+    def test_investment_detail_if_none_match(self):
+        client   = Client()
+        etag     = client.get('/investments/1')["ETag"]
+        response = client.get('/investments/1', HTTP_IF_NONE_MATCH = etag)
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+        self.assertEqual(response["ETag"], etag)
+
+        Security.objects.filter(id = 1).update(address = "서울특별시")
+        Security.objects.get(id = 1).save()
+
+        response = client.get('/investments/1', HTTP_IF_NONE_MATCH = etag)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(response.json()["address"], "서울특별시")
+
+    def test_investment_detail_etag_survives_catalog_writes(self):
+        client = Client()
+        etag   = client.get('/investments/1')["ETag"]
+
+        Image.objects.create(url = "https://example.com/2-1.jpg", investment_id = 2)
+        invalidate_catalog()
+
+        response = client.get('/investments/1', HTTP_IF_NONE_MATCH = etag)
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(etag, '"%s"' % InvestmentDocument.objects.get(investment_id = 1).etag)
+
+    def test_conditional_get_skips_database_and_serialization(self):
+        client = Client()
+
+        for path in ('/investments', '/investments?sort=-return_rate', '/investments/1'):
+            response = client.get(path)
+
+            with self.assertNumQueries(0), mock.patch("investments.views.get_or_build") as get_or_build:
+                not_modified = client.get(path, HTTP_IF_NONE_MATCH = response["ETag"])
+
+            self.assertEqual(not_modified.status_code, 304)
+            self.assertFalse(get_or_build.called)
+            self.assertEqual(not_modified["Cache-Control"], response["Cache-Control"])
+
+    def test_conditional_get_if_modified_since(self):
+        client        = Client()
+        last_modified = client.get('/investments')["Last-Modified"]
+        response      = client.get('/investments', HTTP_IF_MODIFIED_SINCE = last_modified)
+
+        self.assertEqual(response.status_code, 304)
+
+    def test_last_modified_advances_within_one_second(self):
+        client = Client()
+
+        with mock.patch("investments.cache.time.time", return_value = time.time()):
+            last_modified = client.get('/investments')["Last-Modified"]
+            invalidate_catalog()
+            response = client.get('/investments', HTTP_IF_MODIFIED_SINCE = last_modified)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["Last-Modified"], last_modified)
+
+    def test_catalog_etag_differs_per_listing(self):
+        client = Client()
+
+        self.assertNotEqual(
+            client.get('/investments')["ETag"], client.get('/investments?sort=-return_rate')["ETag"]
+        )
+
+    def test_catalog_cache_control(self):
+        client = Client()
+
+        self.assertEqual(client.get('/investments')["Cache-Control"], "public, max-age=10, must-revalidate")
+        self.assertEqual(client.get('/investments/1')["Cache-Control"], "public, max-age=60, must-revalidate")
+        self.assertEqual(client.get('/investments/cache').status_code, 404)
+
+    def test_investment_detail_without_bidding_rate(self):
+        InvestmentDetail.objects.filter(id = 1).update(bidding_rate = None)
+
+        response = Client().get('/investments/1')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(response.json()["bidding_rate"])
+        self.assertIsNone(response.json()["expected_recovery"])
+        self.assertEqual(response.json()["LTV"], 80.0)
+
+    def test_rebuild_investment_documents(self):
+        out = StringIO()
+        call_command("rebuild_investment_documents", "--batch-size", "1", stdout = out)
+
+        self.assertIn("REBUILT 2 INVESTMENT DOCUMENTS", out.getvalue())
+        self.assertEqual(InvestmentDocument.objects.count(), 2)
+
+    def test_investment_change_bumps_catalog_version(self):
+        client = Client()
+        client.get('/investments/1')
+
+        with self.captureOnCommitCallbacks(execute = True):
+            Investment.objects.filter(id = 1).update(current_amount = 8000000)
+            Investment.objects.get(id = 1).save()
+
+        response = client.get('/investments/1')
+
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(response.json()["current_amount"], 8000000)
+
+    def test_image_change_refreshes_thumbnail(self):
+        Image.objects.create(id = 10, url = "https://example.com/later.jpg", investment_id = 1)
+
+        self.assertEqual(Investment.objects.get(id = 1).thumbnail_url, "https://example.com/1.jpg")
+
+        Image.objects.filter(investment_id = 1).exclude(id = 10).delete()
+        Image.objects.get(id = 10).save()
+
+        self.assertEqual(Investment.objects.get(id = 1).thumbnail_url, "https://example.com/later.jpg")
+
+        Image.objects.get(id = 10).delete()
+
+        self.assertIsNone(Investment.objects.get(id = 1).thumbnail_url)
+
+    def test_backfill_investment_columns(self):
+        Investment.objects.update(recruitment_rate = 0, thumbnail_url = None)
+
+        out = StringIO()
+        call_command("backfill_investment_columns", "--batch-size", "1", stdout = out)
+
+        self.assertIn("BACKFILLED 2 INVESTMENTS", out.getvalue())
+        self.assertEqual(
+            list(Investment.objects.order_by("id").values_list("recruitment_rate", "thumbnail_url")),
+            [(4, "https://example.com/1.jpg"), (4, "https://example.com/2.jpg")]
+        )
+
+    def test_catalog_cache_stats(self):
+        client = Client()
+        client.get('/investments')
+        client.get('/investments')
+
+        out = StringIO()
+        call_command("catalog_cache_stats", stdout = out)
+
+        self.assertIn("HITS 1, MISSES 1", out.getvalue())
+
+    def test_catalog_cache_stats_stay_local_until_flushed(self):
+        client = Client()
+        client.get('/investments')
+        client.get('/investments')
+
+        self.assertIsNone(cache.get(HITS_KEY))
+        self.assertIsNone(cache.get(MISSES_KEY))
+
+        flush_catalog_cache_stats()
+
+        self.assertEqual(cache.get(HITS_KEY), 1)
+        self.assertEqual(cache.get(MISSES_KEY), 1)
+
+
+class LoadInvestmentsCommandTest(TestCase):
+    csv_path = str(settings.BASE_DIR / "investment.csv")
+
+    def test_load_investments(self):
+        out = StringIO()
+        call_command("load_investments", self.csv_path, "--batch-size", "7", stdout = out)
+
+        self.assertIn("20 CREATED, 0 UPDATED", out.getvalue())
+        self.assertEqual(Investment.objects.count(), 20)
+        self.assertEqual(Image.objects.count(), 20)
+        self.assertEqual(Grade.objects.count(), 1)
+
+        investment = Investment.objects.select_related("detail__loan_type", "security").get(
+            name = "주거안정 406호 김포 장기동 한강현대성우오스타"
+        )
+
+        self.assertEqual(investment.target_amount, 80000000)
+        self.assertEqual(investment.detail.bidding_rate, 103.9)
+        self.assertEqual(investment.detail.loan_type.name, "부동산 담보 대출")
+        self.assertEqual(investment.security.address, "경기도 김포시")
+
+    def test_load_investments_is_idempotent(self):
+        call_command("load_investments", self.csv_path, stdout = StringIO())
+        Investment.objects.update(current_amount = 0, recruitment_rate = 0, target_amount = 1)
+
+        out = StringIO()
+        call_command("load_investments", self.csv_path, stdout = out)
+
+        self.assertIn("0 CREATED, 20 UPDATED", out.getvalue())
+        self.assertEqual(Investment.objects.count(), 20)
+        self.assertEqual(Security.objects.count(), 20)
+        self.assertEqual(Image.objects.count(), 20)
+        self.assertFalse(Investment.objects.exclude(current_amount = 0).exists())
+        self.assertFalse(Investment.objects.exclude(recruitment_rate = 0).exists())
+        self.assertFalse(Investment.objects.filter(target_amount = 1).exists())
+        self.assertFalse(Investment.objects.filter(thumbnail_url = None).exists())
+        self.assertEqual(InvestmentDocument.objects.count(), 20)
+
+
+class InvestmentListingTest(TestCase):
+    def setUp(self):
+        cache.clear()
+
+        Grade.objects.bulk_create([Grade(id = 1, name = "A+"), Grade(id = 2, name = "B")])
+        RepaymentType.objects.bulk_create(
+            [RepaymentType(id = 1, name = "만기일시"), RepaymentType(id = 2, name = "원리금균등")]
+        )
+        LoanType.objects.create(id = 1, name = "부동산 담보 대출")
+
+        Security.objects.create(
+            id                     = 1,
+            address                = "경기도 김포시",
+            completion_date        = "2012년 5월",
+            supply_area            = 153.2,
+            household              = 465,
+            exclusive_private_area = 122.61,
+            lease_status           = "본인거주"
+        )
+
+        BorrowerInformation.objects.create(
+            id                = 1,
+            credit_score      = 664,
+            income_type       = "근로소득",
+            income            = 1740000,
+            card_usage_amount = 780000
+        )
+
+        InvestmentDetail.objects.create(
+            id                   = 1,
+            evaluation_price     = 600000000,
+            repayment_day        = 25,
+            priority_bond_amount = 400000000,
+            loan_type_id         = 1
+        )
+
+        for investment_id, grade_id, repayment_type_id, duration, return_rate, current_amount in [
+            (1, 1, 1, 12, 8.9, 1000),
+            (2, 2, 1, 6, 12.5, 100000),
+            (3, 1, 2, 12, 10.0, 50000),
+            (4, 2, 2, 24, 7.5, 0),
+            (5, 1, 1, 6, 12.5, 99999),
+        ]:
+            Investment.objects.create(
+                id                = investment_id,
+                name              = f"주거안정 {investment_id}호",
+                duration          = duration,
+                return_rate       = return_rate,
+                target_amount     = 100000,
+                current_amount    = current_amount,
+                borrower_id       = 1,
+                detail_id         = 1,
+                grade_id          = grade_id,
+                repayment_type_id = repayment_type_id,
+                security_id       = 1
+            )
+            Image.objects.create(url = f"https://example.com/{investment_id}.jpg", investment_id = investment_id)
+
+    def tearDown(self):
+        cache.clear()
+
+    def get_ids(self, params):
+        response = Client().get('/investments', params)
+
+        self.assertEqual(response.status_code, 200)
+
+        return [investment["id"] for investment in response.json()["investments"]]
+
+    def test_investment_listing_filters(self):
+        self.assertEqual(self.get_ids({"grade" : "A+"}), [1, 3, 5])
+        self.assertEqual(self.get_ids({"grade" : ["A+", "B"], "duration" : 6}), [2, 5])
+        self.assertEqual(self.get_ids({"repayment_type" : "원리금균등"}), [3, 4])
+        self.assertEqual(self.get_ids({"return_rate_min" : 9, "return_rate_max" : 12}), [3])
+        self.assertEqual(self.get_ids({"open" : "true"}), [1, 3, 4, 5])
+
+    def test_investment_listing_sort(self):
+        self.assertEqual(self.get_ids({"sort" : "-return_rate"}), [5, 2, 3, 1, 4])
+        self.assertEqual(self.get_ids({"sort" : "duration"}), [2, 5, 1, 3, 4])
+        self.assertEqual(self.get_ids({"sort" : "-recruitment_rate"}), [2, 5, 3, 1, 4])
+
+    def test_investment_listing_keyset_pagination(self):
+        client = Client()
+        ids    = []
+        params = {"sort" : "-return_rate", "limit" : 2}
+
+        while True:
+            response = client.get('/investments', params).json()
+            ids     += [investment["id"] for investment in response["investments"]]
+
+            if not response["next_cursor"]:
+                break
+
+            params["cursor"] = response["next_cursor"]
+
+        self.assertEqual(ids, [5, 2, 3, 1, 4])
+
+    def test_investment_listing_empty_filter_result(self):
+        self.assertEqual(self.get_ids({"grade" : "D"}), [])
+
+    def test_investment_listing_invalid_input(self):
+        for params in (
+            {"sort" : "name"},
+            {"limit" : 0},
+            {"duration" : "long"},
+            {"cursor" : "invalid"},
+            {"sort" : "return_rate", "cursor" : encode_cursor("abc", 1)},
+            {"sort" : "return_rate", "cursor" : encode_cursor(8.9, "abc")},
+            {"sort" : "return_rate", "cursor" : encode_cursor(None, 1)},
+            {"cursor" : encode_cursor(1)},
+        ):
+            response = Client().get('/investments', params)
+
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(response.json(), {'MESSAGE' : 'INVALID_INPUT'})
+
+    def test_investment_listing_cache_name_is_normalized(self):
+        same = [
+            QueryDict("grade=B&grade=A%2B&duration=12&duration=6"),
+            QueryDict("duration=06&grade=A%2B&grade=B&duration=12&sort=id&utm_source=mail"),
+        ]
+
+        self.assertEqual(
+            InvestmentListing(same[0]).cache_name, InvestmentListing(same[1]).cache_name
+        )
+        self.assertNotEqual(
+            InvestmentListing(QueryDict("grade=D")).cache_name, InvestmentListing(QueryDict()).cache_name
+        )
@@ -1,70 +1,107 @@
 from django.views import View
-from django.http import JsonResponse
+from django.http import JsonResponse, HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
 
-from .models import Investment, Image
+from core.registry import registry
+from core.renderers import render_json
+from .cache import (
+    get_or_build,
+    get_or_build_detail,
+    catalog_validators,
+    catalog_etag,
+)
+from .documents import get_detail_document
+from .listing import InvestmentListing
+
+
+def set_validators(response, etag, last_modified, cache_control):
+    response["ETag"]          = etag
+    response["Last-Modified"] = http_date(last_modified)
+    response["Cache-Control"] = cache_control
+
+    return response
+
+
+def content_response(content, hit, etag, last_modified, cache_control):
+    response = HttpResponse(content, content_type = "application/json", status = 200)
+    response["X-Cache"] = "HIT" if hit else "MISS"
+
+    return set_validators(response, etag, last_modified, cache_control)
+
+
+def cached_json_response(request, name, builder, not_found, cache_control):
+    version, last_modified = catalog_validators()
+    etag                   = catalog_etag(name, version)
+
+    not_modified = get_conditional_response(request, etag = etag, last_modified = last_modified)
+
+    if not_modified is not None:
+        return set_validators(not_modified, etag, last_modified, cache_control)
+
+    content, hit = get_or_build(name, builder, version)
+
+    if content is None:
+        return JsonResponse(not_found, status = 404)
+
+    return content_response(content, hit, etag, last_modified, cache_control)
 
 
 class InvestmentListView(View):
+    cache_control = "public, max-age=10, must-revalidate"
+
     def get(self, request):
-        if not Investment.objects.exists():
-            return JsonResponse({'MESSAGE' : 'INVESTMENTS_DOES_NOT_EXISTS'}, status = 404)
+        try:
+            listing = InvestmentListing(request.GET)
+
+        except (ValueError, TypeError):
+            return JsonResponse({'MESSAGE' : 'INVALID_INPUT'}, status = 400)
+
+        return cached_json_response(
+            request,
+            listing.cache_name,
+            lambda: self.build(listing),
+            {'MESSAGE' : 'INVESTMENTS_DOES_NOT_EXISTS'},
+            self.cache_control
+        )
+
+    def build(self, listing):
+        investments, next_cursor = listing.page()
 
-        investments = Investment.objects.prefetch_related("image_set").all()
+        if not investments and listing.is_default:
+            return None
 
-        return JsonResponse({"investments" : [
-            {
-                "id"               : investment.id,
-                "name"             : investment.name,
-                "return_rate"      : investment.return_rate,
-                "duration"         : investment.duration,
-                "target_amount"    : investment.target_amount,
-                "grade"            : investment.grade.name,
-                "image"            : investment.image_set.all().first().url,
-                "recrutement_rate" : int(investment.current_amount/investment.target_amount*100)
-            } for investment in investments]}, status = 200)
+        return render_json({
+            "investments" : [
+                {
+                    "id"               : investment["id"],
+                    "name"             : investment["name"],
+                    "return_rate"      : investment["return_rate"],
+                    "duration"         : investment["duration"],
+                    "target_amount"    : investment["target_amount"],
+                    "grade"            : registry.grade_name(investment["grade_id"]),
+                    "image"            : investment["thumbnail_url"],
+                    "recrutement_rate" : investment["recruitment_rate"]
+                } for investment in investments],
+            "next_cursor" : next_cursor,
+        })
 
 
 class InvestmentDetailView(View):
+    cache_control = "public, max-age=60, must-revalidate"
+
     def get(self, request, investment_id):
-        if not Investment.objects.filter(id = investment_id).exists():
+        document, hit = get_or_build_detail(investment_id, lambda: get_detail_document(investment_id))
+
+        if document is None:
             return JsonResponse({'MESSAGE' : 'NOT_FOUND'}, status = 404)
 
-        investment = Investment.objects.select_related("grade", "repayment_type", "detail", "security", "borrower").prefetch_related("image_set").get(id = investment_id)
-        images = investment.image_set.all()
-
-        return JsonResponse(
-            {
-                "image_list"             : [image.url for image in images], 
-                "id"                     : investment.id,
-                "name"                   : investment.name,
-                "grade"                  : investment.grade.name,
-                "return_rate"            : investment.return_rate,
-                "duration"               : investment.duration,
-                "repayment_types"        : investment.repayment_type.name, 
-                "current_amount"         : investment.current_amount, 
-                "target_amount"          : investment.target_amount,
-                "recrutement_rate"       : int(investment.current_amount/investment.target_amount*100), 
-                "LTV"                    : round(((investment.target_amount + investment.detail.priority_bond_amount)/investment.detail.evaluation_price)*100, 2), 
-                "repayment_day"          : investment.detail.repayment_day, 
-                "loan_type"              : investment.detail.loan_type.name, 
-                "evaluation_price"       : investment.detail.evaluation_price, 
-                "priority_bond_amount"   : investment.detail.priority_bond_amount, 
-                "security_surcharge"     : (investment.detail.evaluation_price - investment.detail.priority_bond_amount - investment.target_amount), 
-                "bidding_rate"           : investment.detail.bidding_rate, 
-                "expected_recovery"      : (investment.detail.evaluation_price * investment.detail.bidding_rate) - investment.detail.priority_bond_amount, 
-                "address"                : investment.security.address, 
-                "completion_date"        : investment.security.completion_date, 
-                "household"              : investment.security.household, 
-                "supply_area"            : investment.security.supply_area, 
-                "exclusive_private_area" : investment.security.exclusive_private_area, 
-                "lease_status"           : investment.security.lease_status, 
-                "latitude"               : investment.security.latitude, 
-                "longitude"              : investment.security.longitude, 
-                "credit_score"           : investment.borrower.credit_score, 
-                "income_type"            : investment.borrower.income_type, 
-                "income"                 : investment.borrower.income, 
-                "card_usage_amount"      : investment.borrower.card_usage_amount, 
-                "loan_amount"            : investment.borrower.loan_amount, 
-                "is_overdue"             : investment.borrower.is_overdue, 
-                "overdue_tax"            : investment.borrower.overdue_tax
-            }, status = 200)
+        etag, last_modified, content = document
+        etag                         = quote_etag(etag)
+
+        not_modified = get_conditional_response(request, etag = etag, last_modified = last_modified)
+
+        if not_modified is not None:
+            return set_validators(not_modified, etag, last_modified, self.cache_control)
+
+        return content_response(content, hit, etag, last_modified, self.cache_control)
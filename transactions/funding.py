@@ -0,0 +1,104 @@
+import random
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from investments.cache import invalidate_catalog
+from investments.documents import refresh_detail_documents
+from investments.models import FundingShard, Investment
+
+
+def funding_totals(investment_ids):
+    shard_totals = FundingShard.totals(investment_ids)
+
+    return {
+        investment_id: current_amount + shard_totals.get(investment_id, 0)
+        for investment_id, current_amount in Investment.objects.filter(id__in=investment_ids).values_list(
+            "id", "current_amount"
+        )
+    }
+
+
+def reserve_shard_funding(investment_id, shards, amounts):
+    reserved = FundingShard.objects.filter(
+        investment_id=investment_id,
+        shard=random.randrange(shards),
+        amounts__lte=F("capacity") - amounts,
+    ).update(amounts=F("amounts") + amounts)
+
+    if reserved:
+        return amounts
+
+    accepted = 0
+
+    for shard in FundingShard.objects.select_for_update().filter(investment_id=investment_id).order_by("shard"):
+        headroom = min(amounts - accepted, shard.capacity - shard.amounts)
+
+        if headroom > 0:
+            FundingShard.objects.filter(id=shard.id).update(amounts=F("amounts") + headroom)
+            accepted += headroom
+
+        if accepted == amounts:
+            break
+
+    return accepted
+
+
+def fold_funding_shards(investment_id):
+    with transaction.atomic():
+        shards     = list(
+            FundingShard.objects.select_for_update().filter(investment_id=investment_id).order_by("shard")
+        )
+        investment = Investment.objects.select_for_update().filter(id=investment_id).first()
+        folded     = sum(shard.amounts for shard in shards)
+
+        if not investment or not folded:
+            return 0
+
+        FundingShard.objects.filter(investment_id=investment_id).update(
+            capacity=F("capacity") - F("amounts"), amounts=0
+        )
+
+        investment.current_amount += folded
+
+        if investment.current_amount >= investment.target_amount and not investment.funded_time:
+            investment.funded_time = timezone.now()
+
+        investment.save(update_fields=["current_amount", "recruitment_rate", "funded_time"])
+        refresh_detail_documents(id=investment_id)
+        invalidate_catalog()
+
+    return folded
+
+
+def enable_hot_listing(investment_id, shards):
+    with transaction.atomic():
+        fold_funding_shards(investment_id)
+
+        investment = Investment.objects.select_for_update().get(id=investment_id)
+        headroom   = max(investment.target_amount - investment.current_amount, 0)
+
+        FundingShard.objects.filter(investment_id=investment_id).delete()
+        FundingShard.objects.bulk_create(
+            [
+                FundingShard(
+                    investment_id=investment_id,
+                    shard=shard,
+                    capacity=headroom // shards + (headroom % shards if shard == 0 else 0),
+                )
+                for shard in range(shards)
+            ]
+        )
+
+        investment.funding_shards = shards
+        investment.save(update_fields=["funding_shards"])
+
+    return investment
+
+
+def disable_hot_listing(investment_id):
+    with transaction.atomic():
+        fold_funding_shards(investment_id)
+        FundingShard.objects.filter(investment_id=investment_id).delete()
+        Investment.objects.filter(id=investment_id).update(funding_shards=0)
@@ -0,0 +1,103 @@
+import datetime
+import hashlib
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.http import HttpResponse, JsonResponse
+from django.utils import timezone
+
+from transactions.models import IdempotencyKey
+
+IDEMPOTENCY_KEY_MAX_LENGTH = 64
+
+
+def request_fingerprint(request):
+    request_line = f"{request.method} {request.path}\n".encode("utf-8")
+
+    return hashlib.sha256(request_line + request.body).hexdigest()
+
+
+def lookup(user, key):
+    try:
+        return IdempotencyKey.objects.get(user=user, key=key)
+
+    except IdempotencyKey.DoesNotExist:
+        return None
+
+
+def replay(stored, request_hash):
+    if stored.request_hash != request_hash:
+        return JsonResponse({"message": "IDEMPOTENCY_KEY_REUSED"}, status=422)
+
+    response = HttpResponse(
+        stored.response_body, status=stored.status_code, content_type="application/json"
+    )
+    response["Idempotent-Replayed"] = "true"
+
+    return response
+
+
+def idempotent(func):
+    def wrapper(self, request, *args, **kwargs):
+        key = request.headers.get("Idempotency-Key", None)
+
+        if key is None:
+            return func(self, request, *args, **kwargs)
+
+        if not 0 < len(key) <= IDEMPOTENCY_KEY_MAX_LENGTH:
+            return JsonResponse({"message": "INVALID_IDEMPOTENCY_KEY"}, status=400)
+
+        request_hash = request_fingerprint(request)
+        now          = timezone.now()
+        stored       = lookup(request.user, key)
+
+        if stored and stored.expires_time > now:
+            return replay(stored, request_hash)
+
+        with transaction.atomic():
+            if stored:
+                stored.delete()
+
+            try:
+                with transaction.atomic():
+                    record = IdempotencyKey.objects.create(
+                        user=request.user,
+                        key=key,
+                        request_hash=request_hash,
+                        status_code=0,
+                        response_body="",
+                        expires_time=now + datetime.timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL),
+                    )
+
+            except IntegrityError:
+                return replay(IdempotencyKey.objects.get(user=request.user, key=key), request_hash)
+
+            response = func(self, request, *args, **kwargs)
+
+            if response.status_code >= 500:
+                transaction.set_rollback(True)
+                return response
+
+            record.status_code   = response.status_code
+            record.response_body = response.content.decode("utf-8")
+            record.save(update_fields=["status_code", "response_body"])
+
+        return response
+
+    return wrapper
+
+
+def prune_idempotency_keys(batch_size=1000):
+    pruned = 0
+
+    while True:
+        ids = list(
+            IdempotencyKey.objects.filter(expires_time__lte=timezone.now())
+            .order_by("expires_time")
+            .values_list("id", flat=True)[:batch_size]
+        )
+
+        if not ids:
+            return pruned
+
+        pruned += IdempotencyKey.objects.filter(id__in=ids).delete()[0]
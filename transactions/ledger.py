@@ -0,0 +1,327 @@
+import datetime
+import time
+
+from django.db import transaction
+from django.db.models import F, Max, Min, OuterRef, Q, Subquery, Sum
+from django.utils import timezone
+
+from transactions.funding import fold_funding_shards, reserve_shard_funding
+from transactions.models import BalanceSnapshot, Deposit, LedgerEntry, Portfolio, TransactionOutbox, TransactionType
+from investments.cache import invalidate_catalog, invalidate_detail_documents
+from investments.documents import refresh_detail_documents
+from investments.models import FundingShard, Investment
+
+
+SNAPSHOT_LAG = datetime.timedelta(minutes=1)
+
+TRANSACTION_ACCOUNTS = {
+    TransactionType.Type.DEPOSIT.value    : (1, LedgerEntry.Account.BANK),
+    TransactionType.Type.WITHDRAWAL.value : (-1, LedgerEntry.Account.BANK),
+    TransactionType.Type.INVESTMENT.value : (-1, LedgerEntry.Account.INVESTMENT),
+    TransactionType.Type.PAYMENT.value    : (1, LedgerEntry.Account.REPAYMENT),
+}
+
+
+class InsufficientBalance(Exception):
+    pass
+
+
+class SnapshotLagExceeded(Exception):
+    pass
+
+
+def check_snapshot_lag(started_at):
+    elapsed = time.perf_counter() - started_at
+
+    if elapsed >= SNAPSHOT_LAG.total_seconds():
+        raise SnapshotLagExceeded(f"ledger transaction ran {elapsed:.1f}s, longer than SNAPSHOT_LAG")
+
+
+def lock_deposit(deposit_id):
+    return Deposit.objects.select_for_update().get(id=deposit_id)
+
+
+def lock_investment(investment_id):
+    return Investment.objects.select_for_update().filter(id=investment_id).first()
+
+
+def credit_deposit(deposit, amounts):
+    Deposit.objects.filter(id=deposit.id).update(balance=F("balance") + amounts)
+    deposit.balance += amounts
+
+    return deposit.balance
+
+
+def debit_deposit(deposit, amounts):
+    updated = Deposit.objects.filter(id=deposit.id, balance__gte=amounts).update(
+        balance=F("balance") - amounts
+    )
+
+    if not updated:
+        raise InsufficientBalance
+
+    deposit.balance -= amounts
+
+    return deposit.balance
+
+
+def reserve_funding(investment_id, amounts):
+    reserved = Investment.objects.filter(
+        id=investment_id, current_amount__lte=F("target_amount") - amounts
+    ).update(current_amount=F("current_amount") + amounts)
+
+    if reserved:
+        return amounts
+
+    investment = lock_investment(investment_id)
+
+    if not investment:
+        return None
+
+    accepted = max(min(amounts, investment.target_amount - investment.current_amount), 0)
+
+    if accepted:
+        Investment.objects.filter(id=investment_id).update(current_amount=F("current_amount") + accepted)
+
+    return accepted
+
+
+def funded_investment(investment_id):
+    investment               = Investment.objects.get(id=investment_id)
+    investment.funded_amount = investment.current_amount
+
+    if investment.funding_shards:
+        investment.funded_amount += FundingShard.totals([investment_id]).get(investment_id, 0)
+
+    return investment
+
+
+def fund_investment(investment_id, amounts):
+    shards = Investment.objects.filter(id=investment_id).values_list("funding_shards", flat=True).first()
+
+    if shards is None:
+        return None, 0
+
+    if shards:
+        accepted = reserve_shard_funding(investment_id, shards, amounts)
+
+        if accepted < amounts:
+            transaction.on_commit(lambda: fold_funding_shards(investment_id))
+            return funded_investment(investment_id), accepted
+
+        investment       = funded_investment(investment_id)
+        recruitment_rate = Investment.calculate_recruitment_rate(
+            investment.funded_amount, investment.target_amount
+        )
+
+        if recruitment_rate > investment.recruitment_rate:
+            Investment.objects.filter(id=investment_id, recruitment_rate__lt=recruitment_rate).update(
+                recruitment_rate=recruitment_rate
+            )
+            investment.recruitment_rate = recruitment_rate
+
+        invalidate_catalog()
+        invalidate_detail_documents([investment_id])
+
+        return investment, accepted
+
+    accepted = reserve_funding(investment_id, amounts)
+
+    if accepted is None:
+        return None, 0
+
+    investment = funded_investment(investment_id)
+
+    if not accepted:
+        return investment, 0
+
+    investment.recruitment_rate = Investment.calculate_recruitment_rate(
+        investment.current_amount, investment.target_amount
+    )
+
+    if investment.current_amount >= investment.target_amount and not investment.funded_time:
+        investment.funded_time = timezone.now()
+
+    Investment.objects.filter(id=investment_id).update(
+        recruitment_rate=investment.recruitment_rate,
+        funded_time=investment.funded_time,
+    )
+    refresh_detail_documents(id=investment_id)
+    invalidate_catalog()
+
+    return investment, accepted
+
+
+def add_to_portfolio(portfolio, amounts):
+    Portfolio.objects.filter(id=portfolio.id).update(amounts=F("amounts") + amounts)
+    portfolio.amounts += amounts
+
+    return portfolio.amounts
+
+
+def ledger_entries(transaction_id, deposit_id, type_id, amounts):
+    sign, contra_account = TRANSACTION_ACCOUNTS[type_id]
+
+    return [
+        LedgerEntry(
+            deposit_id=deposit_id,
+            transaction_id=transaction_id,
+            account=LedgerEntry.Account.DEPOSIT,
+            amounts=sign * amounts,
+        ),
+        LedgerEntry(
+            deposit_id=deposit_id,
+            transaction_id=transaction_id,
+            account=contra_account,
+            amounts=-sign * amounts,
+        ),
+    ]
+
+
+def post_transactions(transactions):
+    return LedgerEntry.objects.bulk_create(
+        [
+            entry
+            for record in transactions
+            for entry in ledger_entries(record.id, record.deposit_id, record.type_id, record.amounts)
+        ]
+    )
+
+
+def latest_snapshots(deposit_ids, at=None):
+    candidates = BalanceSnapshot.objects.filter(deposit_id=OuterRef("deposit_id"))
+
+    if at:
+        candidates = candidates.filter(taken_time__lte=at)
+
+    snapshots = BalanceSnapshot.objects.filter(
+        deposit_id__in=deposit_ids,
+        id=Subquery(candidates.order_by("-last_entry_id").values("id")[:1]),
+    )
+
+    return {
+        deposit_id: (last_entry_id, balance)
+        for deposit_id, last_entry_id, balance in snapshots.values_list(
+            "deposit_id", "last_entry_id", "balance"
+        )
+    }
+
+
+def ledger_balances(deposit_ids, at=None):
+    if not deposit_ids:
+        return {}
+
+    snapshots = latest_snapshots(deposit_ids, at)
+    ranges    = {}
+
+    for deposit_id in deposit_ids:
+        ranges.setdefault(snapshots.get(deposit_id, (0, 0))[0], []).append(deposit_id)
+
+    q = Q()
+
+    for last_entry_id, ids in ranges.items():
+        q |= Q(deposit_id__in=ids, id__gt=last_entry_id)
+
+    entries = LedgerEntry.objects.filter(q, account=LedgerEntry.Account.DEPOSIT)
+
+    if at:
+        entries = entries.filter(created_time__lte=at)
+
+    deltas = dict(
+        entries.values("deposit_id")
+        .annotate(delta=Sum("amounts"))
+        .order_by()
+        .values_list("deposit_id", "delta")
+    )
+
+    return {
+        deposit_id: snapshots.get(deposit_id, (0, 0))[1] + deltas.get(deposit_id, 0)
+        for deposit_id in deposit_ids
+    }
+
+
+def balance_at(deposit_id, at=None):
+    return ledger_balances([deposit_id], at)[deposit_id]
+
+
+def take_balance_snapshots(batch_size=1000):
+    previous_cut = BalanceSnapshot.objects.aggregate(cut=Max("last_entry_id"))["cut"] or 0
+    cut          = LedgerEntry.objects.filter(
+        created_time__lte=timezone.now() - SNAPSHOT_LAG
+    ).aggregate(cut=Max("id"))["cut"] or 0
+    undrained    = LedgerEntry.objects.filter(
+        outbox_id__in=TransactionOutbox.objects.values("id")
+    ).aggregate(first=Min("id"))["first"]
+
+    if undrained:
+        cut = min(cut, undrained - 1)
+
+    if cut <= previous_cut:
+        return 0
+
+    deltas = dict(
+        LedgerEntry.objects.filter(
+            account=LedgerEntry.Account.DEPOSIT, id__gt=previous_cut, id__lte=cut
+        )
+        .values("deposit_id")
+        .annotate(delta=Sum("amounts"))
+        .order_by()
+        .values_list("deposit_id", "delta")
+    )
+    deposit_ids = sorted(deltas)
+    created     = 0
+
+    for start in range(0, len(deposit_ids), batch_size):
+        chunk     = deposit_ids[start : start + batch_size]
+        snapshots = latest_snapshots(chunk)
+
+        with transaction.atomic():
+            created += len(
+                BalanceSnapshot.objects.bulk_create(
+                    [
+                        BalanceSnapshot(
+                            deposit_id=deposit_id,
+                            last_entry_id=cut,
+                            balance=snapshots.get(deposit_id, (0, 0))[1] + deltas[deposit_id],
+                        )
+                        for deposit_id in chunk
+                    ]
+                )
+            )
+
+    return created
+
+
+def unbalanced_deposits(since_entry_id=0):
+    suspects = list(
+        LedgerEntry.objects.filter(id__gt=since_entry_id)
+        .values("deposit_id")
+        .annotate(total=Sum("amounts"))
+        .order_by()
+        .exclude(total=0)
+        .values_list("deposit_id", flat=True)
+    )
+
+    if not suspects:
+        return {}
+
+    return dict(
+        LedgerEntry.objects.filter(deposit_id__in=suspects)
+        .values("deposit_id")
+        .annotate(total=Sum("amounts"))
+        .order_by()
+        .exclude(total=0)
+        .values_list("deposit_id", "total")
+    )
+
+
+def reconcile_deposits(deposit_ids):
+    with transaction.atomic():
+        recorded = dict(Deposit.objects.filter(id__in=deposit_ids).values_list("id", "balance"))
+        computed = ledger_balances(list(recorded))
+
+    return {
+        deposit_id: (balance, computed[deposit_id])
+        for deposit_id, balance in recorded.items()
+        if balance != computed[deposit_id]
+    }
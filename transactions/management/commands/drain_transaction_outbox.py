@@ -0,0 +1,24 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from transactions.outbox import drain_transaction_outbox
+
+
+class Command(BaseCommand):
+    help = "Move write-behind Transaction rows from the outbox into the transactions table"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--interval", type=float, default=0)
+
+    def handle(self, *args, **options):
+        while True:
+            drained = drain_transaction_outbox(options["batch_size"])
+
+            self.stdout.write(self.style.SUCCESS(f"DRAINED {drained} TRANSACTIONS"))
+
+            if not options["interval"]:
+                return
+
+            time.sleep(options["interval"])
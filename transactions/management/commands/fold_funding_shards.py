@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from investments.models import Investment
+from transactions.funding import fold_funding_shards
+
+
+class Command(BaseCommand):
+    help = "Fold the sharded funding counters of every hot listing back into current_amount"
+
+    def handle(self, *args, **options):
+        folded = {
+            investment_id: fold_funding_shards(investment_id)
+            for investment_id in Investment.objects.filter(funding_shards__gt=0).values_list("id", flat=True)
+        }
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"FOLDED {sum(folded.values())} WON ACROSS {len(folded)} HOT LISTINGS"
+            )
+        )
@@ -0,0 +1,41 @@
+import datetime
+import time
+
+from django.core.management.base import BaseCommand
+
+from investments.models import Investment
+from transactions.schedules import generate_repayment_schedules
+
+
+class Command(BaseCommand):
+    help = "Generate repayment schedules for every portfolio of the given investments"
+
+    def add_arguments(self, parser):
+        parser.add_argument("investment_ids", nargs="*", type=int)
+        parser.add_argument("--start-date", type=datetime.date.fromisoformat)
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        investments = Investment.objects.select_related("detail").order_by("id")
+
+        if options["investment_ids"]:
+            investments = investments.filter(id__in=options["investment_ids"])
+
+        started_at = time.perf_counter()
+        generated  = 0
+        count      = 0
+
+        for investment in investments:
+            generated += generate_repayment_schedules(
+                investment, start_date=options["start_date"], batch_size=options["batch_size"]
+            )
+            count += 1
+
+        elapsed = time.perf_counter() - started_at
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"GENERATED {generated} REPAYMENTS FOR {count} INVESTMENTS "
+                f"IN {elapsed:.2f}s, {generated / elapsed if elapsed else generated:.0f} ROWS/SEC"
+            )
+        )
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from investments.models import Investment
+from transactions.funding import disable_hot_listing, enable_hot_listing
+
+
+class Command(BaseCommand):
+    help = "Spread the funding counter of a listing over N shard rows, or fold it back with --shards 0"
+
+    def add_arguments(self, parser):
+        parser.add_argument("investment_id", type=int)
+        parser.add_argument("--shards", type=int, default=16)
+
+    def handle(self, *args, **options):
+        if not Investment.objects.filter(id=options["investment_id"]).exists():
+            raise CommandError(f"INVESTMENT {options['investment_id']} DOES NOT EXIST")
+
+        if options["shards"] < 0:
+            raise CommandError("SHARDS MUST NOT BE NEGATIVE")
+
+        if not options["shards"]:
+            disable_hot_listing(options["investment_id"])
+            self.stdout.write(self.style.SUCCESS(f"INVESTMENT {options['investment_id']} FOLDED TO ONE ROW"))
+            return
+
+        enable_hot_listing(options["investment_id"], options["shards"])
+
+        self.stdout.write(
+            self.style.SUCCESS(f"INVESTMENT {options['investment_id']} SPREAD OVER {options['shards']} SHARDS")
+        )
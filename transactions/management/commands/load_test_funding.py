@@ -0,0 +1,137 @@
+import json
+import math
+import time
+
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import jwt
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.db.models import Sum
+from django.test import Client
+
+from my_settings import MY_SECRET_KEY
+from core.benchmark import seed_dataset
+from investments.models import Investment
+from transactions.funding import enable_hot_listing, fold_funding_shards
+from transactions.models import Portfolio, Transaction, TransactionType
+
+
+class Command(BaseCommand):
+    help = "Fire concurrent investments at one listing per funding mode and verify it is never over-funded"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=2000)
+        parser.add_argument("--concurrency", type=int, default=32)
+        parser.add_argument("--users", type=int, default=200)
+        parser.add_argument("--amounts", type=int, default=50000)
+        parser.add_argument("--oversubscription", type=float, default=2.0)
+        parser.add_argument("--shards", type=int, default=16)
+
+    def handle(self, *args, **options):
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        modes    = (("single-row", 1, 0), ("sharded", 2, options["shards"]))
+
+        try:
+            cache.clear()
+            seed_dataset(
+                users=options["users"],
+                investments=len(modes),
+                portfolios_per_user=0,
+                transactions_per_user=0,
+                repayments_per_user=0,
+            )
+
+            target_amount = math.ceil(options["requests"] * options["amounts"] / options["oversubscription"])
+            Investment.objects.update(target_amount=target_amount, current_amount=0)
+
+            results = [(mode, self.run(investment_id, shards, options)) for mode, investment_id, shards in modes]
+
+        finally:
+            cache.clear()
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        errors = []
+
+        for mode, result in results:
+            self.stdout.write(
+                f"{mode:<10} {result['throughput']:8.1f} investments/s  target={target_amount}  "
+                f"current={result['current_amount']}  accepted={result['accepted']}  "
+                f"statuses={dict(sorted(result['statuses'].items()))}"
+            )
+
+            unexpected = {status: count for status, count in result["statuses"].items() if status not in (201, 400)}
+
+            if unexpected:
+                errors.append(f"{mode} UNEXPECTED_STATUSES {dict(sorted(unexpected.items()))}")
+
+            if result["current_amount"] > target_amount:
+                errors.append(f"{mode} OVER_FUNDED BY {result['current_amount'] - target_amount}")
+
+            if options["oversubscription"] > 1 and result["current_amount"] < target_amount:
+                errors.append(f"{mode} UNDER_FUNDED BY {target_amount - result['current_amount']}")
+
+            if len({result["accepted"], result["transactions"], result["portfolios"], result["current_amount"]}) > 1:
+                errors.append(
+                    f"{mode} FUNDING_MISMATCH accepted={result['accepted']} "
+                    f"transactions={result['transactions']} portfolios={result['portfolios']}"
+                )
+
+        if errors:
+            raise CommandError("\n".join(errors))
+
+        self.stdout.write(self.style.SUCCESS("FUNDING CAP HELD"))
+
+    def run(self, investment_id, shards, options):
+        if shards:
+            enable_hot_listing(investment_id, shards)
+
+        started_at = time.perf_counter()
+
+        with ThreadPoolExecutor(max_workers=options["concurrency"]) as executor:
+            responses = list(executor.map(self.invest(investment_id, options), range(options["requests"])))
+
+        elapsed = time.perf_counter() - started_at
+
+        fold_funding_shards(investment_id)
+
+        return {
+            "throughput"     : options["requests"] / elapsed,
+            "statuses"       : Counter(status for status, _ in responses),
+            "accepted"       : sum(amounts for _, amounts in responses),
+            "current_amount" : Investment.objects.get(id=investment_id).current_amount,
+            "transactions"   : Transaction.objects.filter(
+                investment_id=investment_id, type_id=TransactionType.Type.INVESTMENT.value
+            ).aggregate(total=Sum("amounts"))["total"] or 0,
+            "portfolios"     : Portfolio.objects.filter(investment_id=investment_id).aggregate(
+                total=Sum("amounts")
+            )["total"] or 0,
+        }
+
+    def invest(self, investment_id, options):
+        def post(index):
+            user_id = index % options["users"] + 1
+            header  = {
+                "HTTP_Authorization": jwt.encode({"id": user_id}, MY_SECRET_KEY, algorithm="HS256")
+            }
+
+            try:
+                response = Client(raise_request_exception=False).post(
+                    f"/transactions/invest/{investment_id}",
+                    json.dumps({"amounts": options["amounts"]}),
+                    content_type="application/json",
+                    **header,
+                )
+
+            finally:
+                connections.close_all()
+
+            if response.status_code != 201:
+                return response.status_code, 0
+
+            return response.status_code, response.json()["amounts"]
+
+        return post
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from transactions.idempotency import prune_idempotency_keys
+
+
+class Command(BaseCommand):
+    help = "Delete stored idempotency-key responses whose TTL has passed"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        pruned = prune_idempotency_keys(options["batch_size"])
+
+        self.stdout.write(self.style.SUCCESS(f"PRUNED {pruned} IDEMPOTENCY KEYS"))
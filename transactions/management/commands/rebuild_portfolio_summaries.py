@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from transactions.portfolio import rebuild_portfolio_summaries
+
+
+class Command(BaseCommand):
+    help = "Rebuild every PortfolioSummary row from portfolios and repayments"
+
+    def handle(self, *args, **options):
+        count = rebuild_portfolio_summaries()
+
+        self.stdout.write(self.style.SUCCESS(f"REBUILT {count} PORTFOLIO SUMMARIES"))
@@ -0,0 +1,63 @@
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Max
+
+from transactions.ledger import reconcile_deposits, unbalanced_deposits
+from transactions.models import BalanceSnapshot, Deposit
+
+
+class Command(BaseCommand):
+    help = "Verify every Deposit.balance against its ledger balance (snapshot + entries since)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=1000)
+        parser.add_argument("--workers", type=int, default=4)
+
+    def handle(self, *args, **options):
+        started_at  = time.perf_counter()
+        deposit_ids = list(Deposit.objects.order_by("id").values_list("id", flat=True))
+        chunk_size  = options["chunk_size"]
+        chunks      = [
+            deposit_ids[start : start + chunk_size] for start in range(0, len(deposit_ids), chunk_size)
+        ]
+
+        if options["workers"] > 1:
+            with ThreadPoolExecutor(max_workers=options["workers"]) as executor:
+                results = list(executor.map(self.reconcile_chunk, chunks))
+        else:
+            results = [reconcile_deposits(chunk) for chunk in chunks]
+
+        mismatches = {
+            deposit_id: balances for result in results for deposit_id, balances in result.items()
+        }
+        cut        = BalanceSnapshot.objects.aggregate(cut=Max("last_entry_id"))["cut"] or 0
+        unbalanced = unbalanced_deposits(cut)
+
+        for deposit_id, (recorded, computed) in sorted(mismatches.items()):
+            self.stderr.write(f"deposit {deposit_id}: balance {recorded} != ledger {computed}")
+
+        for deposit_id, total in sorted(unbalanced.items()):
+            self.stderr.write(f"deposit {deposit_id}: ledger entries sum to {total}, expected 0")
+
+        if mismatches or unbalanced:
+            raise CommandError(
+                f"{len(set(mismatches) | set(unbalanced))} OF {len(deposit_ids)} DEPOSITS DO NOT RECONCILE"
+            )
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"RECONCILED {len(deposit_ids)} DEPOSITS IN {len(chunks)} CHUNKS "
+                f"IN {time.perf_counter() - started_at:.2f}s"
+            )
+        )
+
+    def reconcile_chunk(self, deposit_ids):
+        try:
+            return reconcile_deposits(deposit_ids)
+
+        finally:
+            connection.close()
@@ -0,0 +1,25 @@
+import datetime
+
+from django.core.management.base import BaseCommand
+
+from transactions.scanner import scan_portfolio_states
+
+
+class Command(BaseCommand):
+    help = "Advance portfolio repayment and investment states for repayments that are past due (run daily)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--today", type=datetime.date.fromisoformat)
+
+    def handle(self, *args, **options):
+        counts = scan_portfolio_states(options["today"])
+
+        if not counts:
+            self.stdout.write("ALREADY SCANNED")
+            return
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                ", ".join(f"{name.upper()} {count}" for name, count in counts.items())
+            )
+        )
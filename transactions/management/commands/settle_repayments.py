@@ -0,0 +1,54 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from investments.models import Investment
+from transactions.models import Repayment
+from transactions.settlement import settle_investment
+
+
+class Command(BaseCommand):
+    help = "Credit one repayment instalment of an investment to every holder, resuming from the last checkpoint"
+
+    def add_arguments(self, parser):
+        parser.add_argument("investment_id", type=int)
+        parser.add_argument("repayment_count", type=int)
+        parser.add_argument("--chunk-size", type=int, default=1000)
+        parser.add_argument("--max-chunks", type=int)
+
+    def handle(self, *args, **options):
+        investment = Investment.objects.filter(id=options["investment_id"]).first()
+
+        if not investment:
+            raise CommandError(f"INVESTMENT {options['investment_id']} DOES NOT EXIST")
+
+        settlement = settle_investment(
+            investment,
+            options["repayment_count"],
+            chunk_size=options["chunk_size"],
+            max_chunks=options["max_chunks"],
+        )
+
+        for timing in settlement.chunk_timings:
+            self.stdout.write(
+                f"chunk {timing['chunk']:>4}  rows={timing['rows']}  "
+                f"amounts={timing['amounts']}  {timing['duration_ms']:.1f}ms"
+            )
+
+        unsettled = Repayment.objects.filter(
+            portfolio__investment=investment,
+            repayment_count=options["repayment_count"],
+            transaction__isnull=True,
+        ).count()
+
+        if settlement.skipped_user_ids:
+            self.stdout.write(
+                self.style.WARNING(
+                    f"SKIPPED USERS WITHOUT DEPOSIT: {', '.join(map(str, settlement.skipped_user_ids))}"
+                )
+            )
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"SETTLED {settlement.settled_count} REPAYMENTS ({settlement.settled_amounts} WON), "
+                f"{unsettled} UNSETTLED, {'COMPLETE' if settlement.completed_time else 'IN PROGRESS'}"
+            )
+        )
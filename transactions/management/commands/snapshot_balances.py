@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from transactions.ledger import take_balance_snapshots
+
+
+class Command(BaseCommand):
+    help = "Snapshot the ledger balance of every deposit that moved since the previous snapshot"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        created = take_balance_snapshots(options["batch_size"])
+
+        self.stdout.write(self.style.SUCCESS(f"CREATED {created} BALANCE SNAPSHOTS"))
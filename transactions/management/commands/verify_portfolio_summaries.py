@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+
+from transactions.portfolio import diff_portfolio_summary
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = "Compare stored PortfolioSummary rows against live portfolio aggregates"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", type=int, action="append", dest="user_ids")
+
+    def handle(self, *args, **options):
+        user_ids = options["user_ids"] or (
+            User.objects.filter(
+                Q(portfolio__isnull=False) | Q(portfoliosummary__isnull=False)
+            )
+            .values_list("id", flat=True)
+            .distinct()
+            .order_by("id")
+        )
+        mismatches = 0
+
+        for user_id in user_ids:
+            diff = diff_portfolio_summary(user_id)
+
+            if not diff:
+                continue
+
+            mismatches += 1
+
+            for key, (stored, live) in diff.items():
+                self.stdout.write(f"user={user_id} {key}: stored={stored} live={live}")
+
+        if mismatches:
+            raise CommandError(f"{mismatches} PORTFOLIO SUMMARIES OUT OF SYNC")
+
+        self.stdout.write(self.style.SUCCESS("PORTFOLIO SUMMARIES IN SYNC"))
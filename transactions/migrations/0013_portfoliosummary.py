@@ -0,0 +1,29 @@
+# Generated by Django 3.2.7 on 2026-10-18 15:12
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0005_auto_20210929_0636'),
+        ('transactions', '0012_alter_portfolio_amounts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PortfolioSummary',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, serialize=False, to='users.user')),
+                ('total', models.PositiveBigIntegerField(default=0)),
+                ('portfolio_count', models.PositiveIntegerField(default=0)),
+                ('return_rate_sum', models.FloatField(default=0)),
+                ('cumulative_profit', models.PositiveBigIntegerField(default=0)),
+                ('buckets', models.JSONField(default=dict)),
+            ],
+            options={
+                'db_table': 'portfolio_summaries',
+            },
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 3.2.7 on 2026-10-18 15:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0013_portfoliosummary'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['user', 'type', 'created_time'], name='transaction_user_id_601149_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['user', 'created_time'], name='transaction_user_id_7054cb_idx'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 3.2.7 on 2026-10-18 15:29
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0014_transaction_history_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='repayment',
+            name='due_date',
+            field=models.DateField(null=True),
+        ),
+        migrations.AddField(
+            model_name='repayment',
+            name='portfolio',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, to='transactions.portfolio'),
+        ),
+        migrations.AlterField(
+            model_name='repayment',
+            name='transaction',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, to='transactions.transaction'),
+        ),
+        migrations.AddConstraint(
+            model_name='repayment',
+            constraint=models.UniqueConstraint(fields=('portfolio', 'repayment_count'), name='unique_portfolio_repayment_count'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 3.2.7 on 2026-10-18 15:31
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('investments', '0007_investment_documents'),
+        ('transactions', '0015_repayment_schedules'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Settlement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_time', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('repayment_count', models.PositiveSmallIntegerField()),
+                ('last_repayment_id', models.PositiveBigIntegerField(default=0)),
+                ('settled_count', models.PositiveIntegerField(default=0)),
+                ('settled_amounts', models.PositiveBigIntegerField(default=0)),
+                ('chunk_timings', models.JSONField(default=list)),
+                ('completed_time', models.DateTimeField(null=True)),
+                ('investment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='investments.investment')),
+            ],
+            options={
+                'db_table': 'settlements',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='settlement',
+            constraint=models.UniqueConstraint(fields=('investment', 'repayment_count'), name='unique_investment_settlement'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 3.2.7 on 2026-10-18 15:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0016_settlements'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StateScan',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_time', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('name', models.CharField(max_length=32, unique=True)),
+                ('scanned_through', models.DateField(null=True)),
+                ('transitions', models.JSONField(default=dict)),
+            ],
+            options={
+                'db_table': 'state_scans',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='portfolio',
+            index=models.Index(fields=['investment', 'repayment_state'], name='portfolios_investm_26f015_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='repayment',
+            index=models.Index(fields=['due_date', 'transaction'], name='repayments_due_dat_422e69_idx'),
+        ),
+    ]
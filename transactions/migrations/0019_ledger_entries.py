@@ -0,0 +1,63 @@
+# Generated by Django 3.2.7 on 2026-10-18 15:36
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def open_balances(apps, schema_editor):
+    Deposit     = apps.get_model("transactions", "Deposit")
+    LedgerEntry = apps.get_model("transactions", "LedgerEntry")
+
+    entries = []
+
+    for deposit_id, balance in Deposit.objects.filter(balance__gt=0).values_list("id", "balance").iterator():
+        entries.append(LedgerEntry(deposit_id=deposit_id, account="deposit", amounts=balance))
+        entries.append(LedgerEntry(deposit_id=deposit_id, account="opening", amounts=-balance))
+
+    LedgerEntry.objects.bulk_create(entries, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0018_idempotency_keys'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LedgerEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('account', models.CharField(choices=[('deposit', 'Deposit'), ('bank', 'Bank'), ('investment', 'Investment'), ('repayment', 'Repayment'), ('opening', 'Opening')], max_length=16)),
+                ('amounts', models.BigIntegerField()),
+                ('created_time', models.DateTimeField(auto_now_add=True)),
+                ('deposit', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, to='transactions.deposit')),
+                ('transaction', models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, to='transactions.transaction')),
+            ],
+            options={
+                'db_table': 'ledger_entries',
+            },
+        ),
+        migrations.CreateModel(
+            name='BalanceSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_entry_id', models.PositiveBigIntegerField()),
+                ('balance', models.BigIntegerField()),
+                ('taken_time', models.DateTimeField(auto_now_add=True)),
+                ('deposit', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='transactions.deposit')),
+            ],
+            options={
+                'db_table': 'balance_snapshots',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='ledgerentry',
+            index=models.Index(fields=['deposit', 'account', 'id'], name='ledger_entr_deposit_458057_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='balancesnapshot',
+            constraint=models.UniqueConstraint(fields=('deposit', 'last_entry_id'), name='unique_deposit_snapshot'),
+        ),
+        migrations.RunPython(open_balances, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 3.2.7 on 2026-10-18 15:45
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('investments', '0010_funding_shards'),
+        ('users', '0005_auto_20210929_0636'),
+        ('transactions', '0019_ledger_entries'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TransactionOutbox',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('information', models.CharField(max_length=64)),
+                ('amounts', models.PositiveIntegerField()),
+                ('created_time', models.DateTimeField(auto_now_add=True)),
+                ('deposit', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, to='transactions.deposit')),
+                ('investment', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, to='investments.investment')),
+                ('type', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, to='transactions.transactiontype')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='users.user')),
+            ],
+            options={
+                'db_table': 'transaction_outbox',
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.2.7 on 2026-10-18 16:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0020_transaction_outbox'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='settlement',
+            name='skipped_user_ids',
+            field=models.JSONField(default=list),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 3.2.7 on 2026-10-18 16:10
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0021_settlement_skipped_users'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ledgerentry',
+            name='outbox_id',
+            field=models.PositiveBigIntegerField(db_index=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='transaction',
+            name='created_time',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
@@ -1,5 +1,6 @@
 from investments.models import Investment
 from django.db import models
+from django.utils import timezone
 
 from core.models import TimeStamp
 
@@ -39,30 +40,58 @@ class TransactionType(models.Model):
 
 
 class Transaction(TimeStamp):
-    type        = models.ForeignKey(TransactionType, null=True, on_delete=models.SET_NULL)
-    information = models.CharField(max_length=64)
-    amounts     = models.PositiveIntegerField()
-    deposit     = models.ForeignKey(Deposit, on_delete=models.PROTECT)
-    user        = models.ForeignKey("users.User", on_delete=models.CASCADE)
-    investment  = models.ForeignKey(
+    type         = models.ForeignKey(TransactionType, null=True, on_delete=models.SET_NULL)
+    information  = models.CharField(max_length=64)
+    amounts      = models.PositiveIntegerField()
+    deposit      = models.ForeignKey(Deposit, on_delete=models.PROTECT)
+    user         = models.ForeignKey("users.User", on_delete=models.CASCADE)
+    investment   = models.ForeignKey(
         "investments.Investment", null=True, on_delete=models.SET_NULL
     )
+    created_time = models.DateTimeField(default=timezone.now)
 
     class Meta:
         db_table = "transactions"
+        indexes  = [
+            models.Index(fields=["user", "type", "created_time"]),
+            models.Index(fields=["user", "created_time"]),
+        ]
+
+
+class TransactionOutbox(models.Model):
+    type         = models.ForeignKey(TransactionType, null=True, on_delete=models.SET_NULL)
+    information  = models.CharField(max_length=64)
+    amounts      = models.PositiveIntegerField()
+    deposit      = models.ForeignKey(Deposit, on_delete=models.PROTECT)
+    user         = models.ForeignKey("users.User", on_delete=models.CASCADE)
+    investment   = models.ForeignKey(
+        "investments.Investment", null=True, on_delete=models.SET_NULL
+    )
+    created_time = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = "transaction_outbox"
 
 
 class Repayment(models.Model):
-    transaction     = models.ForeignKey(Transaction, on_delete=models.PROTECT)
+    transaction     = models.ForeignKey(Transaction, null=True, on_delete=models.PROTECT)
     repayment_count = models.PositiveSmallIntegerField()
     principal       = models.PositiveIntegerField()
     interest        = models.PositiveIntegerField()
     tax             = models.PositiveIntegerField()
     charge          = models.PositiveIntegerField()
     user            = models.ForeignKey("users.User", null=True, on_delete=models.CASCADE)
+    portfolio       = models.ForeignKey("Portfolio", null=True, on_delete=models.CASCADE)
+    due_date        = models.DateField(null=True)
 
     class Meta:
-        db_table = "repayments"
+        db_table    = "repayments"
+        constraints = [
+            models.UniqueConstraint(fields=["portfolio", "repayment_count"], name="unique_portfolio_repayment_count"),
+        ]
+        indexes     = [
+            models.Index(fields=["due_date", "transaction"]),
+        ]
 
 class InvestmentState(models.Model):
     class State(models.IntegerChoices):
@@ -97,3 +126,104 @@ class Portfolio(models.Model):
 
     class Meta:
         db_table = "portfolios"
+        indexes  = [
+            models.Index(fields=["investment", "repayment_state"]),
+        ]
+
+
+class PortfolioSummary(models.Model):
+    user              = models.OneToOneField("users.User", primary_key=True, on_delete=models.CASCADE)
+    total             = models.PositiveBigIntegerField(default=0)
+    portfolio_count   = models.PositiveIntegerField(default=0)
+    return_rate_sum   = models.FloatField(default=0)
+    cumulative_profit = models.PositiveBigIntegerField(default=0)
+    buckets           = models.JSONField(default=dict)
+
+    class Meta:
+        db_table = "portfolio_summaries"
+
+
+class Settlement(TimeStamp):
+    investment        = models.ForeignKey("investments.Investment", on_delete=models.CASCADE)
+    repayment_count   = models.PositiveSmallIntegerField()
+    last_repayment_id = models.PositiveBigIntegerField(default=0)
+    settled_count     = models.PositiveIntegerField(default=0)
+    settled_amounts   = models.PositiveBigIntegerField(default=0)
+    chunk_timings     = models.JSONField(default=list)
+    skipped_user_ids  = models.JSONField(default=list)
+    completed_time    = models.DateTimeField(null=True)
+
+    class Meta:
+        db_table    = "settlements"
+        constraints = [
+            models.UniqueConstraint(fields=["investment", "repayment_count"], name="unique_investment_settlement"),
+        ]
+
+
+class StateScan(TimeStamp):
+    name            = models.CharField(max_length=32, unique=True)
+    scanned_through = models.DateField(null=True)
+    transitions     = models.JSONField(default=dict)
+
+    class Meta:
+        db_table = "state_scans"
+
+
+class IdempotencyKey(models.Model):
+    user          = models.ForeignKey("users.User", on_delete=models.CASCADE)
+    key           = models.CharField(max_length=64)
+    request_hash  = models.CharField(max_length=64)
+    status_code   = models.PositiveSmallIntegerField()
+    response_body = models.TextField()
+    created_time  = models.DateTimeField(auto_now_add=True)
+    expires_time  = models.DateTimeField(db_index=True)
+
+    class Meta:
+        db_table    = "idempotency_keys"
+        constraints = [
+            models.UniqueConstraint(fields=["user", "key"], name="unique_user_idempotency_key"),
+        ]
+
+
+class LedgerEntry(models.Model):
+    class Account(models.TextChoices):
+        DEPOSIT    = "deposit"
+        BANK       = "bank"
+        INVESTMENT = "investment"
+        REPAYMENT  = "repayment"
+        OPENING    = "opening"
+
+    deposit      = models.ForeignKey(Deposit, on_delete=models.PROTECT)
+    transaction  = models.ForeignKey(Transaction, null=True, on_delete=models.PROTECT)
+    outbox_id    = models.PositiveBigIntegerField(null=True, db_index=True)
+    account      = models.CharField(max_length=16, choices=Account.choices)
+    amounts      = models.BigIntegerField()
+    created_time = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = "ledger_entries"
+        indexes  = [
+            models.Index(fields=["deposit", "account", "id"]),
+        ]
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError("LEDGER_ENTRIES_ARE_APPEND_ONLY")
+
+        super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        raise ValueError("LEDGER_ENTRIES_ARE_APPEND_ONLY")
+
+
+class BalanceSnapshot(models.Model):
+    deposit       = models.ForeignKey(Deposit, on_delete=models.CASCADE)
+    last_entry_id = models.PositiveBigIntegerField()
+    balance       = models.BigIntegerField()
+    taken_time    = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table    = "balance_snapshots"
+        constraints = [
+            models.UniqueConstraint(fields=["deposit", "last_entry_id"], name="unique_deposit_snapshot"),
+        ]
@@ -0,0 +1,91 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models import BigIntegerField, Case, Value, When
+
+from transactions.ledger import ledger_entries, post_transactions
+from transactions.models import LedgerEntry, Transaction, TransactionOutbox
+
+OUTBOX_FIELDS = ("type_id", "information", "amounts", "deposit_id", "user_id", "investment_id")
+
+LINK_FIELDS = ("deposit_id", "user_id", "type_id", "amounts", "created_time")
+
+
+def record_transaction(type_id, information, amounts, deposit_id, user_id, investment_id=None):
+    fields = {
+        "type_id"       : type_id,
+        "information"   : information,
+        "amounts"       : amounts,
+        "deposit_id"    : deposit_id,
+        "user_id"       : user_id,
+        "investment_id" : investment_id,
+    }
+
+    if not settings.TRANSACTION_WRITE_BEHIND:
+        record = Transaction.objects.create(**fields)
+        post_transactions([record])
+        return record
+
+    outbox  = TransactionOutbox.objects.create(**fields)
+    entries = ledger_entries(None, deposit_id, type_id, amounts)
+
+    for entry in entries:
+        entry.outbox_id = outbox.id
+
+    LedgerEntry.objects.bulk_create(entries)
+
+
+def _link_ledger_entries(rows):
+    outbox_ids      = {}
+    transaction_ids = {}
+
+    for row in rows:
+        outbox_ids.setdefault(tuple(row[field] for field in LINK_FIELDS), []).append(row["id"])
+
+    records = (
+        Transaction.objects.filter(
+            deposit_id__in={row["deposit_id"] for row in rows},
+            created_time__in={row["created_time"] for row in rows},
+            ledgerentry__isnull=True,
+        )
+        .order_by("id")
+        .values("id", *LINK_FIELDS)
+    )
+
+    for record in records:
+        pending = outbox_ids.get(tuple(record[field] for field in LINK_FIELDS))
+
+        if pending:
+            transaction_ids[pending.pop(0)] = record["id"]
+
+    LedgerEntry.objects.filter(outbox_id__in=transaction_ids).update(
+        transaction_id=Case(
+            *[When(outbox_id=outbox_id, then=Value(pk)) for outbox_id, pk in transaction_ids.items()],
+            output_field=BigIntegerField(),
+        )
+    )
+
+
+def drain_transaction_outbox(batch_size=1000):
+    drained = 0
+
+    while True:
+        with transaction.atomic():
+            rows = list(
+                TransactionOutbox.objects.select_for_update(skip_locked=True)
+                .order_by("id")
+                .values("id", "created_time", *OUTBOX_FIELDS)[:batch_size]
+            )
+
+            if not rows:
+                return drained
+
+            Transaction.objects.bulk_create(
+                [
+                    Transaction(created_time=row["created_time"], **{field: row[field] for field in OUTBOX_FIELDS})
+                    for row in rows
+                ]
+            )
+            _link_ledger_entries(rows)
+            TransactionOutbox.objects.filter(id__in=[row["id"] for row in rows]).delete()
+
+        drained += len(rows)
@@ -0,0 +1,291 @@
+from collections import namedtuple
+
+from django.db import transaction
+from django.db.models import Sum, Avg, Count, Q
+
+from core.registry import registry
+from transactions.models import (
+    Portfolio,
+    PortfolioSummary,
+    Repayment,
+    InvestmentState,
+    RepaymentState,
+)
+
+GROSS_INVESTMENT_LIMIT       = 30000000
+REAL_ESTATE_INVESTMENT_LIMIT = 10000000
+
+Bucket = namedtuple("Bucket", ["id", "name", "condition"])
+
+INVESTMENT_STATE_BUCKETS = (
+    Bucket(1, "investing_amount", Q(investment_state_id=InvestmentState.State.INVESTING.value)),
+    Bucket(2, "invest_completed_amount", Q(investment_state_id=InvestmentState.State.COMPLETE.value)),
+    Bucket(3, "loss_amount", Q(investment_state_id=InvestmentState.State.LOSS.value)),
+)
+
+REPAYMENT_STATE_BUCKETS = tuple(
+    Bucket(
+        index,
+        f"investing_{state.name.lower()}_amount",
+        Q(
+            investment_state_id=InvestmentState.State.INVESTING.value,
+            repayment_state_id=state.value,
+        ),
+    )
+    for index, state in enumerate(RepaymentState.State, start=1)
+)
+
+GRADES = ("A", "B", "C", "D")
+
+GRADE_BUCKETS = tuple(
+    Bucket(index, grade, Q(investment__grade__name__contains=grade))
+    for index, grade in enumerate(GRADES, start=1)
+)
+
+RETURN_RATE_BANDS = (8, 10, 12)
+
+
+def _return_rate_buckets(bands):
+    buckets = [Bucket(1, f"{bands[0]}_under", Q(investment__return_rate__lt=bands[0]))]
+
+    for lower, upper in zip(bands, bands[1:] + (None,)):
+        condition = Q(investment__return_rate__gte=lower)
+
+        if upper is not None:
+            condition &= Q(investment__return_rate__lt=upper)
+
+        buckets.append(Bucket(len(buckets) + 1, f"{lower}_over_or_equal", condition))
+
+    return tuple(buckets)
+
+
+RETURN_RATE_BUCKETS = _return_rate_buckets(RETURN_RATE_BANDS)
+
+BUCKET_GROUPS = {
+    "investment_state" : INVESTMENT_STATE_BUCKETS,
+    "repayment_state"  : REPAYMENT_STATE_BUCKETS,
+    "grade"            : GRADE_BUCKETS,
+    "return_rate"      : RETURN_RATE_BUCKETS,
+}
+
+
+def bucket_key(group, bucket):
+    return f"{group}__{bucket.name}"
+
+
+def bucket_keys():
+    return [
+        bucket_key(group, bucket)
+        for group, buckets in BUCKET_GROUPS.items()
+        for bucket in buckets
+    ]
+
+
+def _portfolio_aggregates():
+    aggregates = {
+        "total"           : Sum("amounts"),
+        "rate_of_return"  : Avg("investment__return_rate"),
+        "portfolio_count" : Count("id"),
+        "return_rate_sum" : Sum("investment__return_rate"),
+    }
+
+    for group, buckets in BUCKET_GROUPS.items():
+        for bucket in buckets:
+            aggregates[bucket_key(group, bucket)] = Sum("amounts", filter=bucket.condition)
+
+    return aggregates
+
+
+def aggregate_portfolio(user):
+    totals = Portfolio.objects.filter(user=user).aggregate(**_portfolio_aggregates())
+    totals.update(
+        Repayment.objects.filter(user=user, transaction__isnull=False).aggregate(
+            cumulative_profit=Sum("interest")
+        )
+    )
+
+    return {key: value or 0 for key, value in totals.items()}
+
+
+def aggregate_portfolios_by_user(user_ids=None):
+    portfolios = Portfolio.objects.all()
+    repayments = Repayment.objects.filter(user__isnull=False, transaction__isnull=False)
+
+    if user_ids is not None:
+        portfolios = portfolios.filter(user_id__in=user_ids)
+        repayments = repayments.filter(user_id__in=user_ids)
+
+    totals = {
+        row.pop("user_id"): {key: value or 0 for key, value in row.items()}
+        for row in portfolios.values("user_id").annotate(**_portfolio_aggregates()).order_by()
+    }
+    profits = repayments.values("user_id").annotate(cumulative_profit=Sum("interest")).order_by()
+
+    for row in profits:
+        user_totals = totals.setdefault(
+            row["user_id"], {key: 0 for key in _portfolio_aggregates()}
+        )
+        user_totals["cumulative_profit"] = row["cumulative_profit"] or 0
+
+    for user_totals in totals.values():
+        user_totals.setdefault("cumulative_profit", 0)
+
+    return totals
+
+
+def _fill_summary(summary, totals):
+    summary.total             = totals["total"]
+    summary.portfolio_count   = totals["portfolio_count"]
+    summary.return_rate_sum   = totals["return_rate_sum"]
+    summary.cumulative_profit = totals["cumulative_profit"]
+    summary.buckets           = {key: totals[key] for key in bucket_keys() if totals[key]}
+
+    return summary
+
+
+def summary_totals(summary):
+    totals = {key: summary.buckets.get(key, 0) for key in bucket_keys()}
+    totals.update(
+        {
+            "total"             : summary.total,
+            "rate_of_return"    : summary.return_rate_sum / summary.portfolio_count
+            if summary.portfolio_count
+            else 0,
+            "portfolio_count"   : summary.portfolio_count,
+            "return_rate_sum"   : summary.return_rate_sum,
+            "cumulative_profit" : summary.cumulative_profit,
+        }
+    )
+
+    return totals
+
+
+def rebuild_portfolio_summary(user_id):
+    totals  = aggregate_portfolio(user_id)
+    summary = _fill_summary(PortfolioSummary(user_id=user_id), totals)
+    summary.save()
+
+    return summary_totals(summary)
+
+
+def rebuild_portfolio_summaries(user_ids=None):
+    summaries = [
+        _fill_summary(PortfolioSummary(user_id=user_id), totals)
+        for user_id, totals in aggregate_portfolios_by_user(user_ids).items()
+    ]
+    stale = PortfolioSummary.objects.all()
+
+    if user_ids is not None:
+        stale = stale.filter(user_id__in=user_ids)
+
+    with transaction.atomic():
+        stale.delete()
+        PortfolioSummary.objects.bulk_create(summaries, batch_size=1000)
+
+    return len(summaries)
+
+
+def load_portfolio_totals(user):
+    try:
+        return summary_totals(PortfolioSummary.objects.get(user_id=user.id))
+
+    except PortfolioSummary.DoesNotExist:
+        return rebuild_portfolio_summary(user.id)
+
+
+def diff_portfolio_summary(user_id):
+    live = aggregate_portfolio(user_id)
+
+    try:
+        stored = summary_totals(PortfolioSummary.objects.get(user_id=user_id))
+
+    except PortfolioSummary.DoesNotExist:
+        stored = {key: 0 for key in live}
+
+    return {
+        key: (stored[key], live[key])
+        for key in live
+        if round(stored[key], 6) != round(live[key], 6)
+    }
+
+
+def _matching_bucket_keys(portfolio_id):
+    counts = Portfolio.objects.filter(id=portfolio_id).aggregate(
+        **{
+            bucket_key(group, bucket): Count("id", filter=bucket.condition)
+            for group, buckets in BUCKET_GROUPS.items()
+            for bucket in buckets
+        }
+    )
+
+    return [key for key, count in counts.items() if count]
+
+
+def _locked_summary(user_id):
+    summary, created = PortfolioSummary.objects.select_for_update().get_or_create(
+        user_id=user_id
+    )
+
+    if created:
+        _fill_summary(summary, aggregate_portfolio(user_id)).save()
+
+    return summary, created
+
+
+def _add_to_buckets(summary, keys, amounts):
+    for key in keys:
+        summary.buckets[key] = summary.buckets.get(key, 0) + amounts
+
+
+def apply_portfolio_investment(portfolio, amounts, created=False):
+    summary, rebuilt = _locked_summary(portfolio.user_id)
+
+    if rebuilt:
+        return summary
+
+    _add_to_buckets(summary, _matching_bucket_keys(portfolio.id), amounts)
+    summary.total += amounts
+
+    if created:
+        summary.portfolio_count += 1
+        summary.return_rate_sum += portfolio.investment.return_rate
+
+    summary.save()
+
+    return summary
+
+
+def _bucket_list(totals, group):
+    return [
+        {
+            "id"    : bucket.id,
+            "name"  : bucket.name,
+            "price" : totals.get(bucket_key(group, bucket), 0),
+        }
+        for bucket in BUCKET_GROUPS[group]
+    ]
+
+
+def build_portfolio_results(deposit, totals):
+    return {
+        "deposit_information": {
+            "withdrawal_account"           : f"{registry.bank_name(deposit.withdrawal_bank_id)}{deposit.withdrawal_account}",
+            "deposit_account"              : f"{registry.bank_name(deposit.deposit_bank_id)}{deposit.deposit_account}",
+            "deposit_balance"              : deposit.balance,
+            "gross_investment_limit"       : GROSS_INVESTMENT_LIMIT - totals["total"],
+            "real_estate_investment_limit" : REAL_ESTATE_INVESTMENT_LIMIT - totals["total"],
+        },
+        "investment_general_infomation": {
+            "rate_of_return"    : totals["rate_of_return"],
+            "assets"            : totals["total"] + deposit.balance,
+            "cumulative_profit" : totals["cumulative_profit"],
+        },
+        "investment_current_condition": {
+            "all"       : _bucket_list(totals, "investment_state"),
+            "investing" : _bucket_list(totals, "repayment_state"),
+        },
+        "portfolio_current_condition": {
+            "grade"       : _bucket_list(totals, "grade"),
+            "return_rate" : _bucket_list(totals, "return_rate"),
+        },
+    }
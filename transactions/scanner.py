@@ -0,0 +1,94 @@
+import datetime
+
+from collections import namedtuple
+
+from django.db import transaction
+from django.utils import timezone
+
+from transactions.models import InvestmentState, Portfolio, Repayment, RepaymentState, StateScan
+from transactions.portfolio import rebuild_portfolio_summaries
+
+SCAN_NAME          = "portfolio_states"
+SUMMARY_BATCH_SIZE = 1000
+
+Transition = namedtuple("Transition", ["name", "after_days", "field", "from_states", "to_state"])
+
+TRANSITIONS = (
+    Transition(
+        "delay",
+        1,
+        "repayment_state_id",
+        (RepaymentState.State.NORMAL.value,),
+        RepaymentState.State.DELAY.value,
+    ),
+    Transition(
+        "overdue",
+        30,
+        "repayment_state_id",
+        (RepaymentState.State.NORMAL.value, RepaymentState.State.DELAY.value),
+        RepaymentState.State.OVERDUE.value,
+    ),
+    Transition(
+        "loss",
+        90,
+        "investment_state_id",
+        (InvestmentState.State.INVESTING.value,),
+        InvestmentState.State.LOSS.value,
+    ),
+)
+
+
+def late_investment_ids(scanned_through, today, after_days):
+    due_dates = {"due_date__lte": today - datetime.timedelta(days=after_days)}
+
+    if scanned_through:
+        due_dates["due_date__gt"] = scanned_through - datetime.timedelta(days=after_days)
+
+    return set(
+        Repayment.objects.filter(transaction__isnull=True, portfolio__isnull=False, **due_dates)
+        .values_list("portfolio__investment_id", flat=True)
+        .distinct()
+    )
+
+
+def apply_transition(transition, investment_ids):
+    portfolios = Portfolio.objects.filter(
+        investment_id__in=investment_ids,
+        investment_state_id=InvestmentState.State.INVESTING.value,
+        **{f"{transition.field}__in": transition.from_states},
+    )
+    user_ids = set(portfolios.values_list("user_id", flat=True).distinct())
+    updated  = portfolios.update(**{transition.field: transition.to_state})
+
+    return updated, user_ids
+
+
+def scan_portfolio_states(today=None):
+    today = today or timezone.localdate()
+
+    with transaction.atomic():
+        scan, _ = StateScan.objects.select_for_update().get_or_create(name=SCAN_NAME)
+
+        if scan.scanned_through and scan.scanned_through >= today:
+            return {}
+
+        counts   = {}
+        user_ids = set()
+
+        for transition in TRANSITIONS:
+            investment_ids = late_investment_ids(scan.scanned_through, today, transition.after_days)
+            counts[transition.name], users = (
+                apply_transition(transition, investment_ids) if investment_ids else (0, set())
+            )
+            user_ids |= users
+
+        user_ids = sorted(user_ids)
+
+        for start in range(0, len(user_ids), SUMMARY_BATCH_SIZE):
+            rebuild_portfolio_summaries(user_ids[start : start + SUMMARY_BATCH_SIZE])
+
+        scan.scanned_through = today
+        scan.transitions     = counts
+        scan.save()
+
+    return counts
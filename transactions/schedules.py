@@ -0,0 +1,131 @@
+import calendar
+import datetime
+
+import numpy as np
+
+from django.db import transaction
+
+from core.registry import registry
+from transactions.models import Portfolio, Repayment
+
+INTEREST_TAX_RATE = 0.154
+PLATFORM_FEE_RATE = 0.012
+TAX_UNIT          = 10
+
+BULLET          = "bullet"
+AMORTIZING      = "amortizing"
+EQUAL_PRINCIPAL = "equal_principal"
+
+REPAYMENT_METHODS = {
+    "만기일시"   : BULLET,
+    "원리금균등" : AMORTIZING,
+    "원금균등"   : EQUAL_PRINCIPAL,
+}
+
+
+def repayment_method(repayment_type_name):
+    try:
+        return REPAYMENT_METHODS[repayment_type_name]
+
+    except KeyError:
+        raise ValueError(f"UNKNOWN_REPAYMENT_TYPE: {repayment_type_name}")
+
+
+def _principal_schedule(amounts, months, monthly_rate, method):
+    periods = np.arange(1, months + 1)
+
+    if method == BULLET:
+        principal = np.zeros((len(amounts), months), dtype=np.int64)
+
+    elif method == EQUAL_PRINCIPAL:
+        principal = np.repeat((amounts // months)[:, None], months, axis=1)
+
+    elif monthly_rate:
+        growth    = (1 + monthly_rate) ** months
+        remaining = amounts[:, None] * (growth - (1 + monthly_rate) ** periods) / (growth - 1)
+        principal = np.floor(-np.diff(remaining, prepend=amounts[:, None], axis=1)).astype(np.int64)
+
+    else:
+        principal = np.repeat((amounts // months)[:, None], months, axis=1)
+
+    principal[:, -1] = amounts - principal[:, :-1].sum(axis=1)
+
+    return principal
+
+
+def build_schedule(amounts, months, annual_rate, method):
+    amounts      = np.asarray(amounts, dtype=np.int64)
+    monthly_rate = annual_rate / 100 / 12
+    principal    = _principal_schedule(amounts, months, monthly_rate, method)
+    outstanding  = amounts[:, None] - np.cumsum(principal, axis=1) + principal
+    interest     = np.floor(outstanding * monthly_rate).astype(np.int64)
+
+    return {
+        "principal" : principal,
+        "interest"  : interest,
+        "tax"       : (np.floor(interest * INTEREST_TAX_RATE / TAX_UNIT) * TAX_UNIT).astype(np.int64),
+        "charge"    : np.floor(outstanding * PLATFORM_FEE_RATE / 12).astype(np.int64),
+    }
+
+
+def due_dates(start_date, months, repayment_day):
+    dates = []
+
+    for count in range(1, months + 1):
+        year, month = divmod(start_date.month - 1 + count, 12)
+        year       += start_date.year
+        month      += 1
+        day         = min(repayment_day, calendar.monthrange(year, month)[1])
+        dates.append(datetime.date(year, month, day))
+
+    return dates
+
+
+def generate_repayment_schedules(investment, start_date=None, batch_size=5000):
+    start_date = start_date or datetime.date.today()
+    portfolios = list(
+        Portfolio.objects.filter(investment=investment, amounts__gt=0)
+        .order_by("id")
+        .values_list("id", "user_id", "amounts")
+    )
+
+    if not portfolios or not investment.duration:
+        return 0
+
+    portfolio_ids, user_ids, amounts = zip(*portfolios)
+
+    schedule = build_schedule(
+        amounts,
+        investment.duration,
+        investment.return_rate,
+        repayment_method(registry.repayment_type_name(investment.repayment_type_id)),
+    )
+    columns = {name: values.tolist() for name, values in schedule.items()}
+    dates   = due_dates(start_date, investment.duration, investment.detail.repayment_day)
+
+    with transaction.atomic():
+        settled = set(
+            Repayment.objects.filter(
+                portfolio__investment=investment, transaction__isnull=False
+            ).values_list("portfolio_id", "repayment_count")
+        )
+        Repayment.objects.filter(portfolio__investment=investment, transaction__isnull=True).delete()
+
+        repayments = [
+            Repayment(
+                portfolio_id=portfolio_id,
+                user_id=user_ids[row],
+                repayment_count=count + 1,
+                due_date=dates[count],
+                principal=columns["principal"][row][count],
+                interest=columns["interest"][row][count],
+                tax=columns["tax"][row][count],
+                charge=columns["charge"][row][count],
+            )
+            for row, portfolio_id in enumerate(portfolio_ids)
+            for count in range(investment.duration)
+            if (portfolio_id, count + 1) not in settled
+        ]
+        Repayment.objects.bulk_create(repayments, batch_size=batch_size)
+
+    return len(repayments)
@@ -0,0 +1,191 @@
+import time
+
+from django.db import transaction
+from django.db.models import Case, F, PositiveBigIntegerField, Value, When
+from django.utils import timezone
+
+from transactions.ledger import check_snapshot_lag, ledger_entries
+from transactions.models import (
+    Deposit,
+    InvestmentState,
+    LedgerEntry,
+    Portfolio,
+    Repayment,
+    RepaymentState,
+    Settlement,
+    Transaction,
+    TransactionType,
+)
+from transactions.portfolio import rebuild_portfolio_summaries
+
+REPAYMENT_FIELDS = (
+    "id",
+    "portfolio_id",
+    "user_id",
+    "user__deposit_id",
+    "principal",
+    "interest",
+    "tax",
+    "charge",
+)
+
+
+def net_payout(principal, interest, tax, charge):
+    return max(principal + interest - tax - charge, 0)
+
+
+def _pending_repayments(settlement, chunk_size):
+    return list(
+        Repayment.objects.filter(
+            portfolio__investment_id=settlement.investment_id,
+            repayment_count=settlement.repayment_count,
+            transaction__isnull=True,
+            user__deposit__isnull=False,
+            id__gt=settlement.last_repayment_id,
+        )
+        .order_by("id")
+        .values_list(*REPAYMENT_FIELDS)[:chunk_size]
+    )
+
+
+def _skipped_user_ids(settlement):
+    return sorted(
+        set(
+            Repayment.objects.filter(
+                portfolio__investment_id=settlement.investment_id,
+                repayment_count=settlement.repayment_count,
+                transaction__isnull=True,
+                user__deposit__isnull=True,
+            ).values_list("user_id", flat=True)
+        )
+    )
+
+
+def _case(field, values):
+    return Case(
+        *[When(**{field: key}, then=Value(value)) for key, value in values.items()],
+        output_field=PositiveBigIntegerField(),
+    )
+
+
+def settle_chunk(settlement_id, investment, chunk_size):
+    started_at = time.perf_counter()
+
+    with transaction.atomic():
+        settlement = Settlement.objects.select_for_update().get(id=settlement_id)
+        repayments = _pending_repayments(settlement, chunk_size)
+
+        if not repayments:
+            settlement.skipped_user_ids = _skipped_user_ids(settlement)
+
+            if settlement.skipped_user_ids:
+                settlement.last_repayment_id = 0
+            else:
+                settlement.completed_time = settlement.completed_time or timezone.now()
+
+            settlement.save(
+                update_fields=["skipped_user_ids", "last_repayment_id", "completed_time", "updated_at"]
+            )
+            return settlement, 0
+
+        payouts  = {}
+        deposits = {}
+
+        for _, _, user_id, deposit_id, principal, interest, tax, charge in repayments:
+            payouts[user_id]  = payouts.get(user_id, 0) + net_payout(principal, interest, tax, charge)
+            deposits[user_id] = deposit_id
+
+        Deposit.objects.filter(id__in=deposits.values()).update(
+            balance=F("balance")
+            + _case("id", {deposits[user_id]: amounts for user_id, amounts in payouts.items()})
+        )
+
+        information = f"{settlement.repayment_count}회차 {investment.name}"[:64]
+        Transaction.objects.bulk_create(
+            [
+                Transaction(
+                    type_id=TransactionType.Type.PAYMENT.value,
+                    information=information,
+                    amounts=amounts,
+                    deposit_id=deposits[user_id],
+                    user_id=user_id,
+                    investment_id=investment.id,
+                )
+                for user_id, amounts in payouts.items()
+            ]
+        )
+        transaction_ids = dict(
+            Transaction.objects.filter(
+                investment_id=investment.id,
+                type_id=TransactionType.Type.PAYMENT.value,
+                information=information,
+                user_id__in=payouts,
+                repayment__isnull=True,
+            ).values_list("user_id", "id")
+        )
+
+        LedgerEntry.objects.bulk_create(
+            [
+                entry
+                for user_id, amounts in payouts.items()
+                for entry in ledger_entries(
+                    transaction_ids[user_id],
+                    deposits[user_id],
+                    TransactionType.Type.PAYMENT.value,
+                    amounts,
+                )
+            ]
+        )
+
+        repayment_ids = [repayment[0] for repayment in repayments]
+        Repayment.objects.filter(id__in=repayment_ids).update(
+            transaction_id=_case("user_id", transaction_ids)
+        )
+
+        states = {"repayment_state_id": RepaymentState.State.NORMAL.value}
+
+        if settlement.repayment_count >= investment.duration:
+            states["investment_state_id"] = InvestmentState.State.COMPLETE.value
+
+        portfolio_ids = {repayment[1] for repayment in repayments}
+        outstanding   = Repayment.objects.filter(
+            portfolio_id__in=portfolio_ids,
+            repayment_count__lt=settlement.repayment_count,
+            transaction__isnull=True,
+        ).values_list("portfolio_id", flat=True)
+
+        Portfolio.objects.filter(id__in=portfolio_ids).exclude(id__in=outstanding).update(**states)
+        rebuild_portfolio_summaries(list(payouts))
+
+        settlement.last_repayment_id = repayment_ids[-1]
+        settlement.settled_count    += len(repayments)
+        settlement.settled_amounts  += sum(payouts.values())
+        settlement.chunk_timings.append(
+            {
+                "chunk"       : len(settlement.chunk_timings) + 1,
+                "rows"        : len(repayments),
+                "amounts"     : sum(payouts.values()),
+                "duration_ms" : round((time.perf_counter() - started_at) * 1000, 3),
+            }
+        )
+        settlement.save()
+        check_snapshot_lag(started_at)
+
+    return settlement, len(repayments)
+
+
+def settle_investment(investment, repayment_count, chunk_size=1000, max_chunks=None):
+    settlement, _ = Settlement.objects.get_or_create(
+        investment=investment, repayment_count=repayment_count
+    )
+    chunks = 0
+
+    while max_chunks is None or chunks < max_chunks:
+        settlement, settled = settle_chunk(settlement.id, investment, chunk_size)
+
+        if not settled:
+            break
+
+        chunks += 1
+
+    return settlement
@@ -1,6 +1,23 @@
+import datetime
 import json
+import re
+import jwt
 
-from django.test import TestCase, Client
+from io import StringIO
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.db.models import Sum
+from django.test import TestCase, TransactionTestCase, Client, override_settings, skipUnlessDBFeature
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from core.registry import registry
+from my_settings import MY_SECRET_KEY
 
 from transactions.models import (
     Deposit,
@@ -13,6 +30,41 @@ from transactions.models import (
 )
 
 from transactions.models import Deposit, TransactionType, Deposit, Bank, Transaction
+from transactions.models import (
+    BalanceSnapshot,
+    IdempotencyKey,
+    LedgerEntry,
+    PortfolioSummary,
+    Repayment,
+    Settlement,
+    StateScan,
+    TransactionOutbox,
+)
+from transactions.funding import enable_hot_listing, fold_funding_shards, funding_totals
+from transactions.ledger import (
+    InsufficientBalance,
+    SnapshotLagExceeded,
+    balance_at,
+    debit_deposit,
+    fund_investment,
+    reserve_funding,
+    take_balance_snapshots,
+    unbalanced_deposits,
+)
+from transactions.portfolio import (
+    diff_portfolio_summary,
+    load_portfolio_totals,
+    rebuild_portfolio_summaries,
+)
+from transactions.scanner import scan_portfolio_states
+from transactions.settlement import net_payout, settle_investment
+from transactions.schedules import (
+    AMORTIZING,
+    BULLET,
+    EQUAL_PRINCIPAL,
+    build_schedule,
+    generate_repayment_schedules,
+)
 
 from investments.models import (
     Grade,
@@ -22,6 +74,7 @@ from investments.models import (
     BorrowerInformation,
     InvestmentDetail,
     Investment,
+    FundingShard,
 )
 from users.models import User
 
@@ -100,8 +153,14 @@ class InvestTransactionTest(TestCase):
 
         RepaymentState.objects.create(id=1, name="정상")
 
+        self.header = {
+            "HTTP_Authorization": jwt.encode({"id": 2}, MY_SECRET_KEY, algorithm="HS256")
+        }
+
 
     def tearDown(self):
+        LedgerEntry.objects.all().delete()
+        Transaction.objects.all().delete()
         TransactionType.objects.all().delete()
         User.objects.all().delete()
         Deposit.objects.all().delete()
@@ -127,7 +186,56 @@ class InvestTransactionTest(TestCase):
             **header
         )
         self.assertEqual(response.status_code, 201)
-        self.assertEqual(response.json(), {"message": "SUCCESS"})
+        self.assertEqual(response.json(), {"message": "SUCCESS", "amounts": 300000})
+
+    def test_invest_transaction_post_partial_amount(self):
+        Investment.objects.filter(id=1).update(current_amount=79900000)
+
+        client = Client()
+        invest_amount = {"amounts": 300000}
+        response = client.post(
+            "/transactions/invest/1",
+            json.dumps(invest_amount),
+            content_type="application/json",
+            **self.header
+        )
+        investment = Investment.objects.get(id=1)
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json(), {"message": "SUCCESS", "amounts": 100000})
+        self.assertEqual(investment.current_amount, 80000000)
+        self.assertEqual(investment.recruitment_rate, 100)
+        self.assertIsNotNone(investment.funded_time)
+        self.assertEqual(Deposit.objects.get(id=1).balance, 200000)
+        self.assertEqual(Portfolio.objects.get(user_id=2, investment_id=1).amounts, 100000)
+
+    def test_invest_transaction_post_funding_closed(self):
+        Investment.objects.filter(id=1).update(current_amount=80000000)
+
+        client = Client()
+        invest_amount = {"amounts": 300000}
+        response = client.post(
+            "/transactions/invest/1",
+            json.dumps(invest_amount),
+            content_type="application/json",
+            **self.header
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {"message": "FUNDING_CLOSED"})
+        self.assertEqual(Deposit.objects.get(id=1).balance, 300000)
+
+    def test_invest_transaction_post_out_of_range_releases_reservation(self):
+        client = Client()
+        invest_amount = {"amounts": 400000}
+        response = client.post(
+            "/transactions/invest/1",
+            json.dumps(invest_amount),
+            content_type="application/json",
+            **self.header
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {"message": "OUT_OF_RANGE"})
+        self.assertEqual(Investment.objects.get(id=1).current_amount, 3600000)
 
     def test_invest_transaction_post_invalid_input(self):
         client = Client()
@@ -463,6 +571,268 @@ class PortfolioTest(TestCase):
         self.assertEqual(response.json(), {"message": "INVALID_TOKEN"})
 
 
+class PortfolioSummaryTest(TestCase):
+    def setUp(self):
+        Grade.objects.bulk_create([Grade(id=1, name="A+"), Grade(id=2, name="C")])
+        RepaymentType.objects.create(id=1, name="만기일시")
+        LoanType.objects.create(id=1, name="부동산 담보 대출")
+
+        Security.objects.create(
+            id=1,
+            address="경기도 김포시",
+            completion_date="2012년 5월",
+            supply_area=153.20,
+            household=465,
+            exclusive_private_area=122.61,
+            lease_status="본인거주",
+        )
+
+        BorrowerInformation.objects.create(
+            id=1,
+            credit_score=664,
+            income_type="근로소득",
+            income=1740000,
+            card_usage_amount=780000,
+            loan_amount=400000000,
+            is_overdue="해당 없음",
+        )
+
+        InvestmentDetail.objects.create(
+            id=1,
+            loan_type_id=1,
+            evaluation_price=600000000,
+            repayment_day=25,
+            priority_bond_amount=400000000,
+        )
+
+        Investment.objects.bulk_create(
+            [
+                Investment(
+                    id=investment_id,
+                    name=f"주거안정 {investment_id}호",
+                    grade_id=grade_id,
+                    duration=12,
+                    repayment_type_id=1,
+                    return_rate=return_rate,
+                    target_amount=80000000,
+                    current_amount=0,
+                    detail_id=1,
+                    security_id=1,
+                    borrower_id=1,
+                )
+                for investment_id, grade_id, return_rate in [
+                    (1, 1, 8.9),
+                    (2, 2, 12.5),
+                    (3, 1, 7.0),
+                ]
+            ]
+        )
+
+        InvestmentState.objects.bulk_create(
+            [
+                InvestmentState(id=1, name="투자중"),
+                InvestmentState(id=2, name="투자완료"),
+                InvestmentState(id=3, name="손실"),
+            ]
+        )
+
+        RepaymentState.objects.bulk_create(
+            [
+                RepaymentState(id=1, name="정상"),
+                RepaymentState(id=2, name="상환지연"),
+                RepaymentState(id=3, name="연체"),
+            ]
+        )
+
+        Bank.objects.create(id=2, name="농협은행")
+
+        Deposit.objects.create(
+            id=1,
+            withdrawal_account="111-222-333",
+            withdrawal_bank_id=2,
+            deposit_account="444-555-666",
+            deposit_bank_id=2,
+            balance=300000,
+        )
+
+        User.objects.create(
+            id=2,
+            name="무현",
+            email="example@naver.com",
+            phone_number="010-2222-4444",
+            password="1234dfsdflker@!",
+            deposit_id=1,
+        )
+
+        Portfolio.objects.bulk_create(
+            [
+                Portfolio(
+                    user_id=2,
+                    investment_id=1,
+                    amounts=600000,
+                    investment_state_id=1,
+                    repayment_state_id=1,
+                ),
+                Portfolio(
+                    user_id=2,
+                    investment_id=2,
+                    amounts=200000,
+                    investment_state_id=1,
+                    repayment_state_id=2,
+                ),
+                Portfolio(
+                    user_id=2,
+                    investment_id=3,
+                    amounts=100000,
+                    investment_state_id=2,
+                    repayment_state_id=1,
+                ),
+            ]
+        )
+
+        self.header = {
+            "HTTP_Authorization": jwt.encode({"id": 2}, MY_SECRET_KEY, algorithm="HS256")
+        }
+
+    def tearDown(self):
+        PortfolioSummary.objects.all().delete()
+        LedgerEntry.objects.all().delete()
+        Transaction.objects.all().delete()
+        TransactionType.objects.all().delete()
+        Portfolio.objects.all().delete()
+        RepaymentState.objects.all().delete()
+        InvestmentState.objects.all().delete()
+        User.objects.all().delete()
+        Deposit.objects.all().delete()
+        Bank.objects.all().delete()
+        Investment.objects.all().delete()
+        InvestmentDetail.objects.all().delete()
+        BorrowerInformation.objects.all().delete()
+        Security.objects.all().delete()
+        LoanType.objects.all().delete()
+        RepaymentType.objects.all().delete()
+        Grade.objects.all().delete()
+
+    def test_portfolio_get_query_count(self):
+        client = Client()
+        rebuild_portfolio_summaries()
+        registry.names("bank")
+
+        with self.assertNumQueries(3):
+            response = client.get("/transactions/portfolio", **self.header)
+
+        self.assertEqual(response.status_code, 200)
+
+        with self.assertNumQueries(2):
+            response = client.get("/transactions/portfolio", **self.header)
+
+        self.assertEqual(response.status_code, 200)
+
+    def test_portfolio_get_reflects_new_deposit_balance(self):
+        client = Client()
+        TransactionType.objects.create(id=2, name="입금")
+        client.get("/transactions/portfolio", **self.header)
+
+        client.post(
+            "/transactions/deposit",
+            json.dumps({"amounts": 50000}),
+            content_type="application/json",
+            **self.header
+        )
+        response = client.get("/transactions/portfolio", **self.header)
+
+        self.assertEqual(
+            response.json()["results"]["deposit_information"]["deposit_balance"], 350000
+        )
+
+    def test_portfolio_get_rereads_deposit_balance(self):
+        client = Client()
+        client.get("/transactions/portfolio", **self.header)
+
+        Deposit.objects.filter(id=1).update(balance=1)
+        response = client.get("/transactions/portfolio", **self.header)
+
+        self.assertEqual(response.json()["results"]["deposit_information"]["deposit_balance"], 1)
+
+    def test_portfolio_get_builds_missing_summary(self):
+        client = Client()
+        response = client.get("/transactions/portfolio", **self.header)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(PortfolioSummary.objects.get(user_id=2).total, 900000)
+
+    def test_invest_transaction_updates_summary(self):
+        client = Client()
+        TransactionType.objects.create(id=4, name="투자")
+        rebuild_portfolio_summaries()
+
+        for investment_id, amounts in [(1, 50000), (2, 30000), (3, 20000)]:
+            response = client.post(
+                f"/transactions/invest/{investment_id}",
+                json.dumps({"amounts": amounts}),
+                content_type="application/json",
+                **self.header
+            )
+            self.assertEqual(response.status_code, 201)
+
+        summary = PortfolioSummary.objects.get(user_id=2)
+
+        self.assertEqual(summary.total, 1000000)
+        self.assertEqual(summary.portfolio_count, 5)
+        self.assertEqual(diff_portfolio_summary(2), {})
+
+    def test_verify_portfolio_summaries_command(self):
+        call_command("rebuild_portfolio_summaries", stdout=StringIO())
+        call_command("verify_portfolio_summaries", stdout=StringIO())
+
+        Portfolio.objects.filter(investment_id=1).update(amounts=1)
+
+        with self.assertRaises(CommandError):
+            call_command("verify_portfolio_summaries", stdout=StringIO())
+
+    def test_portfolio_get_buckets(self):
+        client = Client()
+        response = client.get("/transactions/portfolio", **self.header)
+        results = response.json()["results"]
+
+        def prices(buckets):
+            return {bucket["name"]: bucket["price"] for bucket in buckets}
+
+        self.assertEqual(results["deposit_information"]["gross_investment_limit"], 29100000)
+        self.assertEqual(results["deposit_information"]["real_estate_investment_limit"], 9100000)
+        self.assertEqual(results["investment_general_infomation"]["assets"], 1200000)
+        self.assertEqual(results["investment_general_infomation"]["cumulative_profit"], 0)
+        self.assertEqual(
+            prices(results["investment_current_condition"]["all"]),
+            {
+                "investing_amount": 800000,
+                "invest_completed_amount": 100000,
+                "loss_amount": 0,
+            },
+        )
+        self.assertEqual(
+            prices(results["investment_current_condition"]["investing"]),
+            {
+                "investing_normal_amount": 600000,
+                "investing_delay_amount": 200000,
+                "investing_overdue_amount": 0,
+            },
+        )
+        self.assertEqual(
+            prices(results["portfolio_current_condition"]["grade"]),
+            {"A": 700000, "B": 0, "C": 200000, "D": 0},
+        )
+        self.assertEqual(
+            prices(results["portfolio_current_condition"]["return_rate"]),
+            {
+                "8_under": 100000,
+                "8_over_or_equal": 600000,
+                "10_over_or_equal": 0,
+                "12_over_or_equal": 200000,
+            },
+        )
+
+
 class TransactionInformationTest(TestCase):
     def setUp(self):
         Bank.objects.create(id=2, name="농협은행")
@@ -499,6 +869,7 @@ class TransactionInformationTest(TestCase):
         )
 
     def tearDown(self):
+        LedgerEntry.objects.all().delete()
         Transaction.objects.all().delete()
         TransactionType.objects.all().delete()
         User.objects.all().delete()
@@ -526,6 +897,135 @@ class TransactionInformationTest(TestCase):
         
         self.assertEqual(response.status_code, 200)
 
+class TransactionHistoryPaginationTest(TestCase):
+    def setUp(self):
+        Bank.objects.create(id=2, name="농협은행")
+
+        Deposit.objects.create(
+            id=1,
+            withdrawal_account="111-222-333",
+            withdrawal_bank_id=2,
+            deposit_account="444-555-666",
+            deposit_bank_id=2,
+            balance=300000,
+        )
+
+        User.objects.create(
+            id=2,
+            name="무현",
+            email="example@naver.com",
+            phone_number="010-2222-4444",
+            password="1234dfsdflker@!",
+            deposit_id=1,
+        )
+
+        TransactionType.objects.bulk_create(
+            [TransactionType(id=2, name="입금"), TransactionType(id=4, name="투자")]
+        )
+        registry.clear()
+
+        for amounts in range(1, 6):
+            Transaction.objects.create(
+                type_id=2 if amounts % 2 else 4,
+                information="농협은행",
+                amounts=amounts,
+                deposit_id=1,
+                user_id=2,
+            )
+
+        self.header = {
+            "HTTP_Authorization": jwt.encode({"id": 2}, MY_SECRET_KEY, algorithm="HS256")
+        }
+
+    def tearDown(self):
+        LedgerEntry.objects.all().delete()
+        Transaction.objects.all().delete()
+        TransactionType.objects.all().delete()
+        User.objects.all().delete()
+        Deposit.objects.all().delete()
+        Bank.objects.all().delete()
+
+    def test_transaction_history_keyset_pagination(self):
+        client = Client()
+        amounts = []
+        cursor = None
+        client.get("/transactions/history", {"limit": 1}, **self.header)
+
+        while True:
+            params = {"limit": 2}
+
+            if cursor:
+                params["cursor"] = cursor
+
+            with self.assertNumQueries(1):
+                response = client.get("/transactions/history", params, **self.header)
+
+            self.assertEqual(response.status_code, 200)
+            amounts += [row["amounts"] for row in response.json()["transactions"]]
+            cursor = response.json()["next_cursor"]
+
+            if not cursor:
+                break
+
+        self.assertEqual(amounts, [5, 4, 3, 2, 1])
+
+    def test_transaction_history_without_type_join(self):
+        client = Client()
+        client.get("/transactions/history", **self.header)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get("/transactions/history", **self.header)
+
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('"transaction_types"', queries[0]["sql"])
+        self.assertEqual(
+            [row["type"] for row in response.json()["transactions"]], ["입금", "투자", "입금", "투자", "입금"]
+        )
+
+    def test_transaction_history_type_filter(self):
+        client = Client()
+        response = client.get("/transactions/history", {"type_id": 4}, **self.header)
+
+        self.assertEqual(
+            [row["type"] for row in response.json()["transactions"]], ["투자", "투자"]
+        )
+
+    def test_transaction_history_invalid_cursor(self):
+        client = Client()
+        response = client.get("/transactions/history", {"cursor": "invalid"}, **self.header)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {"message": "INVALID_CURSOR"})
+
+    def test_transaction_history_invalid_limit(self):
+        client = Client()
+
+        for limit in ("abc", 0):
+            response = client.get("/transactions/history", {"limit": limit}, **self.header)
+
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(response.json(), {"message": "INVALID_INPUT"})
+
+    def test_transaction_history_ndjson_export(self):
+        client = Client()
+        response = client.get("/transactions/history", {"format": "ndjson"}, **self.header)
+        rows = [
+            json.loads(line)
+            for line in b"".join(response.streaming_content).decode("utf-8").splitlines()
+        ]
+
+        self.assertEqual([row["amounts"] for row in rows], [5, 4, 3, 2, 1])
+
+    def test_transaction_history_csv_export(self):
+        client = Client()
+        response = client.get("/transactions/history", {"format": "csv"}, **self.header)
+        lines = b"".join(response.streaming_content).decode("utf-8").splitlines()
+
+        self.assertEqual(response["Content-Type"], "text/csv")
+        self.assertEqual(lines[0], "created_time,type,information,amounts")
+        self.assertEqual(len(lines), 6)
+
+
 class WithdrawalTest(TestCase):
     def setUp(self):
         TransactionType.objects.create(id=3, name="출금")
@@ -643,4 +1143,1265 @@ class WithdrawalTest(TestCase):
             **header
         )
         self.assertEqual(response.status_code, 400)
-        self.assertEqual(response.json(), {"message": "INVALID_TOKEN"})
\ No newline at end of file
+        self.assertEqual(response.json(), {"message": "INVALID_TOKEN"})
+
+
+class LedgerWriteTest(TestCase):
+    def setUp(self):
+        TransactionType.objects.bulk_create(
+            [TransactionType(id=2, name="입금"), TransactionType(id=3, name="출금")]
+        )
+
+        Bank.objects.create(id=2, name="농협은행")
+
+        Deposit.objects.create(
+            id=1,
+            withdrawal_account="111-222-333",
+            withdrawal_bank_id=2,
+            deposit_account="444-555-666",
+            deposit_bank_id=2,
+            balance=300000,
+        )
+
+        User.objects.create(
+            id=2,
+            name="무현",
+            email="example@naver.com",
+            phone_number="010-2222-4444",
+            password="1234dfsdflker@!",
+            deposit_id=1,
+        )
+
+        self.header = {
+            "HTTP_Authorization": jwt.encode({"id": 2}, MY_SECRET_KEY, algorithm="HS256")
+        }
+
+    def tearDown(self):
+        LedgerEntry.objects.all().delete()
+        Transaction.objects.all().delete()
+        User.objects.all().delete()
+        Deposit.objects.all().delete()
+        Bank.objects.all().delete()
+        TransactionType.objects.all().delete()
+
+    def test_deposit_and_withdrawal_return_new_balance(self):
+        client = Client()
+        response = client.post(
+            "/transactions/deposit",
+            json.dumps({"amounts": 50000}),
+            content_type="application/json",
+            **self.header
+        )
+        self.assertEqual(response.json(), {"message": "SUCCESS", "deposit_balance": 350000})
+
+        response = client.post(
+            "/transactions/withdrawal",
+            json.dumps({"amounts": 150000}),
+            content_type="application/json",
+            **self.header
+        )
+        self.assertEqual(response.json(), {"message": "SUCCESS", "deposit_balance": 200000})
+        self.assertEqual(Deposit.objects.get(id=1).balance, 200000)
+
+    def test_stale_deposit_does_not_lose_updates(self):
+        stale = Deposit.objects.get(id=1)
+        Deposit.objects.filter(id=1).update(balance=100000)
+
+        with self.assertRaises(InsufficientBalance):
+            debit_deposit(stale, 200000)
+
+        self.assertEqual(Deposit.objects.get(id=1).balance, 100000)
+
+    def test_withdrawal_over_balance(self):
+        client = Client()
+        response = client.post(
+            "/transactions/withdrawal",
+            json.dumps({"amounts": 300001}),
+            content_type="application/json",
+            **self.header
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {"message": "WRONG_REQUEST"})
+        self.assertFalse(Transaction.objects.exists())
+
+
+class LedgerConcurrencyTest(TransactionTestCase):
+    THREADS  = 8
+    REQUESTS = 40
+
+    def setUp(self):
+        TransactionType.objects.bulk_create(
+            [TransactionType(id=2, name="입금"), TransactionType(id=3, name="출금")]
+        )
+
+        Bank.objects.create(id=2, name="농협은행")
+
+        Deposit.objects.create(
+            id=1,
+            withdrawal_account="111-222-333",
+            withdrawal_bank_id=2,
+            deposit_account="444-555-666",
+            deposit_bank_id=2,
+            balance=0,
+        )
+
+        User.objects.create(
+            id=2,
+            name="무현",
+            email="example@naver.com",
+            phone_number="010-2222-4444",
+            password="1234dfsdflker@!",
+            deposit_id=1,
+        )
+
+        self.header = {
+            "HTTP_Authorization": jwt.encode({"id": 2}, MY_SECRET_KEY, algorithm="HS256")
+        }
+
+    def post(self, path, amounts):
+        try:
+            return Client().post(
+                path,
+                json.dumps({"amounts": amounts}),
+                content_type="application/json",
+                **self.header
+            ).status_code
+
+        finally:
+            connection.close()
+
+    @skipUnlessDBFeature("has_select_for_update")
+    def test_concurrent_deposits_and_withdrawals_keep_balance(self):
+        with ThreadPoolExecutor(max_workers=self.THREADS) as executor:
+            deposits = list(
+                executor.map(
+                    lambda _: self.post("/transactions/deposit", 1000), range(self.REQUESTS)
+                )
+            )
+
+        self.assertEqual(deposits, [201] * self.REQUESTS)
+        self.assertEqual(Deposit.objects.get(id=1).balance, 1000 * self.REQUESTS)
+
+        with ThreadPoolExecutor(max_workers=self.THREADS) as executor:
+            withdrawals = list(
+                executor.map(
+                    lambda _: self.post("/transactions/withdrawal", 3000), range(self.REQUESTS)
+                )
+            )
+
+        succeeded = withdrawals.count(201)
+
+        self.assertEqual(succeeded, 1000 * self.REQUESTS // 3000)
+        self.assertEqual(
+            Deposit.objects.get(id=1).balance, 1000 * self.REQUESTS - 3000 * succeeded
+        )
+        self.assertEqual(
+            Transaction.objects.filter(type_id=3).count(), succeeded
+        )
+
+
+class FundingTest(TestCase):
+    def setUp(self):
+        cache.clear()
+
+        Grade.objects.create(id=1, name="A+")
+        RepaymentType.objects.create(id=1, name="만기일시")
+        LoanType.objects.create(id=1, name="부동산 담보 대출")
+        Security.objects.create(
+            id=1,
+            address="경기도 김포시",
+            completion_date="2012년 5월",
+            supply_area=153.20,
+            household=465,
+            exclusive_private_area=122.61,
+            lease_status="본인거주",
+        )
+        BorrowerInformation.objects.create(
+            id=1,
+            credit_score=664,
+            income_type="근로소득",
+            income=1740000,
+            card_usage_amount=780000,
+        )
+        InvestmentDetail.objects.create(
+            id=1,
+            loan_type_id=1,
+            evaluation_price=600000000,
+            repayment_day=25,
+            priority_bond_amount=400000000,
+        )
+        Investment.objects.create(
+            id=1,
+            name="주거안정 406호",
+            grade_id=1,
+            duration=12,
+            repayment_type_id=1,
+            return_rate=8.9,
+            target_amount=80000000,
+            current_amount=0,
+            detail_id=1,
+            security_id=1,
+            borrower_id=1,
+        )
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_fund_investment_updates_recruitment_rate(self):
+        fund_investment(1, 20000000)
+        investment, accepted = fund_investment(1, 20000000)
+
+        self.assertEqual(accepted, 20000000)
+        self.assertEqual(investment.recruitment_rate, 50)
+        self.assertIsNone(investment.funded_time)
+        self.assertEqual(funding_totals([1]), {1: 40000000})
+        self.assertEqual(Investment.objects.get(id=1).recruitment_rate, 50)
+
+    def test_fund_investment_caps_at_target_amount(self):
+        target_amount = Investment.objects.get(id=1).target_amount
+
+        with self.assertNumQueries(1):
+            self.assertEqual(reserve_funding(1, target_amount - 1000), target_amount - 1000)
+
+        self.assertEqual(reserve_funding(1, 5000), 1000)
+        self.assertEqual(reserve_funding(1, 5000), 0)
+        self.assertIsNone(reserve_funding(99, 5000))
+        self.assertEqual(funding_totals([1]), {1: target_amount})
+
+    def test_regular_listing_reads_skip_funding_shards(self):
+        client = Client()
+
+        with CaptureQueriesContext(connection) as queries:
+            client.get("/investments")
+            client.get("/investments?open=1")
+            client.get("/investments/1")
+            fund_investment(1, 10000)
+
+        self.assertFalse(
+            any(re.search(r"funding_shards\W?\.", query["sql"]) for query in queries.captured_queries)
+        )
+
+    def test_hot_listing_accumulates_in_shards(self):
+        enable_hot_listing(1, 4)
+
+        self.assertEqual(
+            FundingShard.objects.filter(investment_id=1).aggregate(total=Sum("capacity"))["total"], 80000000
+        )
+
+        client = Client()
+        client.get("/investments/1")
+        client.get("/investments")
+
+        investment, accepted = fund_investment(1, 20000000)
+
+        self.assertEqual(accepted, 20000000)
+        self.assertEqual(investment.funded_amount, 20000000)
+        self.assertEqual(funding_totals([1]), {1: 20000000})
+        self.assertEqual(client.get("/investments/1").json()["current_amount"], 20000000)
+        self.assertEqual(investment.recruitment_rate, 25)
+        self.assertEqual(Investment.objects.get(id=1).recruitment_rate, 25)
+        self.assertEqual(client.get("/investments").json()["investments"][0]["recrutement_rate"], 25)
+        self.assertEqual(
+            [row["id"] for row in client.get("/investments?sort=-recruitment_rate").json()["investments"]], [1]
+        )
+
+        self.assertEqual(fold_funding_shards(1), 20000000)
+        self.assertEqual(
+            Investment.objects.values_list("current_amount", "recruitment_rate").get(id=1),
+            (20000000, 25),
+        )
+        self.assertEqual(funding_totals([1]), {1: 20000000})
+
+    def test_hot_listing_caps_and_folds_when_full(self):
+        enable_hot_listing(1, 3)
+
+        for _ in range(7):
+            fund_investment(1, 10000000)
+
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            investment, accepted = fund_investment(1, 30000000)
+
+            self.assertEqual(Investment.objects.get(id=1).current_amount, 0)
+
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(accepted, 10000000)
+        self.assertEqual(investment.funded_amount, 80000000)
+        self.assertEqual(
+            Investment.objects.values_list("current_amount", "recruitment_rate").get(id=1), (80000000, 100)
+        )
+        self.assertIsNotNone(Investment.objects.get(id=1).funded_time)
+        self.assertEqual(fund_investment(1, 10000)[1], 0)
+        self.assertEqual(funding_totals([1]), {1: 80000000})
+
+        call_command("hot_listing", "1", "--shards", "0", stdout=StringIO())
+
+        self.assertFalse(FundingShard.objects.exists())
+        self.assertEqual(Investment.objects.get(id=1).funding_shards, 0)
+
+
+class FundingConcurrencyTest(TransactionTestCase):
+    THREADS  = 8
+    REQUESTS = 40
+
+    def setUp(self):
+        Grade.objects.create(id=1, name="A+")
+        RepaymentType.objects.create(id=1, name="만기일시")
+        LoanType.objects.create(id=1, name="부동산 담보 대출")
+        Security.objects.create(
+            id=1,
+            address="경기도 김포시",
+            completion_date="2012년 5월",
+            supply_area=153.20,
+            household=465,
+            exclusive_private_area=122.61,
+            lease_status="본인거주",
+        )
+        BorrowerInformation.objects.create(
+            id=1,
+            credit_score=664,
+            income_type="근로소득",
+            income=1740000,
+            card_usage_amount=780000,
+        )
+        InvestmentDetail.objects.create(
+            id=1,
+            loan_type_id=1,
+            evaluation_price=600000000,
+            repayment_day=25,
+            priority_bond_amount=400000000,
+        )
+        Investment.objects.create(
+            id=1,
+            name="주거안정 406호",
+            grade_id=1,
+            duration=12,
+            repayment_type_id=1,
+            return_rate=8.9,
+            target_amount=100000,
+            current_amount=0,
+            detail_id=1,
+            security_id=1,
+            borrower_id=1,
+        )
+
+        TransactionType.objects.create(id=4, name="투자")
+        InvestmentState.objects.create(id=1, name="투자중")
+        RepaymentState.objects.create(id=1, name="정상")
+        Bank.objects.create(id=1, name="농협은행")
+
+        for user_id in range(1, self.THREADS + 1):
+            Deposit.objects.create(
+                id=user_id,
+                withdrawal_account="111-222-333",
+                withdrawal_bank_id=1,
+                deposit_account=f"444-555-{user_id}",
+                deposit_bank_id=1,
+                balance=10000000,
+            )
+            User.objects.create(
+                id=user_id,
+                name="무현",
+                email=f"example{user_id}@naver.com",
+                phone_number="010-2222-4444",
+                password="1234dfsdflker@!",
+                deposit_id=user_id,
+            )
+
+    def invest(self, index):
+        header = {
+            "HTTP_Authorization": jwt.encode(
+                {"id": index % self.THREADS + 1}, MY_SECRET_KEY, algorithm="HS256"
+            )
+        }
+
+        try:
+            response = Client().post(
+                "/transactions/invest/1",
+                json.dumps({"amounts": 7000}),
+                content_type="application/json",
+                **header
+            )
+            return response.json().get("amounts", 0)
+
+        finally:
+            connection.close()
+
+    def assert_capped(self, accepted):
+        fold_funding_shards(1)
+
+        self.assertEqual(sum(accepted), 100000)
+        self.assertEqual(Investment.objects.get(id=1).current_amount, 100000)
+        self.assertEqual(Portfolio.objects.aggregate(total=Sum("amounts"))["total"], 100000)
+
+    @skipUnlessDBFeature("has_select_for_update")
+    def test_concurrent_investments_never_overfund(self):
+        with ThreadPoolExecutor(max_workers=self.THREADS) as executor:
+            accepted = list(executor.map(self.invest, range(self.REQUESTS)))
+
+        self.assert_capped(accepted)
+
+    @skipUnlessDBFeature("has_select_for_update")
+    def test_concurrent_hot_listing_investments_never_overfund(self):
+        enable_hot_listing(1, 4)
+
+        with ThreadPoolExecutor(max_workers=self.THREADS) as executor:
+            accepted = list(executor.map(self.invest, range(self.REQUESTS)))
+
+        self.assert_capped(accepted)
+
+
+class RepaymentScheduleTest(TestCase):
+    def setUp(self):
+        Grade.objects.create(id=1, name="A+")
+        RepaymentType.objects.bulk_create(
+            [RepaymentType(id=1, name="만기일시"), RepaymentType(id=2, name="원리금균등")]
+        )
+        LoanType.objects.create(id=1, name="부동산 담보 대출")
+
+        Security.objects.create(
+            id=1,
+            address="경기도 김포시",
+            completion_date="2012년 5월",
+            supply_area=153.20,
+            household=465,
+            exclusive_private_area=122.61,
+            lease_status="본인거주",
+        )
+
+        BorrowerInformation.objects.create(
+            id=1,
+            credit_score=664,
+            income_type="근로소득",
+            income=1740000,
+            card_usage_amount=780000,
+        )
+
+        InvestmentDetail.objects.create(
+            id=1,
+            loan_type_id=1,
+            evaluation_price=600000000,
+            repayment_day=31,
+            priority_bond_amount=400000000,
+        )
+
+        Investment.objects.bulk_create(
+            [
+                Investment(
+                    id=investment_id,
+                    name=f"주거안정 {investment_id}호",
+                    grade_id=1,
+                    duration=6,
+                    repayment_type_id=repayment_type_id,
+                    return_rate=12.0,
+                    target_amount=80000000,
+                    current_amount=0,
+                    detail_id=1,
+                    security_id=1,
+                    borrower_id=1,
+                )
+                for investment_id, repayment_type_id in [(1, 1), (2, 2)]
+            ]
+        )
+
+        InvestmentState.objects.create(id=1, name="투자중")
+        RepaymentState.objects.create(id=1, name="정상")
+        TransactionType.objects.create(id=1, name="상환")
+        Bank.objects.create(id=2, name="농협은행")
+
+        Deposit.objects.create(
+            id=1,
+            withdrawal_account="111-222-333",
+            withdrawal_bank_id=2,
+            deposit_account="444-555-666",
+            deposit_bank_id=2,
+        )
+
+        User.objects.create(
+            id=2,
+            name="무현",
+            email="example@naver.com",
+            phone_number="010-2222-4444",
+            password="1234dfsdflker@!",
+            deposit_id=1,
+        )
+
+        Portfolio.objects.bulk_create(
+            [
+                Portfolio(
+                    id=portfolio_id,
+                    user_id=2,
+                    investment_id=investment_id,
+                    amounts=amounts,
+                    investment_state_id=1,
+                    repayment_state_id=1,
+                )
+                for portfolio_id, investment_id, amounts in [(1, 1, 600000), (2, 2, 1000000), (3, 2, 333333)]
+            ]
+        )
+
+    def test_build_schedule_repays_principal(self):
+        for method in (BULLET, AMORTIZING, EQUAL_PRINCIPAL):
+            schedule = build_schedule([1000000, 333333], 12, 12.0, method)
+
+            self.assertEqual(schedule["principal"].sum(axis=1).tolist(), [1000000, 333333])
+            self.assertEqual(schedule["interest"][0][0], 10000)
+            self.assertEqual(schedule["tax"][0][0], 1540)
+
+    def test_build_schedule_shapes(self):
+        bullet     = build_schedule([1000000], 6, 12.0, BULLET)
+        amortizing = build_schedule([1000000], 6, 12.0, AMORTIZING)
+
+        self.assertEqual(bullet["principal"][0].tolist(), [0, 0, 0, 0, 0, 1000000])
+        self.assertEqual(bullet["interest"][0].tolist(), [10000] * 6)
+        payments = (amortizing["principal"] + amortizing["interest"])[0].tolist()
+
+        self.assertLessEqual(max(payments[:-1]) - min(payments[:-1]), 1)
+        self.assertLessEqual(abs(payments[-1] - payments[0]), 6)
+
+    def test_generate_repayment_schedules(self):
+        investment = Investment.objects.select_related("detail").get(id=2)
+        registry.names("repayment_type")
+
+        with self.assertNumQueries(6):
+            generated = generate_repayment_schedules(investment, start_date=datetime.date(2021, 1, 15))
+
+        self.assertEqual(generated, 12)
+        self.assertEqual(
+            list(
+                Repayment.objects.filter(portfolio_id=2)
+                .order_by("repayment_count")
+                .values_list("due_date", flat=True)[:2]
+            ),
+            [datetime.date(2021, 2, 28), datetime.date(2021, 3, 31)],
+        )
+        self.assertEqual(
+            sum(Repayment.objects.filter(portfolio_id=3).values_list("principal", flat=True)), 333333
+        )
+        self.assertEqual(load_portfolio_totals(User.objects.get(id=2))["cumulative_profit"], 0)
+
+    def test_regenerate_keeps_settled_repayments(self):
+        investment = Investment.objects.select_related("detail").get(id=1)
+        generate_repayment_schedules(investment)
+
+        settled = Repayment.objects.get(portfolio_id=1, repayment_count=1)
+        settled.transaction = Transaction.objects.create(
+            type_id=1, information="주거안정 1호", amounts=5000, deposit_id=1, user_id=2, investment_id=1
+        )
+        settled.save()
+
+        Portfolio.objects.filter(id=1).update(amounts=1200000)
+
+        self.assertEqual(generate_repayment_schedules(investment), 5)
+        self.assertEqual(Repayment.objects.filter(portfolio_id=1).count(), 6)
+        self.assertEqual(
+            Repayment.objects.get(portfolio_id=1, repayment_count=1).transaction_id,
+            settled.transaction_id,
+        )
+        self.assertEqual(Repayment.objects.get(portfolio_id=1, repayment_count=6).principal, 1200000)
+
+    def test_generate_repayment_schedules_command(self):
+        out = StringIO()
+        call_command("generate_repayment_schedules", "--start-date", "2021-01-15", stdout=out)
+
+        self.assertIn("GENERATED 18 REPAYMENTS FOR 2 INVESTMENTS", out.getvalue())
+        self.assertEqual(Repayment.objects.count(), 18)
+
+
+class SettlementTest(TestCase):
+    def setUp(self):
+        Grade.objects.create(id=1, name="A+")
+        RepaymentType.objects.create(id=2, name="원리금균등")
+        LoanType.objects.create(id=1, name="부동산 담보 대출")
+
+        Security.objects.create(
+            id=1,
+            address="경기도 김포시",
+            completion_date="2012년 5월",
+            supply_area=153.20,
+            household=465,
+            exclusive_private_area=122.61,
+            lease_status="본인거주",
+        )
+
+        BorrowerInformation.objects.create(
+            id=1,
+            credit_score=664,
+            income_type="근로소득",
+            income=1740000,
+            card_usage_amount=780000,
+        )
+
+        InvestmentDetail.objects.create(
+            id=1,
+            loan_type_id=1,
+            evaluation_price=600000000,
+            repayment_day=25,
+            priority_bond_amount=400000000,
+        )
+
+        Investment.objects.create(
+            id=1,
+            name="주거안정 1호",
+            grade_id=1,
+            duration=2,
+            repayment_type_id=2,
+            return_rate=12.0,
+            target_amount=80000000,
+            current_amount=0,
+            detail_id=1,
+            security_id=1,
+            borrower_id=1,
+        )
+
+        InvestmentState.objects.bulk_create(
+            [InvestmentState(id=1, name="투자중"), InvestmentState(id=2, name="투자완료")]
+        )
+        RepaymentState.objects.bulk_create(
+            [RepaymentState(id=1, name="정상"), RepaymentState(id=2, name="상환지연")]
+        )
+        TransactionType.objects.create(id=1, name="상환")
+        Bank.objects.create(id=2, name="농협은행")
+
+        for user_id in (2, 3):
+            Deposit.objects.create(
+                id=user_id,
+                withdrawal_account=f"111-{user_id}",
+                withdrawal_bank_id=2,
+                deposit_account=f"444-{user_id}",
+                deposit_bank_id=2,
+                balance=1000,
+            )
+
+            User.objects.create(
+                id=user_id,
+                name="무현",
+                email=f"example{user_id}@naver.com",
+                phone_number="010-2222-4444",
+                password="1234dfsdflker@!",
+                deposit_id=user_id,
+            )
+
+        Portfolio.objects.bulk_create(
+            [
+                Portfolio(
+                    id=portfolio_id,
+                    user_id=user_id,
+                    investment_id=1,
+                    amounts=amounts,
+                    investment_state_id=1,
+                    repayment_state_id=2,
+                )
+                for portfolio_id, user_id, amounts in [(1, 2, 600000), (2, 2, 400000), (3, 3, 2000000)]
+            ]
+        )
+
+        self.investment = Investment.objects.select_related("detail").get(id=1)
+        generate_repayment_schedules(self.investment)
+
+    def expected_payouts(self, repayment_count):
+        payouts = {2: 0, 3: 0}
+
+        for user_id, principal, interest, tax, charge in Repayment.objects.filter(
+            repayment_count=repayment_count
+        ).values_list("user_id", "principal", "interest", "tax", "charge"):
+            payouts[user_id] += net_payout(principal, interest, tax, charge)
+
+        return payouts
+
+    def test_settle_investment_credits_holders(self):
+        payouts    = self.expected_payouts(1)
+        settlement = settle_investment(self.investment, 1, chunk_size=2)
+
+        self.assertIsNotNone(settlement.completed_time)
+        self.assertEqual(settlement.settled_count, 3)
+        self.assertEqual(settlement.settled_amounts, sum(payouts.values()))
+        self.assertEqual([timing["rows"] for timing in settlement.chunk_timings], [2, 1])
+
+        for user_id, amounts in payouts.items():
+            self.assertEqual(Deposit.objects.get(id=user_id).balance, 1000 + amounts)
+            self.assertEqual(balance_at(user_id), amounts)
+            self.assertEqual(
+                sum(Transaction.objects.filter(user_id=user_id, type_id=1).values_list("amounts", flat=True)),
+                amounts,
+            )
+
+        self.assertFalse(Repayment.objects.filter(repayment_count=1, transaction__isnull=True).exists())
+        self.assertFalse(Portfolio.objects.exclude(repayment_state_id=1).exists())
+        self.assertFalse(Portfolio.objects.exclude(investment_state_id=1).exists())
+        self.assertEqual(diff_portfolio_summary(2), {})
+        self.assertGreater(PortfolioSummary.objects.get(user_id=2).cumulative_profit, 0)
+
+    def test_settlement_chunk_longer_than_snapshot_lag_rolls_back(self):
+        with mock.patch("transactions.ledger.SNAPSHOT_LAG", datetime.timedelta(0)):
+            with self.assertRaises(SnapshotLagExceeded):
+                settle_investment(self.investment, 1, chunk_size=2)
+
+        self.assertFalse(LedgerEntry.objects.exists())
+        self.assertFalse(Repayment.objects.filter(transaction__isnull=False).exists())
+
+    def test_settle_investment_resumes_from_checkpoint(self):
+        payouts    = self.expected_payouts(1)
+        settlement = settle_investment(self.investment, 1, chunk_size=1, max_chunks=2)
+
+        self.assertIsNone(settlement.completed_time)
+        self.assertEqual(settlement.settled_count, 2)
+
+        settlement = settle_investment(self.investment, 1, chunk_size=1)
+        settlement = settle_investment(self.investment, 1, chunk_size=1)
+
+        self.assertEqual(settlement.settled_count, 3)
+        self.assertEqual(len(settlement.chunk_timings), 3)
+        self.assertEqual(Settlement.objects.count(), 1)
+        self.assertEqual(Deposit.objects.get(id=2).balance, 1000 + payouts[2])
+        self.assertEqual(Deposit.objects.get(id=3).balance, 1000 + payouts[3])
+
+    def test_final_repayment_completes_portfolios(self):
+        settle_investment(self.investment, 1)
+        settle_investment(self.investment, 2)
+
+        self.assertFalse(Portfolio.objects.exclude(investment_state_id=2).exists())
+        self.assertEqual(
+            Deposit.objects.get(id=3).balance - 1000,
+            self.expected_payouts(1)[3] + self.expected_payouts(2)[3],
+        )
+
+    def test_state_kept_while_earlier_instalment_outstanding(self):
+        settle_investment(self.investment, 2)
+
+        self.assertFalse(Portfolio.objects.exclude(repayment_state_id=2).exists())
+        self.assertFalse(Portfolio.objects.exclude(investment_state_id=1).exists())
+
+        settle_investment(self.investment, 1)
+
+        self.assertFalse(Portfolio.objects.exclude(repayment_state_id=1).exists())
+
+    def test_users_without_deposit_are_recorded_and_retried(self):
+        User.objects.filter(id=3).update(deposit=None)
+        settlement = settle_investment(self.investment, 1)
+
+        self.assertIsNone(settlement.completed_time)
+        self.assertEqual(settlement.skipped_user_ids, [3])
+        self.assertEqual(settlement.last_repayment_id, 0)
+
+        out = StringIO()
+        call_command("settle_repayments", "1", "1", stdout=out)
+
+        self.assertIn("SKIPPED USERS WITHOUT DEPOSIT: 3", out.getvalue())
+        self.assertIn("1 UNSETTLED, IN PROGRESS", out.getvalue())
+
+        User.objects.filter(id=3).update(deposit_id=3)
+        settlement = settle_investment(self.investment, 1)
+
+        self.assertIsNotNone(settlement.completed_time)
+        self.assertEqual(settlement.skipped_user_ids, [])
+        self.assertEqual(Deposit.objects.get(id=3).balance, 1000 + self.expected_payouts(1)[3])
+
+    def test_settle_repayments_command(self):
+        out = StringIO()
+        call_command("settle_repayments", "1", "1", "--chunk-size", "2", stdout=out)
+
+        self.assertIn("chunk    2  rows=1", out.getvalue())
+        self.assertIn("SETTLED 3 REPAYMENTS", out.getvalue())
+        self.assertIn("0 UNSETTLED, COMPLETE", out.getvalue())
+
+        with self.assertRaises(CommandError):
+            call_command("settle_repayments", "9", "1", stdout=StringIO())
+
+
+class StateScanTest(TestCase):
+    def setUp(self):
+        Grade.objects.create(id=1, name="A+")
+        RepaymentType.objects.create(id=1, name="만기일시")
+        LoanType.objects.create(id=1, name="부동산 담보 대출")
+
+        Security.objects.create(
+            id=1,
+            address="경기도 김포시",
+            completion_date="2012년 5월",
+            supply_area=153.20,
+            household=465,
+            exclusive_private_area=122.61,
+            lease_status="본인거주",
+        )
+
+        BorrowerInformation.objects.create(
+            id=1,
+            credit_score=664,
+            income_type="근로소득",
+            income=1740000,
+            card_usage_amount=780000,
+        )
+
+        InvestmentDetail.objects.create(
+            id=1,
+            loan_type_id=1,
+            evaluation_price=600000000,
+            repayment_day=25,
+            priority_bond_amount=400000000,
+        )
+
+        Investment.objects.bulk_create(
+            [
+                Investment(
+                    id=investment_id,
+                    name=f"주거안정 {investment_id}호",
+                    grade_id=1,
+                    duration=6,
+                    repayment_type_id=1,
+                    return_rate=12.0,
+                    target_amount=80000000,
+                    current_amount=0,
+                    detail_id=1,
+                    security_id=1,
+                    borrower_id=1,
+                )
+                for investment_id in (1, 2)
+            ]
+        )
+
+        InvestmentState.objects.bulk_create(
+            [
+                InvestmentState(id=1, name="투자중"),
+                InvestmentState(id=2, name="투자완료"),
+                InvestmentState(id=3, name="손실"),
+            ]
+        )
+        RepaymentState.objects.bulk_create(
+            [
+                RepaymentState(id=1, name="정상"),
+                RepaymentState(id=2, name="상환지연"),
+                RepaymentState(id=3, name="연체"),
+            ]
+        )
+        TransactionType.objects.create(id=1, name="상환")
+        Bank.objects.create(id=2, name="농협은행")
+
+        Deposit.objects.create(
+            id=1,
+            withdrawal_account="111-222-333",
+            withdrawal_bank_id=2,
+            deposit_account="444-555-666",
+            deposit_bank_id=2,
+        )
+
+        User.objects.create(
+            id=2,
+            name="무현",
+            email="example@naver.com",
+            phone_number="010-2222-4444",
+            password="1234dfsdflker@!",
+            deposit_id=1,
+        )
+
+        Portfolio.objects.bulk_create(
+            [
+                Portfolio(
+                    id=investment_id,
+                    user_id=2,
+                    investment_id=investment_id,
+                    amounts=1000000,
+                    investment_state_id=1,
+                    repayment_state_id=1,
+                )
+                for investment_id in (1, 2)
+            ]
+        )
+
+        self.investments = Investment.objects.select_related("detail").order_by("id")
+
+        generate_repayment_schedules(self.investments[0], start_date=datetime.date(2021, 1, 1))
+        generate_repayment_schedules(self.investments[1], start_date=datetime.date(2021, 2, 1))
+
+    def states(self):
+        return list(
+            Portfolio.objects.order_by("id").values_list("investment_state_id", "repayment_state_id")
+        )
+
+    def test_scan_flags_late_repayments(self):
+        self.assertEqual(
+            scan_portfolio_states(datetime.date(2021, 2, 25)), {"delay": 0, "overdue": 0, "loss": 0}
+        )
+        self.assertEqual(
+            scan_portfolio_states(datetime.date(2021, 2, 26)), {"delay": 1, "overdue": 0, "loss": 0}
+        )
+        self.assertEqual(self.states(), [(1, 2), (1, 1)])
+        self.assertEqual(diff_portfolio_summary(2), {})
+
+        self.assertEqual(
+            scan_portfolio_states(datetime.date(2021, 3, 27)), {"delay": 1, "overdue": 1, "loss": 0}
+        )
+        self.assertEqual(self.states(), [(1, 3), (1, 2)])
+
+        self.assertEqual(
+            scan_portfolio_states(datetime.date(2021, 6, 1)), {"delay": 0, "overdue": 1, "loss": 1}
+        )
+        self.assertEqual(self.states(), [(3, 3), (1, 3)])
+        self.assertEqual(diff_portfolio_summary(2), {})
+
+    def test_scan_is_incremental(self):
+        scan_portfolio_states(datetime.date(2021, 2, 26))
+
+        self.assertEqual(scan_portfolio_states(datetime.date(2021, 2, 26)), {})
+        self.assertEqual(StateScan.objects.get().scanned_through, datetime.date(2021, 2, 26))
+
+        Portfolio.objects.update(repayment_state_id=1)
+
+        self.assertEqual(
+            scan_portfolio_states(datetime.date(2021, 2, 27)), {"delay": 0, "overdue": 0, "loss": 0}
+        )
+
+    @override_settings(TIME_ZONE="Asia/Seoul")
+    def test_scan_defaults_to_local_date(self):
+        now = datetime.datetime(2021, 2, 25, 16, tzinfo=datetime.timezone.utc)
+
+        with mock.patch("django.utils.timezone.now", return_value=now):
+            scan_portfolio_states()
+
+        self.assertEqual(StateScan.objects.get().scanned_through, datetime.date(2021, 2, 26))
+
+    def test_settled_repayments_are_not_flagged(self):
+        settle_investment(self.investments[0], 1)
+
+        self.assertEqual(
+            scan_portfolio_states(datetime.date(2021, 3, 1)), {"delay": 0, "overdue": 0, "loss": 0}
+        )
+        self.assertEqual(self.states(), [(1, 1), (1, 1)])
+
+    def test_scan_portfolio_states_command(self):
+        out = StringIO()
+        call_command("scan_portfolio_states", "--today", "2021-02-26", stdout=out)
+        call_command("scan_portfolio_states", "--today", "2021-02-26", stdout=out)
+
+        self.assertIn("DELAY 1, OVERDUE 0, LOSS 0", out.getvalue())
+        self.assertIn("ALREADY SCANNED", out.getvalue())
+
+
+class IdempotencyKeyTest(TestCase):
+    def setUp(self):
+        cache.clear()
+
+        TransactionType.objects.bulk_create(
+            [TransactionType(id=2, name="입금"), TransactionType(id=3, name="출금")]
+        )
+
+        Bank.objects.create(id=2, name="농협은행")
+
+        Deposit.objects.create(
+            id=1,
+            withdrawal_account="111-222-333",
+            withdrawal_bank_id=2,
+            deposit_account="444-555-666",
+            deposit_bank_id=2,
+            balance=100000,
+        )
+
+        User.objects.create(
+            id=2,
+            name="무현",
+            email="example@naver.com",
+            phone_number="010-2222-4444",
+            password="1234dfsdflker@!",
+            deposit_id=1,
+        )
+
+        self.header = {
+            "HTTP_Authorization": jwt.encode({"id": 2}, MY_SECRET_KEY, algorithm="HS256")
+        }
+
+    def tearDown(self):
+        cache.clear()
+
+    def post(self, path, amounts, key=None):
+        headers = dict(self.header)
+
+        if key:
+            headers["HTTP_IDEMPOTENCY_KEY"] = key
+
+        return Client().post(
+            path, json.dumps({"amounts": amounts}), content_type="application/json", **headers
+        )
+
+    def test_retry_replays_original_response(self):
+        response = self.post("/transactions/deposit", 50000, key="deposit-1")
+        self.post("/transactions/deposit", 50000, key="deposit-1")
+
+        with self.assertNumQueries(1):
+            retried = self.post("/transactions/deposit", 50000, key="deposit-1")
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(retried.status_code, 201)
+        self.assertEqual(retried.json(), {"message": "SUCCESS", "deposit_balance": 150000})
+        self.assertEqual(retried["Idempotent-Replayed"], "true")
+        self.assertEqual(Deposit.objects.get(id=1).balance, 150000)
+        self.assertEqual(Transaction.objects.count(), 1)
+
+    def test_requests_without_key_are_not_deduplicated(self):
+        self.post("/transactions/deposit", 50000)
+        self.post("/transactions/deposit", 50000)
+
+        self.assertEqual(Deposit.objects.get(id=1).balance, 200000)
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+    def test_key_reused_with_different_request(self):
+        self.post("/transactions/deposit", 50000, key="shared")
+
+        self.assertEqual(self.post("/transactions/deposit", 70000, key="shared").status_code, 422)
+        self.assertEqual(self.post("/transactions/withdrawal", 50000, key="shared").status_code, 422)
+        self.assertEqual(Deposit.objects.get(id=1).balance, 150000)
+
+    def test_client_errors_are_replayed(self):
+        response = self.post("/transactions/withdrawal", 200000, key="withdrawal-1")
+        self.post("/transactions/deposit", 500000)
+
+        retried = self.post("/transactions/withdrawal", 200000, key="withdrawal-1")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(retried.status_code, 400)
+        self.assertEqual(retried.json(), {"message": "WRONG_REQUEST"})
+        self.assertEqual(Deposit.objects.get(id=1).balance, 600000)
+
+    def test_invalid_key(self):
+        response = self.post("/transactions/deposit", 50000, key="k" * 65)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {"message": "INVALID_IDEMPOTENCY_KEY"})
+
+    def test_expired_keys_are_reexecuted_and_pruned(self):
+        self.post("/transactions/deposit", 50000, key="deposit-1")
+        self.post("/transactions/deposit", 50000, key="deposit-2")
+        IdempotencyKey.objects.update(expires_time=timezone.now() - datetime.timedelta(seconds=1))
+
+        self.assertEqual(self.post("/transactions/deposit", 50000, key="deposit-1").status_code, 201)
+        self.assertEqual(Deposit.objects.get(id=1).balance, 250000)
+
+        out = StringIO()
+        call_command("prune_idempotency_keys", stdout=out)
+
+        self.assertIn("PRUNED 1 IDEMPOTENCY KEYS", out.getvalue())
+        self.assertEqual(list(IdempotencyKey.objects.values_list("key", flat=True)), ["deposit-1"])
+
+
+class LedgerSnapshotTest(TestCase):
+    def setUp(self):
+        cache.clear()
+
+        TransactionType.objects.bulk_create(
+            [TransactionType(id=2, name="입금"), TransactionType(id=3, name="출금")]
+        )
+
+        Bank.objects.create(id=2, name="농협은행")
+
+        Deposit.objects.create(
+            id=1,
+            withdrawal_account="111-222-333",
+            withdrawal_bank_id=2,
+            deposit_account="444-555-666",
+            deposit_bank_id=2,
+        )
+
+        User.objects.create(
+            id=2,
+            name="무현",
+            email="example@naver.com",
+            phone_number="010-2222-4444",
+            password="1234dfsdflker@!",
+            deposit_id=1,
+        )
+
+        self.header = {
+            "HTTP_Authorization": jwt.encode({"id": 2}, MY_SECRET_KEY, algorithm="HS256")
+        }
+
+    def tearDown(self):
+        cache.clear()
+
+    def post(self, path, amounts):
+        return Client().post(
+            path, json.dumps({"amounts": amounts}), content_type="application/json", **self.header
+        )
+
+    def age_entries(self, minutes):
+        LedgerEntry.objects.update(created_time=timezone.now() - datetime.timedelta(minutes=minutes))
+
+    def test_movements_post_balanced_entries(self):
+        self.post("/transactions/deposit", 50000)
+        self.post("/transactions/withdrawal", 20000)
+
+        self.assertEqual(
+            list(LedgerEntry.objects.order_by("id").values_list("account", "amounts")),
+            [("deposit", 50000), ("bank", -50000), ("deposit", -20000), ("bank", 20000)],
+        )
+        self.assertEqual(balance_at(1), Deposit.objects.get(id=1).balance)
+
+    def test_balance_from_snapshot_and_delta(self):
+        self.post("/transactions/deposit", 50000)
+        self.post("/transactions/withdrawal", 20000)
+        self.age_entries(10)
+
+        self.assertEqual(take_balance_snapshots(), 1)
+        self.assertEqual(take_balance_snapshots(), 0)
+        self.assertEqual(BalanceSnapshot.objects.get().balance, 30000)
+
+        self.post("/transactions/deposit", 10000)
+
+        with self.assertNumQueries(2):
+            self.assertEqual(balance_at(1), 40000)
+
+        self.age_entries(5)
+        self.assertEqual(take_balance_snapshots(), 1)
+        self.assertEqual(
+            list(BalanceSnapshot.objects.order_by("id").values_list("balance", flat=True)), [30000, 40000]
+        )
+
+    def test_balance_at_point_in_time(self):
+        self.post("/transactions/deposit", 50000)
+        self.age_entries(10)
+        take_balance_snapshots()
+        BalanceSnapshot.objects.update(taken_time=timezone.now() - datetime.timedelta(minutes=9))
+
+        self.post("/transactions/withdrawal", 20000)
+
+        self.assertEqual(balance_at(1, timezone.now() - datetime.timedelta(minutes=20)), 0)
+        self.assertEqual(balance_at(1, timezone.now() - datetime.timedelta(minutes=5)), 50000)
+        self.assertEqual(balance_at(1), 30000)
+
+    def test_entries_are_append_only(self):
+        self.post("/transactions/deposit", 50000)
+        entry = LedgerEntry.objects.first()
+
+        with self.assertRaises(ValueError):
+            entry.save()
+
+        with self.assertRaises(ValueError):
+            entry.delete()
+
+    def test_reconcile_balances_command(self):
+        self.post("/transactions/deposit", 50000)
+
+        out = StringIO()
+        call_command("reconcile_balances", "--workers", "1", stdout=out)
+
+        self.assertIn("RECONCILED 1 DEPOSITS", out.getvalue())
+
+        Deposit.objects.filter(id=1).update(balance=70000)
+
+        with self.assertRaises(CommandError):
+            call_command("reconcile_balances", "--workers", "1", stdout=StringIO(), stderr=StringIO())
+
+
+    def test_zero_sum_checked_from_last_snapshot_cut(self):
+        self.post("/transactions/deposit", 50000)
+        self.age_entries(10)
+        take_balance_snapshots()
+
+        cut = BalanceSnapshot.objects.get().last_entry_id
+
+        self.post("/transactions/withdrawal", 20000)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(unbalanced_deposits(cut), {})
+
+        self.assertEqual(len(queries), 1)
+        self.assertIn(str(cut), queries[0]["sql"])
+
+        LedgerEntry.objects.bulk_create(
+            [LedgerEntry(deposit_id=1, account=LedgerEntry.Account.BANK, amounts=-5000)]
+        )
+
+        self.assertEqual(unbalanced_deposits(cut), {1: -5000})
+
+        with self.assertRaises(CommandError):
+            call_command("reconcile_balances", "--workers", "1", stdout=StringIO(), stderr=StringIO())
+
+class TransactionOutboxTest(TestCase):
+    def setUp(self):
+        TransactionType.objects.bulk_create(
+            [TransactionType(id=2, name="입금"), TransactionType(id=3, name="출금")]
+        )
+
+        Bank.objects.create(id=2, name="농협은행")
+
+        Deposit.objects.create(
+            id=1,
+            withdrawal_account="111-222-333",
+            withdrawal_bank_id=2,
+            deposit_account="444-555-666",
+            deposit_bank_id=2,
+        )
+
+        User.objects.create(
+            id=2,
+            name="무현",
+            email="example@naver.com",
+            phone_number="010-2222-4444",
+            password="1234dfsdflker@!",
+            deposit_id=1,
+        )
+
+        self.header = {
+            "HTTP_Authorization": jwt.encode({"id": 2}, MY_SECRET_KEY, algorithm="HS256")
+        }
+
+    def tearDown(self):
+        cache.clear()
+
+    def post(self, path, amounts):
+        return Client().post(
+            path, json.dumps({"amounts": amounts}), content_type="application/json", **self.header
+        )
+
+    @override_settings(TRANSACTION_WRITE_BEHIND=True)
+    def test_write_behind_queues_transactions(self):
+        self.post("/transactions/deposit", 50000)
+        response = self.post("/transactions/withdrawal", 20000)
+
+        self.assertEqual(response.json()["deposit_balance"], 30000)
+        self.assertFalse(Transaction.objects.exists())
+        self.assertEqual(TransactionOutbox.objects.count(), 2)
+        self.assertEqual(balance_at(1), 30000)
+
+        queued_times = list(TransactionOutbox.objects.order_by("id").values_list("created_time", flat=True))
+
+        out = StringIO()
+        call_command("drain_transaction_outbox", "--batch-size", "1", stdout=out)
+
+        self.assertIn("DRAINED 2 TRANSACTIONS", out.getvalue())
+        self.assertFalse(TransactionOutbox.objects.exists())
+        self.assertEqual(
+            list(Transaction.objects.order_by("id").values_list("type_id", "information", "amounts")),
+            [(2, "농협은행", 50000), (3, "농협은행", 20000)],
+        )
+        self.assertEqual(
+            list(Transaction.objects.order_by("id").values_list("created_time", flat=True)), queued_times
+        )
+        self.assertFalse(LedgerEntry.objects.filter(transaction__isnull=True).exists())
+        self.assertEqual(
+            list(
+                LedgerEntry.objects.filter(account=LedgerEntry.Account.DEPOSIT)
+                .order_by("transaction_id")
+                .values_list("transaction__type_id", "amounts")
+            ),
+            [(2, 50000), (3, -20000)],
+        )
+
+    @override_settings(TRANSACTION_WRITE_BEHIND=True)
+    def test_snapshots_stop_below_undrained_outbox_entries(self):
+        self.post("/transactions/deposit", 50000)
+        LedgerEntry.objects.update(created_time=timezone.now() - datetime.timedelta(minutes=10))
+
+        self.assertEqual(take_balance_snapshots(), 0)
+
+        call_command("drain_transaction_outbox", stdout=StringIO())
+
+        self.assertEqual(take_balance_snapshots(), 1)
+        self.assertEqual(BalanceSnapshot.objects.get().balance, 50000)
+
+    def test_synchronous_mode_links_ledger_entries(self):
+        self.post("/transactions/deposit", 50000)
+
+        self.assertFalse(TransactionOutbox.objects.exists())
+        self.assertEqual(
+            set(LedgerEntry.objects.values_list("transaction_id", flat=True)),
+            {Transaction.objects.get().id},
+        )
@@ -1,72 +1,94 @@
+import csv
 import json
 
-from django.http import JsonResponse
+from django.http import JsonResponse, StreamingHttpResponse
 from django.views import View
 from django.db import transaction
-from django.db.models import Sum, Avg
 from django.db.models import Q
+from django.utils.dateparse import parse_datetime
 
 from transactions.models import (
-    Repayment,
     RepaymentState,
     Transaction,
     TransactionType,
     Bank,
+    Deposit,
     Portfolio,
     InvestmentState,
 )
-from investments.models import Investment
-from core.utils import login_decorator
+from transactions.idempotency import idempotent
+from transactions.ledger import (
+    InsufficientBalance,
+    add_to_portfolio,
+    credit_deposit,
+    debit_deposit,
+    fund_investment,
+    lock_deposit,
+)
+from transactions.outbox import record_transaction
+from transactions.portfolio import (
+    apply_portfolio_investment,
+    build_portfolio_results,
+    load_portfolio_totals,
+)
+from core.registry import registry
+from core.renderers import json_response, render_json
+from core.utils import (
+    login_decorator,
+    encode_cursor,
+    decode_cursor,
+    keyset_q,
+)
 
 
 class InvestTransactionView(View):
     @login_decorator
+    @idempotent
     def post(self, request, investment_id):
         try:
             data = json.loads(request.body)
-
-            if data["amounts"] <= 0:
-                return JsonResponse({"message": "INVALID_INPUT"}, status=400)
-
-            if not Investment.objects.filter(id=investment_id).exists():
-                return JsonResponse({"message": "INVALID_INVESTMENT_ID"}, status=404)
-
-            investment = Investment.objects.get(id=investment_id)
             user = request.user
-            deposit = user.deposit
 
             investment_amount = data["amounts"]
 
-            if investment_amount > deposit.balance:
-                return JsonResponse({"message": "OUT_OF_RANGE"}, status=400)
+            if investment_amount <= 0:
+                return JsonResponse({"message": "INVALID_INPUT"}, status=400)
 
             with transaction.atomic():
-                Transaction.objects.create(
-                    type_id=TransactionType.Type.INVESTMENT.value,
-                    information=investment.name,
-                    amounts=investment_amount,
-                    deposit=deposit,
-                    user=user,
-                    investment=investment,
-                )
+                deposit              = lock_deposit(user.deposit_id)
+                investment, accepted = fund_investment(investment_id, investment_amount)
+
+                if not investment:
+                    return JsonResponse({"message": "INVALID_INVESTMENT_ID"}, status=404)
 
-                portfolio, created = Portfolio.objects.get_or_create(
+                if not accepted:
+                    return JsonResponse({"message": "FUNDING_CLOSED"}, status=400)
+
+                debit_deposit(deposit, accepted)
+
+                portfolio, created = Portfolio.objects.select_for_update().get_or_create(
                     user=user,
                     investment=investment,
                     investment_state_id=InvestmentState.State.INVESTING.value,
                     repayment_state_id=RepaymentState.State.NORMAL.value,
                 )
+                add_to_portfolio(portfolio, accepted)
+
+                record_transaction(
+                    TransactionType.Type.INVESTMENT.value,
+                    investment.name,
+                    accepted,
+                    deposit.id,
+                    user.id,
+                    investment.id,
+                )
 
-                deposit.balance -= investment_amount
-                deposit.save()
-
-                investment.current_amount += investment_amount
-                investment.save()
+                apply_portfolio_investment(portfolio, accepted, created)
 
-                portfolio.amounts += investment_amount
-                portfolio.save()
+            return JsonResponse({"message": "SUCCESS", "amounts": accepted}, status=201)
 
-            return JsonResponse({"message": "SUCCESS"}, status=201)
+        except InsufficientBalance:
+            return JsonResponse({"message": "OUT_OF_RANGE"}, status=400)
 
         except TypeError:
             return JsonResponse({"message": "TYPE_ERROR"}, status=400)
@@ -77,30 +99,28 @@ class InvestTransactionView(View):
 
 class DepositTransactionView(View):
     @login_decorator
+    @idempotent
     def post(self, request):
         try:
             data = json.loads(request.body)
-            deposit = request.user.deposit
 
             if data["amounts"] <= 0:
                 return JsonResponse({"message": "INVALID_INPUT"}, status=400)
 
             with transaction.atomic():
-                Transaction.objects.create(
-                    type_id=TransactionType.Type.DEPOSIT.value,
-                    information=Bank.objects.get(
-                        id=Bank.DefaultBank.NH_BANK.value
-                    ).name,
-                    amounts=data["amounts"],
-                    deposit=deposit,
-                    user=request.user,
+                deposit = lock_deposit(request.user.deposit_id)
+                balance = credit_deposit(deposit, data["amounts"])
+
+                record_transaction(
+                    TransactionType.Type.DEPOSIT.value,
+                    registry.bank_name(Bank.DefaultBank.NH_BANK.value),
+                    data["amounts"],
+                    deposit.id,
+                    request.user.id,
                 )
 
-                deposit.balance += data["amounts"]
-                deposit.save()
-
             return JsonResponse(
-                {"message": "SUCCESS", "deposit_balance": deposit.balance}, status=201
+                {"message": "SUCCESS", "deposit_balance": balance}, status=201
             )
 
         except TypeError:
@@ -113,249 +133,142 @@ class DepositTransactionView(View):
 class PortfolioView(View):
     @login_decorator
     def get(self, request):
-        deposit = request.user.deposit
-        portfolios = Portfolio.objects.filter(user=request.user)
-        repayments = Repayment.objects.filter(user=request.user)
-        portfolio_investings = portfolios.filter(
-            investment_state_id=InvestmentState.State.INVESTING.value
-        )
+        deposit = Deposit.objects.get(id=request.user.deposit_id)
+        totals  = load_portfolio_totals(request.user)
 
-        results = {
-            "deposit_information": {
-                "withdrawal_account": f"{deposit.withdrawal_bank.name}{deposit.withdrawal_account}",
-                "deposit_account": f"{deposit.deposit_bank.name}{deposit.deposit_account}",
-                "deposit_balance": deposit.balance,
-                "gross_investment_limit": 30000000
-                - portfolios.aggregate(assets=Sum("amounts")).get("amounts", 0),
-                "real_estate_investment_limit": 10000000
-                - portfolios.aggregate(assets=Sum("amounts")).get("amounts", 0),
-            },
-            "investment_general_infomation": {
-                "rate_of_return": portfolios.aggregate(
-                    rate_of_return=Avg("investment__return_rate")
-                ).get("rate_of_return")
-                or 0,
-                "assets": portfolios.aggregate(assets=Sum("amounts")).get("assets")
-                or 0 + deposit.balance,
-                "cumulative_profit": repayments.aggregate(
-                    cumulative_profit=Sum("interest")
-                ).get("cumulative_profit")
-                or 0,
-            },
-            "investment_current_condition": {
-                "all": [
-                    {
-                        "id": 1,
-                        "name": "investing_amount",
-                        "price": portfolio_investings.aggregate(
-                            amounts=Sum("amounts")
-                        ).get("amounts")
-                        or 0,
-                    },
-                    {
-                        "id": 2,
-                        "name": "invest_completed_amount",
-                        "price": portfolios.filter(
-                            investment_state_id=InvestmentState.State.COMPLETE.value
-                        )
-                        .aggregate(amounts=Sum("amounts"))
-                        .get("amounts")
-                        or 0,
-                    },
-                    {
-                        "id": 3,
-                        "name": "loss_amount",
-                        "price": portfolios.filter(
-                            investment_state_id=InvestmentState.State.LOSS.value
-                        )
-                        .aggregate(amounts=Sum("amounts"))
-                        .get("amounts")
-                        or 0,
-                    },
-                ],
-                "investing": [
-                    {
-                        "id": 1,
-                        "name": "investing_normal_amount",
-                        "price": portfolio_investings.filter(
-                            repayment_state_id=RepaymentState.State.NORMAL.value
-                        )
-                        .aggregate(amounts=Sum("amounts"))
-                        .get("amounts")
-                        or 0,
-                    },
-                    {
-                        "id": 2,
-                        "name": "investing_delay_amount",
-                        "price": portfolio_investings.filter(
-                            repayment_state_id=RepaymentState.State.DELAY.value
-                        )
-                        .aggregate(amounts=Sum("amounts"))
-                        .get("amounts")
-                        or 0,
-                    },
-                    {
-                        "id": 3,
-                        "name": "investing_overdue_amount",
-                        "price": portfolio_investings.filter(
-                            repayment_state_id=RepaymentState.State.OVERDUE.value
-                        )
-                        .aggregate(amounts=Sum("amounts"))
-                        .get("amounts")
-                        or 0,
-                    },
-                ],
-            },
-            "portfolio_current_condition": {
-                "grade": [
-                    {
-                        "id": 1,
-                        "name": "A",
-                        "price": portfolios.filter(
-                            investment__grade__name__contains="A"
-                        )
-                        .aggregate(amounts=Sum("amounts"))
-                        .get("amounts")
-                        or 0,
-                    },
-                    {
-                        "id": 2,
-                        "name": "B",
-                        "price": portfolios.filter(
-                            investment__grade__name__contains="B"
-                        )
-                        .aggregate(amounts=Sum("amounts"))
-                        .get("amounts")
-                        or 0,
-                    },
-                    {
-                        "id": 3,
-                        "name": "C",
-                        "price": portfolios.filter(
-                            investment__grade__name__contains="C"
-                        )
-                        .aggregate(amounts=Sum("amounts"))
-                        .get("amounts")
-                        or 0,
-                    },
-                    {
-                        "id": 4,
-                        "name": "D",
-                        "price": portfolios.filter(
-                            investment__grade__name__contains="D"
-                        )
-                        .aggregate(amounts=Sum("amounts"))
-                        .get("amounts")
-                        or 0,
-                    },
-                ],
-                "return_rate": [
-                    {
-                        "id": 1,
-                        "name": "8_under",
-                        "price": portfolios.filter(investment__return_rate__lt=8)
-                        .aggregate(amounts=Sum("amounts"))
-                        .get("amounts")
-                        or 0,
-                    },
-                    {
-                        "id": 2,
-                        "name": "8_over_or_equal",
-                        "price": portfolios.filter(
-                            investment__return_rate__gte=8,
-                            investment__return_rate__lt=10,
-                        )
-                        .aggregate(amounts=Sum("amounts"))
-                        .get("amounts")
-                        or 0,
-                    },
-                    {
-                        "id": 3,
-                        "name": "10_over_or_equal",
-                        "price": portfolios.filter(
-                            investment__return_rate__gte=10,
-                            investment__return_rate__lt=12,
-                        )
-                        .aggregate(amounts=Sum("amounts"))
-                        .get("amounts")
-                        or 0,
-                    },
-                    {
-                        "id": 4,
-                        "name": "12_over_or_equal",
-                        "price": portfolios.filter(investment__return_rate__gte=12)
-                        .aggregate(amounts=Sum("amounts"))
-                        .get("amounts")
-                        or 0,
-                    },
-                ],
-            },
-        }
+        results = build_portfolio_results(deposit, totals)
 
         return JsonResponse({"results": results}, status=200)
 
 
+class EchoBuffer:
+    def write(self, value):
+        return value
+
+
 class TransactionHistoryView(View):
+    DEFAULT_LIMIT = 20
+    MAX_LIMIT     = 100
+    EXPORT_FIELDS = ("created_time", "type", "information", "amounts")
+
     @login_decorator
     def get(self, request):
-
         type_id = request.GET.get("type_id", None)
-        q = Q()
+        export  = request.GET.get("format", None)
+        q = Q(user=request.user)
 
         if type_id:
-            q = Q(type=type_id)
+            q &= Q(type=type_id)
 
         transactions = (
-            Transaction.objects.filter(user=request.user)
-            .filter(q)
-            .order_by("-created_time")
+            Transaction.objects.filter(q)
+            .order_by("-created_time", "-id")
+            .values("id", "created_time", "information", "amounts", "type_id")
         )
 
-        return JsonResponse(
+        if export == "ndjson":
+            response = StreamingHttpResponse(
+                self.ndjson_rows(transactions), content_type="application/x-ndjson"
+            )
+            response["Content-Disposition"] = 'attachment; filename="transactions.ndjson"'
+            return response
+
+        if export == "csv":
+            response = StreamingHttpResponse(
+                self.csv_rows(transactions), content_type="text/csv"
+            )
+            response["Content-Disposition"] = 'attachment; filename="transactions.csv"'
+            return response
+
+        try:
+            limit = min(int(request.GET.get("limit", self.DEFAULT_LIMIT)), self.MAX_LIMIT)
+
+        except ValueError:
+            return JsonResponse({"message": "INVALID_INPUT"}, status=400)
+
+        if limit <= 0:
+            return JsonResponse({"message": "INVALID_INPUT"}, status=400)
+
+        try:
+            cursor = request.GET.get("cursor", None)
+
+            if cursor:
+                created_time, transaction_id = decode_cursor(cursor)
+                created_time = parse_datetime(created_time)
+                transactions = transactions.filter(
+                    keyset_q("created_time", created_time, transaction_id)
+                )
+
+        except (ValueError, TypeError):
+            return JsonResponse({"message": "INVALID_CURSOR"}, status=400)
+
+        rows = list(transactions[: limit + 1])
+        next_cursor = None
+
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1]["created_time"].isoformat(), rows[-1]["id"])
+
+        return json_response(
             {
-                "transactions": [
-                    {
-                        "created_time": transaction.created_time,
-                        "type": transaction.type.name,
-                        "information": transaction.information,
-                        "amounts": transaction.amounts,
-                    }
-                    for transaction in transactions
-                ]
+                "transactions": [self.serialize(row) for row in rows],
+                "next_cursor": next_cursor,
             },
             status=200,
         )
 
+    def serialize(self, row):
+        return {
+            "created_time": row["created_time"],
+            "type": registry.transaction_type_name(row["type_id"]),
+            "information": row["information"],
+            "amounts": row["amounts"],
+        }
+
+    def ndjson_rows(self, transactions):
+        for row in transactions.iterator(chunk_size=2000):
+            yield render_json(self.serialize(row)) + b"\n"
+
+    def csv_rows(self, transactions):
+        writer = csv.writer(EchoBuffer())
+
+        yield writer.writerow(self.EXPORT_FIELDS)
+
+        for row in transactions.iterator(chunk_size=2000):
+            serialized = self.serialize(row)
+            serialized["created_time"] = serialized["created_time"].isoformat()
+            yield writer.writerow([serialized[field] for field in self.EXPORT_FIELDS])
+
 
 class WithdrawalView(View):
     @login_decorator
+    @idempotent
     def post(self, request):
         try:
             data = json.loads(request.body)
-            deposit = request.user.deposit
 
             if data["amounts"] <= 0:
                 return JsonResponse({"message": "INVALID_INPUT"}, status=400)
 
-            if data["amounts"] > deposit.balance:
-                return JsonResponse({"message": "WRONG_REQUEST"}, status=400)
-
             with transaction.atomic():
-                Transaction.objects.create(
-                    type_id=TransactionType.Type.WITHDRAWAL.value,
-                    information=Bank.objects.get(id=deposit.withdrawal_bank.id).name,
-                    amounts=data["amounts"],
-                    deposit=deposit,
-                    user=request.user,
+                deposit = lock_deposit(request.user.deposit_id)
+                balance = debit_deposit(deposit, data["amounts"])
+
+                record_transaction(
+                    TransactionType.Type.WITHDRAWAL.value,
+                    registry.bank_name(deposit.withdrawal_bank_id),
+                    data["amounts"],
+                    deposit.id,
+                    request.user.id,
                 )
 
-                deposit.balance -= data["amounts"]
-                deposit.save()
-
             return JsonResponse(
-                {"message": "SUCCESS", "deposit_balance": deposit.balance}, status=201
+                {"message": "SUCCESS", "deposit_balance": balance}, status=201
             )
 
+        except InsufficientBalance:
+            return JsonResponse({"message": "WRONG_REQUEST"}, status=400)
+
         except TypeError:
             return JsonResponse({"message": "TYPE_ERROR"}, status=400)
 
@@ -0,0 +1,65 @@
+import json
+import threading
+import time
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_PROFILE = {
+    "id": 123456789,
+    "kakao_account": {
+        "profile": {
+            "nickname": "최파란별멋쟁이",
+        },
+        "email": "cprb@naver.com",
+    },
+}
+
+
+class FakeKakaoServer:
+    def __init__(self, profile=None, latency=0, statuses=None):
+        self.profile  = profile or DEFAULT_PROFILE
+        self.latency  = latency
+        self.statuses = list(statuses or [])
+        self.requests = 0
+        self.lock     = threading.Lock()
+
+    def next_status(self):
+        with self.lock:
+            self.requests += 1
+            return self.statuses.pop(0) if self.statuses else 200
+
+    def handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                time.sleep(server.latency)
+
+                status = server.next_status() if self.path == "/v2/user/me" else 404
+                body   = json.dumps(server.profile if status == 200 else {"msg": "error"}).encode("utf-8")
+
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def __enter__(self):
+        self.httpd  = ThreadingHTTPServer(("127.0.0.1", 0), self.handler())
+        self.url    = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+
+        return self
+
+    def __exit__(self, *exc_info):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        self.thread.join()
@@ -0,0 +1,60 @@
+import bcrypt
+
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+
+DEFAULT_BCRYPT_ROUNDS = 12
+
+
+def hash_password(password, rounds):
+    return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt(rounds)).decode("utf-8")
+
+
+def check_password(password, hashed):
+    return bcrypt.checkpw(password.encode("utf-8"), hashed.encode("utf-8"))
+
+
+class PasswordHasher:
+    def __init__(self, rounds=DEFAULT_BCRYPT_ROUNDS, workers=0):
+        self.rounds   = rounds
+        self.workers  = workers
+        self.executor = None
+
+    def run(self, func, *args):
+        if not self.workers:
+            return func(*args)
+
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(max_workers=self.workers)
+
+        return self.executor.submit(func, *args).result()
+
+    def hash(self, password):
+        return self.run(hash_password, password, self.rounds)
+
+    def check(self, password, hashed):
+        return self.run(check_password, password, hashed)
+
+    def needs_rehash(self, hashed):
+        return int(hashed.split("$")[2]) != self.rounds
+
+    def shutdown(self):
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+
+
+_hashers = {}
+
+
+def get_password_hasher():
+    key = (
+        getattr(settings, "BCRYPT_ROUNDS", DEFAULT_BCRYPT_ROUNDS),
+        getattr(settings, "PASSWORD_HASHER_WORKERS", 0),
+    )
+
+    if key not in _hashers:
+        _hashers[key] = PasswordHasher(*key)
+
+    return _hashers[key]
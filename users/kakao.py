@@ -1,19 +1,67 @@
+import hashlib
 import requests
 
-from django.http import JsonResponse
+from django.conf import settings
+from django.core.cache import cache
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+KAKAO_API_URL         = "https://kapi.kakao.com"
+KAKAO_PROFILE_TIMEOUT = 60
+
+
+class KakaoAPIError(Exception):
+    pass
+
+
+def build_session(pool_size=10, retries=2, backoff_factor=0.1):
+    retry = Retry(
+        total            = retries,
+        read             = False,
+        backoff_factor   = backoff_factor,
+        status_forcelist = (500, 502, 503, 504),
+        allowed_methods  = frozenset(["GET"]),
+        raise_on_status  = False,
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+
+    return session
 
 
 class KakaoAPI:
-    def __init__(self, access_token):
+    session = build_session()
+    timeout = 3
+
+    def __init__(self, access_token, base_url=None):
         self.access_token = access_token
-        self.user_url = "https://kapi.kakao.com/v2/user/me"
+        self.user_url = f"{base_url or getattr(settings, 'KAKAO_API_URL', KAKAO_API_URL)}/v2/user/me"
 
     def get_kakao_user(self):
+        cache_key  = "kakao:profile:" + hashlib.sha256(self.access_token.encode("utf-8")).hexdigest()
+        kakao_user = cache.get(cache_key)
+
+        if kakao_user is not None:
+            return kakao_user
+
         headers = {"Authorization": f"Bearer {self.access_token}"}
 
-        response = requests.get(self.user_url, headers=headers, timeout=3)
+        try:
+            response = self.session.get(self.user_url, headers=headers, timeout=self.timeout)
+
+        except requests.exceptions.Timeout:
+            raise TimeoutError
+
+        except requests.exceptions.RequestException:
+            raise KakaoAPIError
 
         if not response.status_code == 200:
-            return JsonResponse({"message": "REQUEST_ERROR"})
+            raise KakaoAPIError
+
+        kakao_user = response.json()
+        cache.set(cache_key, kakao_user, timeout=KAKAO_PROFILE_TIMEOUT)
 
-        return response.json()
+        return kakao_user
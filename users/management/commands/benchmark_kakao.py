@@ -0,0 +1,63 @@
+import time
+import requests
+
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+
+from users.fake_kakao import FakeKakaoServer
+from users.kakao import KakaoAPI, KakaoAPIError
+
+
+class Command(BaseCommand):
+    help = "Benchmark Kakao profile lookups against a local fake Kakao server"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=200)
+        parser.add_argument("--concurrency", type=int, default=8)
+        parser.add_argument("--latency", type=float, default=0.01)
+        parser.add_argument("--failures", type=int, default=0)
+
+    def handle(self, *args, **options):
+        total = options["requests"]
+
+        for mode in ("unpooled", "pooled", "cached"):
+            statuses = [503] * options["failures"]
+
+            with FakeKakaoServer(latency=options["latency"], statuses=statuses) as server:
+                cache.clear()
+                lookup = self.lookup(mode, server.url)
+
+                started_at = time.perf_counter()
+
+                with ThreadPoolExecutor(max_workers=options["concurrency"]) as executor:
+                    results = list(executor.map(lookup, range(total)))
+
+                elapsed = time.perf_counter() - started_at
+
+            self.stdout.write(
+                f"{mode:<9} {total / elapsed:8.1f} req/s  "
+                f"errors={results.count(False)}  upstream_requests={server.requests}"
+            )
+
+    def lookup(self, mode, base_url):
+        def unpooled(index):
+            response = requests.get(
+                f"{base_url}/v2/user/me",
+                headers={"Authorization": f"Bearer token-{index}"},
+                timeout=KakaoAPI.timeout,
+            )
+            return response.status_code == 200
+
+        def pooled(index):
+            token = "token" if mode == "cached" else f"token-{index}"
+
+            try:
+                KakaoAPI(token, base_url=base_url).get_kakao_user()
+                return True
+
+            except (KakaoAPIError, TimeoutError):
+                return False
+
+        return unpooled if mode == "unpooled" else pooled
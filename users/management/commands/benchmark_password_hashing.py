@@ -0,0 +1,43 @@
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from users.hashers import PasswordHasher, hash_password
+
+PASSWORD = "wecode12!@"
+
+
+class Command(BaseCommand):
+    help = "Report bcrypt logins/sec for different cost factors and worker pool sizes"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rounds", type=int, nargs="+", default=[8, 10, 12])
+        parser.add_argument("--workers", type=int, nargs="+", default=[0, 2, 4])
+        parser.add_argument("--logins", type=int, default=40)
+        parser.add_argument("--concurrency", type=int, default=4)
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"{'rounds':>6} {'workers':>7} {'logins/s':>10}")
+
+        for rounds in options["rounds"]:
+            hashed = hash_password(PASSWORD, rounds)
+
+            for workers in options["workers"]:
+                hasher = PasswordHasher(rounds=rounds, workers=workers)
+                hasher.check(PASSWORD, hashed)
+
+                started_at = time.perf_counter()
+
+                with ThreadPoolExecutor(max_workers=options["concurrency"]) as executor:
+                    list(
+                        executor.map(
+                            lambda _: hasher.check(PASSWORD, hashed), range(options["logins"])
+                        )
+                    )
+
+                elapsed = time.perf_counter() - started_at
+                hasher.shutdown()
+
+                self.stdout.write(f"{rounds:>6} {workers:>7} {options['logins'] / elapsed:>10.1f}")
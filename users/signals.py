@@ -0,0 +1,12 @@
+from django.db.models.signals import post_save, post_delete
+
+from core.utils import invalidate_principal
+from users.models import User
+
+
+def user_changed(sender, instance, **kwargs):
+    invalidate_principal(instance.id)
+
+
+post_save.connect(user_changed, sender=User, dispatch_uid="principal_user_save")
+post_delete.connect(user_changed, sender=User, dispatch_uid="principal_user_delete")
@@ -1,6 +1,5 @@
 import json
 import re
-import bcrypt
 import jwt
 
 from uuid import uuid4
@@ -10,7 +9,8 @@ from django.views import View
 from django.db import transaction
 
 from users.models import User
-from users.kakao import KakaoAPI
+from users.kakao import KakaoAPI, KakaoAPIError
+from users.hashers import get_password_hasher
 from transactions.models import Bank, Deposit
 from my_settings import MY_SECRET_KEY
 
@@ -53,9 +53,7 @@ class SignupView(View):
 
                 user.name = data["name"]
                 user.phone_number = data["phone_number"]
-                user.password = bcrypt.hashpw(
-                    data["password"].encode("utf-8"), bcrypt.gensalt()
-                ).decode("utf-8")
+                user.password = get_password_hasher().hash(data["password"])
                 user.deposit = deposit_created
                 user.save()
 
@@ -75,11 +73,15 @@ class SigninView(View):
 
             user = User.objects.get(email=data["email"])
 
-            if not bcrypt.checkpw(
-                data["password"].encode("utf-8"), user.password.encode("utf-8")
-            ):
+            hasher = get_password_hasher()
+
+            if not hasher.check(data["password"], user.password):
                 return JsonResponse({"message": "INVALID_USER"}, status=401)
 
+            if hasher.needs_rehash(user.password):
+                user.password = hasher.hash(data["password"])
+                user.save(update_fields=["password"])
+
             token = jwt.encode({"id": user.id}, MY_SECRET_KEY, algorithm="HS256")
             return JsonResponse(
                 {"message": "SUCCESS", "token": token, "user_name": user.name},
@@ -134,5 +136,8 @@ class KakaoSigninView(View):
         except KeyError:
             return JsonResponse({"message": "KEY_ERROR"}, status=400)
 
+        except KakaoAPIError:
+            return JsonResponse({"message": "REQUEST_ERROR"}, status=400)
+
         except TimeoutError:
             return JsonResponse({"message": "TIMEOUT_ERROR"}, status=408)